@@ -0,0 +1,149 @@
+""" Memory and construction-time benchmark of Packets and Events.
+
+Compares the slotted, flat-constructed classes in icfire.packet and
+icfire.event with the previous __dict__ based classes that chained
+super(self.__class__, ...) calls (reproduced below), then estimates the
+allocation savings over a run of tc2Fast.json.
+
+Usage: python allocation_benchmark.py [steps]
+"""
+import sys
+import os
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import icfire.event as event
+from icfire import logger
+from icfire.event import PacketEvent, LinkTickEvent
+from icfire.packet import DataPacket, AckPacket
+
+
+# Previous implementations, for comparison
+class OldPacket(object):
+    def __init__(self, source, dest, index, size,
+                 ack=False, fin=False, corrupted=False):
+        self.source = source
+        self.dest = dest
+        self.index = index
+        self.ack = ack
+        self.fin = fin
+        self.corrupted = corrupted
+        self.size = size
+
+
+class OldDataPacket(OldPacket):
+    def __init__(self, source, dest, index, flowId, timestamp=None):
+        super(self.__class__, self).__init__(source, dest, index, size=1024)
+        self.flowId = flowId
+        self.timestamp = timestamp
+
+
+class OldAckPacket(OldPacket):
+    def __init__(self, source, dest, index, flowId, timestamp=None):
+        super(self.__class__, self).__init__(
+            source, dest, index, size=64, ack=True)
+        self.flowId = flowId
+        self.timestamp = timestamp
+
+
+class OldEvent(object):
+    def __init__(self, timestamp, eventObject, logMessage=None, logArgs=None):
+        self.timestamp = timestamp
+        self.eventObject = eventObject
+        if logMessage:
+            self._logFormat = logMessage
+            self._logArgs = logArgs
+        else:
+            self._logFormat = 'An %s event took place at %d on object %s'
+            self._logArgs = (self.__class__, timestamp, eventObject)
+        self._internalid = event.getUniqueEventId()
+
+
+class OldPacketEvent(OldEvent):
+    def __init__(self, timestamp, sender, receiver, packet, logMessage=None,
+                 logArgs=None):
+        super(self.__class__, self).__init__(timestamp, receiver, logMessage,
+                                             logArgs)
+        self.sender = sender
+        self.packet = packet
+
+
+class OldLinkTickEvent(OldEvent):
+    def __init__(self, timestamp, link, logMessage=None, logArgs=None):
+        super(self.__class__, self).__init__(timestamp, link, logMessage,
+                                             logArgs)
+
+
+def sizeof(obj):
+    """ Bytes used by an object and its __dict__, if it has one """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+CASES = [
+    ('DataPacket', OldDataPacket, DataPacket, ('S1', 'T1', 5, 'F1', 10.)),
+    ('AckPacket', OldAckPacket, AckPacket, ('T1', 'S1', 6, 'F1', 10.)),
+    ('PacketEvent', OldPacketEvent, PacketEvent,
+     (10., 'L1', 'R1', None, 'Node %s receives %s', ('R1', 5))),
+    ('LinkTickEvent', OldLinkTickEvent, LinkTickEvent,
+     (10., 'L1', 'Link %s processes a packet', ('L1',))),
+]
+
+
+def objects(n):
+    """ Compare per-object bytes and construction time """
+    print '%15s %10s %10s %14s %14s' % ('class', 'old bytes', 'new bytes',
+                                       'old ns/obj', 'new ns/obj')
+    savings = dict()
+    for name, old, new, args in CASES:
+        oldtime = timeit.timeit(lambda: old(*args), number=n) / n * 1e9
+        newtime = timeit.timeit(lambda: new(*args), number=n) / n * 1e9
+        oldsize, newsize = sizeof(old(*args)), sizeof(new(*args))
+        savings[name] = oldsize - newsize
+        print '%15s %10d %10d %14.0f %14.0f' % (name, oldsize, newsize,
+                                               oldtime, newtime)
+    return savings
+
+
+def tc2Fast(steps, savings):
+    """ Count the objects a tc2Fast.json run creates """
+    from icfire.network import Network
+    from icfire.eventhandler import EventHandler
+
+    counts = dict.fromkeys(savings, 0)
+
+    def counting(cls):
+        init = cls.__init__
+
+        def __init__(self, *args, **kwargs):
+            counts[cls.__name__] += 1
+            init(self, *args, **kwargs)
+        cls.__init__ = __init__
+        return init
+
+    originals = [(cls, counting(cls)) for cls in
+                 (DataPacket, AckPacket, PacketEvent, LinkTickEvent)]
+
+    logger.disable()
+    network = Network()
+    network.load(os.path.join(ROOT, 'testcases', 'tc2Fast.json'))
+    EventHandler(network).run(steps)
+    for cls, init in originals:
+        cls.__init__ = init
+
+    total = 0
+    print
+    print 'tc2Fast.json, %d steps' % steps
+    for name in sorted(counts):
+        total += counts[name] * savings[name]
+        print '%15s %10d created' % (name, counts[name])
+    print 'Allocation saved: %.1f MB' % (total / 1048576.)
+
+
+if __name__ == '__main__':
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    tc2Fast(steps, objects(200000))
@@ -0,0 +1,73 @@
+""" Benchmark of the EventHandler completion check with many flows.
+
+Builds a network of N host pairs, each joined by its own link and running a
+short TCPRenoFlow with staggered start times, and runs it to completion
+twice: once with the constant time EventHandler.completed(), which reads the
+Network's count of unfinished flows, and once with the previous check that
+looped over every flow after every step (reproduced below).
+
+Usage: python completion_benchmark.py [flows]
+"""
+import sys
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from icfire import logger
+from icfire.network import Network
+from icfire.eventhandler import EventHandler
+
+
+class LoopingEventHandler(EventHandler):
+    """ EventHandler with the previous O(flows) completion check """
+
+    def completed(self):
+        for flow_id in self._network.flows:
+            if not self._network.flows[flow_id].done:
+                return False
+        return True
+
+
+def buildNetwork(nflows):
+    """ N independent host pairs, each with one flow """
+    network = Network()
+    for i in xrange(nflows):
+        src, dst = 'S%d' % i, 'T%d' % i
+        network.addHost(src)
+        network.addHost(dst)
+        network.addLink(src, dst, 10, 10, 64, 'L%d' % i)
+        network.addFlow(src, dst, 20 * 1024, 1000 + 5 * i, 'TCPRenoFlow',
+                        'F%d' % i)
+    return network
+
+
+def timeRun(cls, nflows):
+    """ Run a fresh network to completion
+
+    :return: (seconds, steps, simulated end time)
+    """
+    network = buildNetwork(nflows)
+    handler = cls(network)
+    steps = 0
+    start = time.time()
+    while not handler._queue.empty():
+        handler.step()
+        steps += 1
+        if handler.completed():
+            break
+    return time.time() - start, steps, handler.time
+
+
+if __name__ == '__main__':
+    nflows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    logger.disable()
+
+    print '%d flows' % nflows
+    print '%20s %10s %10s %12s' % ('completion check', 'seconds', 'steps',
+                                   'end time')
+    for name, cls in (('loop over flows', LoopingEventHandler),
+                      ('flow counter', EventHandler)):
+        seconds, steps, end = timeRun(cls, nflows)
+        print '%20s %10.2f %10d %12.1f' % (name, seconds, steps, end)
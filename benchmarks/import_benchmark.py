@@ -0,0 +1,67 @@
+""" Benchmark of the time it takes to import the simulator.
+
+Every sweep worker and command line run starts by importing icfire.network.
+This times the import in fresh interpreters, both as it is now, with
+matplotlib, scipy and networkx only imported by the functions that plot or
+draw, and with those imported up front as the modules used to do. It also
+lists which of the heavy packages an import actually loads.
+
+Usage: python import_benchmark.py [repeats]
+"""
+import sys
+import os
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ('numpy', 'scipy', 'matplotlib', 'networkx')
+
+EAGER = 'import matplotlib.pyplot, scipy.ndimage, networkx; '
+
+TIMER = """
+import sys, time
+sys.path.insert(0, %r)
+start = time.time()
+%s
+elapsed = time.time() - start
+loaded = [m for m in %r if m in sys.modules]
+print repr(elapsed), ','.join(loaded)
+"""
+
+
+def timeImport(statement):
+    """ Time a statement in a fresh interpreter
+
+    :return: (seconds, list of heavy packages loaded)
+    """
+    out = subprocess.check_output(
+        [sys.executable, '-c', TIMER % (ROOT, statement, HEAVY)],
+        env=dict(os.environ, MPLBACKEND='Agg'))
+    seconds, _, loaded = out.strip().partition(' ')
+    return float(seconds), [m for m in loaded.split(',') if m]
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    cases = [
+        ('icfire.network', 'import icfire.network'),
+        ('icfire.network, eager plotting imports',
+         EAGER + 'import icfire.network'),
+        ('icfire.sweep', 'import icfire.sweep'),
+        ('icfire.warmstart', 'import icfire.warmstart'),
+    ]
+    print '%-42s %10s  %s' % ('import', 'median (s)', 'heavy packages loaded')
+    for name, statement in cases:
+        runs = [timeImport(statement) for _ in range(repeats)]
+        print '%-42s %10.3f  %s' % (name, median([r[0] for r in runs]),
+                                    ' '.join(runs[0][1]) or '-')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+""" Benchmark of ParallelEventHandler against EventHandler.
+
+Builds a ring of clusters. Each cluster is a line of Routers with two Hosts
+per Router, and Routers at the ends of neighbouring clusters are joined by
+10 ms links. Most flows stay inside a cluster and one flow per cluster
+crosses to the next one. The network is run for a fixed simulated time on
+one process, then with one partition per cluster.
+
+Usage: python parallel_benchmark.py [clusters] [routers per cluster] [ms]
+"""
+import sys
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from icfire import logger
+from icfire.network import Network
+from icfire.eventhandler import EventHandler
+from icfire.parallel import ParallelEventHandler, cutLinks
+
+
+def buildNetwork(clusters, routers):
+    """ Ring of clusters
+
+    :return: (Network, dict of node address -> cluster index)
+    """
+    network = Network()
+    owner = dict()
+    for c in xrange(clusters):
+        for r in xrange(routers):
+            router = 'R%d_%d' % (c, r)
+            network.addRouter(router, -5000 - 100 * r, False)
+            owner[router] = c
+            if r:
+                network.addLink('R%d_%d' % (c, r - 1), router, 10, 2, 64,
+                                'L%d_%d' % (c, r))
+            for h in 'ST':
+                host = '%s%d_%d' % (h, c, r)
+                network.addHost(host)
+                network.addLink(host, router, 10, 1, 64, 'L' + host)
+                owner[host] = c
+        for r in xrange(routers):
+            dest = 'T%d_%d' % (c, routers - 1 - r)
+            network.addFlow('S%d_%d' % (c, r), dest, 50000000, 100 * r,
+                            'FastTCPFlow', 'F%d_%d' % (c, r))
+
+    for c in xrange(clusters):
+        network.addLink('R%d_%d' % (c, routers - 1),
+                        'R%d_0' % ((c + 1) % clusters), 10, 10, 64, 'X%d' % c)
+        network.addFlow('T%d_0' % c, 'S%d_0' % ((c + 1) % clusters),
+                        50000000, 50, 'FastTCPFlow', 'FX%d' % c)
+    return network, owner
+
+
+if __name__ == '__main__':
+    clusters = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    routers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    until = float(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    logger.disable()
+
+    network, owner = buildNetwork(clusters, routers)
+    print '%d clusters, %d routers, %d flows, %d links cut, %.0f ms' % (
+        clusters, clusters * routers, len(network.flows),
+        len(cutLinks(network, owner)), until)
+
+    handler = EventHandler(network)
+    start = time.time()
+    steps = handler.run(until=until)
+    sequential = time.time() - start
+    print '%12s %10.2f s %10d events' % ('sequential', sequential, steps)
+
+    network, owner = buildNetwork(clusters, routers)
+    handler = ParallelEventHandler(network, owner=owner)
+    start = time.time()
+    handler.run(until=until)
+    parallel = time.time() - start
+    print '%12s %10.2f s %10d events %8d windows' % (
+        'parallel', parallel, handler.steps, handler.windows)
+    print 'speedup %.2fx on %d processes' % (sequential / parallel,
+                                             handler.nparts)
@@ -0,0 +1,126 @@
+""" Benchmark of the distance-vector updates of Routers in a mesh.
+
+Builds an N x N grid of Routers, with a Host on every Router, and a few
+long flows across it, and runs the routing convergence and the first
+seconds of traffic twice: once with the incremental update of
+Router._receiveRoutingTable, which only looks at destinations whose distance
+through the sending link changed, and once with the previous update that
+recomputed every destination over every link (reproduced below). Checks
+that both end with the same distances. Links are compared in the order of
+a dict keyed by Link objects, so which of equally distant links is taken
+varies from one run to the next either way.
+
+Usage: python routing_benchmark.py [N] [until (ms)]
+"""
+import sys
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from icfire import logger
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+from icfire.networkobjects.router import Router
+
+
+def fullUpdate(self, event):
+    """ The previous Router._receiveRoutingTable """
+    neighborTable = event.packet.routingTable
+    link = event.sender
+    cost = link.cost()
+
+    self.link_table[link] = dict()
+    for dest in neighborTable:
+        if neighborTable[dest][0] != link:
+            self.link_table[link][dest] = neighborTable[dest][1] + cost
+
+    for dest in self.link_table[link]:
+        if dest not in self.routing_table:
+            self.routing_table[dest] = (link, self.link_table[link][dest])
+
+    for dest in self.routing_table:
+        self.routing_table[dest] = (None, 999999)
+        for link in self.link_table:
+            if dest in self.link_table[link] and \
+                    self.link_table[link][dest] < self.routing_table[dest][1]:
+                self.routing_table[dest] = (link, self.link_table[link][dest])
+    return []
+
+
+class FullUpdateRouter(Router):
+    """ Router with the previous O(destinations x links) update """
+
+    _receiveRoutingTable = fullUpdate
+
+
+def mesh(n):
+    """ Network description of an n x n grid of Routers
+
+    :return: dict in the format of the json files
+    """
+    def router(i, j):
+        return 'R%d_%d' % (i, j)
+
+    data = {'routers': [], 'hosts': [], 'links': [], 'flows': []}
+    for i in xrange(n):
+        for j in xrange(n):
+            data['routers'].append({'id': router(i, j), 'init_time': -10000,
+                                    'static_routing': False})
+            data['hosts'].append({'id': 'H%d_%d' % (i, j)})
+            data['links'].append({'id': 'LH%d_%d' % (i, j),
+                                  'source_id': 'H%d_%d' % (i, j),
+                                  'target_id': router(i, j), 'rate': 10,
+                                  'delay': 1, 'buffsize': 64})
+            for di, dj in ((1, 0), (0, 1)):
+                if i + di < n and j + dj < n:
+                    data['links'].append({
+                        'id': 'L%d_%d_%d_%d' % (i, j, i + di, j + dj),
+                        'source_id': router(i, j),
+                        'target_id': router(i + di, j + dj), 'rate': 10,
+                        'delay': 5, 'buffsize': 64})
+    for k in xrange(n):
+        data['flows'].append({'name': 'F%d' % k,
+                              'source_id': 'H%d_0' % k,
+                              'dest_id': 'H%d_%d' % (n - 1 - k, n - 1),
+                              'bytes': 10 ** 8, 'timestamp': 0,
+                              'flowType': 'TCPRenoFlow'})
+    return data
+
+
+def run(data, until, routerClass):
+    network = Network()
+    network.loadDict(data)
+    for node in network.nodes.itervalues():
+        if isinstance(node, Router):
+            node.__class__ = routerClass
+    handler = EventHandler(network)
+    start = time.time()
+    steps = handler.run(until=until)
+    elapsed = time.time() - start
+    tables = dict(
+        (node.address, dict((dest, route[1])
+                            for dest, route in node.routing_table.iteritems()))
+        for node in network.nodes.itervalues() if isinstance(node, Router))
+    return elapsed, steps, tables
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    until = float(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    logger.disable()
+
+    data = mesh(n)
+    print '%d routers, %d links, until %g ms' % (
+        len(data['routers']), len(data['links']), until)
+    fullTime, fullSteps, fullTables = run(data, until, FullUpdateRouter)
+    newTime, newSteps, newTables = run(data, until, Router)
+    print 'full update:        %8.3f s  %d events' % (fullTime, fullSteps)
+    print 'incremental update: %8.3f s  %d events' % (newTime, newSteps)
+    print 'speedup: %.2fx' % (fullTime / newTime)
+    print 'same distances:', fullTables == newTables
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+""" Benchmark of the EventHandler schedulers as the pending set grows.
+
+Uses the classic "hold" model: the queue is filled with N Events, then each
+operation dequeues the earliest Event and enqueues a new one a random
+increment later. Increments mimic link traffic: mostly transmission ticks
+with occasional propagation delays and flow timeouts.
+
+Usage: python scheduler_benchmark.py [N ...]
+"""
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Queue import PriorityQueue
+
+from icfire.event import Event
+from icfire.scheduler import HeapScheduler, CalendarScheduler
+
+HOLDS = 200000
+
+
+def increment():
+    r = random.random()
+    if r < .8:
+        return .78  # tick of a 1KB packet on a 10 Mbps link
+    elif r < .99:
+        return 10 + random.random()  # propagation delay
+    return random.uniform(100, 3000)  # flow timeouts, window updates
+
+
+def hold(queue, n):
+    """ Fill queue with n Events, then time HOLDS hold operations """
+    random.seed(143)
+    for _ in xrange(n):
+        queue.put(Event(random.uniform(0, n / 100.0), None, 'benchmark'))
+
+    start = time.time()
+    for _ in xrange(HOLDS):
+        e = queue.get(block=False)
+        queue.put(Event(e.timestamp + increment(), None, 'benchmark'))
+    return (time.time() - start) / HOLDS * 1e6
+
+
+def main(sizes):
+    schedulers = [
+        ('Queue.PriorityQueue', PriorityQueue),
+        ('HeapScheduler', HeapScheduler),
+        ('CalendarScheduler', lambda: CalendarScheduler(width=.78)),
+    ]
+    print '%10s' % 'pending' + ''.join('%22s' % s[0] for s in schedulers)
+    for n in sizes:
+        times = [hold(factory(), n) for _, factory in schedulers]
+        print '%10d' % n + ''.join('%19.2f us' % t for t in times)
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [100, 1000, 10000, 100000, 1000000])
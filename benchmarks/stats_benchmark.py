@@ -0,0 +1,156 @@
+""" Benchmark of the stats helpers that bin data into time intervals.
+
+Builds a series of a million samples like the ones a long flow records:
+increasing, irregular timestamps with packet sized integer values, and
+float window sizes. Runs calcRate, calcSmooth, calcIntervalsum and calcMax
+on it, and the previous versions that walked the sorted samples in a Python
+loop (reproduced below), and checks that both give the same results. The
+helpers are run on the data both as a dict and as the TimeSeries that Stats
+now record into, which needs no sorting.
+
+Usage: python stats_benchmark.py [samples] [resolution]
+"""
+import sys
+import os
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from icfire import stats
+from icfire.timeseries import TimeSeries
+
+
+def loopRate(datadict, resolution):
+    sortedtimes = sorted(datadict.keys())
+    sorteddata = [datadict[key] for key in sortedtimes]
+    time = 0
+    datatotal = 0
+    times = []
+    rates = []
+    for i in range(len(sortedtimes)):
+        while (True):
+            if sortedtimes[i] < time:
+                datatotal += sorteddata[i]
+                break
+            else:
+                times.append(time)
+                rates.append(datatotal / float(resolution))
+                datatotal = 0
+                time += resolution
+    return times, rates
+
+
+def loopSmooth(datadict, resolution):
+    sortedtimes = sorted(datadict.keys())
+    sorteddata = [datadict[key] for key in sortedtimes]
+    time = 0
+    datatotal = 0
+    times = []
+    rates = []
+    count = 0
+    for i in range(len(sortedtimes)):
+        while (True):
+            if sortedtimes[i] < time:
+                datatotal += sorteddata[i]
+                count += 1
+                break
+            elif count > 0:
+                times.append(time)
+                rates.append(datatotal / count)
+                datatotal = 0
+                time += resolution
+                count = 0
+            else:
+                time += resolution
+    return times, rates
+
+
+def loopIntervalsum(datadict, resolution):
+    sortedtimes = sorted(datadict.keys())
+    sorteddata = [datadict[key] for key in sortedtimes]
+    time = 0
+    datatotal = 0
+    times = []
+    rates = []
+    for i in range(len(sortedtimes)):
+        while (True):
+            if sortedtimes[i] < time:
+                datatotal += sorteddata[i]
+                break
+            else:
+                times.append(time)
+                rates.append(datatotal)
+                datatotal = 0
+                time += resolution
+    return times, rates
+
+
+def loopMax(datadict, resolution):
+    sortedtimes = sorted(datadict.keys())
+    sorteddata = [datadict[key] for key in sortedtimes]
+    time = 0
+    currmax = 0
+    times = []
+    maxes = []
+    for i in range(len(sortedtimes)):
+        while (True):
+            if sortedtimes[i] < time:
+                currmax = max(currmax, sorteddata[i])
+                break
+            else:
+                times.append(time)
+                maxes.append(currmax)
+                currmax = 0
+                time += resolution
+    return times, maxes
+
+
+def buildSeries(n):
+    """ Bytes received and window sizes of a long flow """
+    rng = np.random.RandomState(143)
+    times = np.cumsum(rng.exponential(.05, n)) + 1000
+    packets = dict(zip(times.tolist(),
+                       rng.choice([64, 1024], n, p=[.1, .9]).tolist()))
+    windows = dict(zip(times.tolist(), (rng.rand(n) * 100).tolist()))
+    return packets, windows
+
+
+def toSeries(datadict, dtype):
+    series = TimeSeries(dtype)
+    for t in sorted(datadict):
+        series.add(t, datadict[t])
+    return series
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    resolution = float(sys.argv[2]) if len(sys.argv) > 2 else 40
+    packets, windows = buildSeries(n)
+
+    print '%d samples, %g ms intervals' % (n, resolution)
+    series = {id(packets): toSeries(packets, int),
+              id(windows): toSeries(windows, float)}
+    print '%16s %10s %10s %10s %8s  %s' % ('helper', 'loop s', 'dict s',
+                                           'series s', 'speedup', 'same')
+    for name, loop, new, data in (
+            ('calcRate', loopRate, stats.calcRate, packets),
+            ('calcSmooth', loopSmooth, stats.calcSmooth, windows),
+            ('calcIntervalsum', loopIntervalsum, stats.calcIntervalsum,
+             packets),
+            ('calcMax', loopMax, stats.calcMax, windows)):
+        start = time.time()
+        expected = loop(data, resolution)
+        old = time.time() - start
+        start = time.time()
+        result = new(data, resolution)
+        vectorized = time.time() - start
+        start = time.time()
+        fromSeries = new(series[id(data)], resolution)
+        recorded = time.time() - start
+        same = all(list(a) == list(b) == list(c)
+                   for a, b, c in zip(expected, result, fromSeries))
+        print '%16s %10.2f %10.3f %10.3f %7.0fx  %s' % (
+            name, old, vectorized, recorded, old / recorded, same)
@@ -0,0 +1,97 @@
+"""
+icfire.checkpoint
+~~~~~~~~~~~~~~~~~
+
+Checkpoints of a running simulation. A checkpoint is a pickle of an
+EventHandler, which holds the pending Events and the Network with all of its
+Links, Routers, Flows and stats, together with the global simulation time and
+Event id counter, so that Events created after a restore are ordered exactly
+as they would have been without the restore.
+
+    >>> checkpoint.save(handler, 'tc2.ckpt')
+    ...
+    >>> handler = checkpoint.load('tc2.ckpt')
+    >>> handler.run()
+
+A checkpoint can be loaded any number of times, e.g. to try variations from
+the same mid-run state. Traces and the live plotters of stats are not
+saved.
+
+"""
+
+import cPickle as pickle
+import os
+
+import icfire.event as event
+import icfire.simtimer as simtimer
+from icfire.profiler import clock
+
+
+def save(handler, filename):
+    """ Save a checkpoint of an EventHandler
+
+    The checkpoint is written to a temporary file first, so a crash while
+    saving leaves the previous checkpoint intact.
+
+    :param handler: EventHandler to save
+    :param filename: file to save to
+    """
+    state = {
+        'handler': handler,
+        'globalid': event.globalid,
+        'simtime': simtimer.simtime,
+    }
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+    os.rename(tmp, filename)
+
+
+def load(filename):
+    """ Load a checkpoint, restoring the simulation time and Event ids
+
+    :param filename: file saved by save()
+    :return: EventHandler
+    """
+    with open(filename, 'rb') as f:
+        state = pickle.load(f)
+    event.globalid = state['globalid']
+    simtimer.simtime = state['simtime']
+    return state['handler']
+
+
+def run(handler, filename, interval=1000000, steps=0, until=None,
+        max_wall_seconds=None):
+    """ Run an EventHandler, saving a checkpoint every interval steps
+
+    Runs EventHandler.run for interval steps at a time. A final checkpoint
+    is saved when the run stops.
+
+    :param handler: EventHandler to run
+    :param filename: file to save checkpoints to
+    :param interval: steps between checkpoints
+    :param steps: [optional] Maximum number of steps to take.
+        If 0, the simulation runs until completion.
+    :param until: [optional] Stop before the first Event at or after
+        this simulation time (ms).
+    :param max_wall_seconds: [optional] Stop after this much wall time.
+    :return: number of steps taken
+    """
+    deadline = None
+    if max_wall_seconds is not None:
+        deadline = clock() + max_wall_seconds
+    count = 0
+    while True:
+        chunk = interval if not steps else min(interval, steps - count)
+        wall = None
+        if deadline is not None:
+            wall = deadline - clock()
+            if wall <= 0:
+                break
+        taken = handler.run(chunk, until, wall)
+        count += taken
+        if taken < chunk or handler.completed() or count == steps:
+            break
+        save(handler, filename)
+    save(handler, filename)
+    return count
@@ -7,27 +7,49 @@ icfire.events
 This module contains the event base class and all events that work with the
 eventhandler. Events are used to time actions with delays
 
+Log messages are stored as a format string plus its arguments, and are only
+formatted when logMessage is read (i.e. when the logger is enabled).
+
+Millions of Events are created per run, so Events use __slots__ instead of a
+per-instance __dict__, and each constructor sets all of its fields directly
+instead of going through a chain of super() calls.
+
 """
 
 
 class Event(object):
-    def __init__(self, timestamp, eventObject, logMessage=None):
+    __slots__ = ('timestamp', 'eventObject', '_logFormat', '_logArgs',
+                 '_internalid')
+
+    def __init__(self, timestamp, eventObject, logMessage=None, logArgs=None):
         """ Constructor for an Event.
 
         :param timestamp: time (integer) representing when the Event occurs.
         :param eventObject: object that the Event occurs on.
         :param logMessage: [optional] string describing the event for
-            logging purposes.
+            logging purposes. May be a format string for logArgs.
+        :param logArgs: [optional] tuple of arguments to format logMessage
+            with when it is read.
         """
+        global globalid
         self.timestamp = timestamp
         self.eventObject = eventObject
-        self.logMessage = logMessage
-        if not self.logMessage:
-            self.logMessage = 'An %s event took place at %d on object %s' % (
-                self.__class__, timestamp, eventObject)
+        self._logFormat = logMessage
+        self._logArgs = logArgs
 
         # Keep track of order that Events are created to break ties
-        self._internalid = getUniqueEventId()
+        globalid += 1
+        self._internalid = globalid
+
+    @property
+    def logMessage(self):
+        """ String describing the event, formatted on demand """
+        if not self._logFormat:
+            return 'An %s event took place at %d on object %s' % (
+                self.__class__, self.timestamp, self.eventObject)
+        if self._logArgs:
+            return self._logFormat % self._logArgs
+        return self._logFormat
 
     def __cmp__(self, other):
         """ Overloaded comparison operator using timestamp for the Priority Queue.
@@ -41,8 +63,10 @@ class Event(object):
 
 class PacketEvent(Event):
     """ Event related to a Packet being received. """
+    __slots__ = ('sender', 'packet')
 
-    def __init__(self, timestamp, sender, receiver, packet, logMessage=None):
+    def __init__(self, timestamp, sender, receiver, packet, logMessage=None,
+                 logArgs=None):
         """ Constructor for a PacketEvent.
 
         :param timestamp: time (integer) representing when the Event occurs.
@@ -51,9 +75,16 @@ class PacketEvent(Event):
         :param packet: actual packet being sent.
         :param logMessage: [optional] string describing the event for
             logging purposes.
+        :param logArgs: [optional] arguments to format logMessage with.
         """
+        global globalid
+        self.timestamp = timestamp
+        self.eventObject = receiver
+        self._logFormat = logMessage
+        self._logArgs = logArgs
+        globalid += 1
+        self._internalid = globalid
 
-        super(self.__class__, self).__init__(timestamp, receiver, logMessage)
         self.sender = sender
         self.packet = packet
 
@@ -61,8 +92,10 @@ class PacketEvent(Event):
 class UpdateFlowEvent(Event):
     """ Event that tells the Host to check on the Flow status (e.g. timeout).
     """
+    __slots__ = ('flowId',)
 
-    def __init__(self, timestamp, host, flowId, logMessage=None):
+    def __init__(self, timestamp, host, flowId, logMessage=None,
+                 logArgs=None):
         """ Constructor for an UpdateFlowEvent.
 
         :param timestamp: time (integer) representing when the Event occurs.
@@ -70,50 +103,82 @@ class UpdateFlowEvent(Event):
         :param flowId: id of the Flow to check up on.
         :param logMessage: [optional] string describing the event for
             logging purposes.
+        :param logArgs: [optional] arguments to format logMessage with.
         """
-        super(self.__class__, self).__init__(timestamp, host, logMessage)
+        global globalid
+        self.timestamp = timestamp
+        self.eventObject = host
+        self._logFormat = logMessage
+        self._logArgs = logArgs
+        globalid += 1
+        self._internalid = globalid
+
         self.flowId = flowId
 
 
 class UpdateWindowEvent(Event):
     """ Event that tells flow to update window size for fast-tcp
     """
+    __slots__ = ()
 
-    def __init__(self, timestamp, flow, logMessage=None):
+    def __init__(self, timestamp, flow, logMessage=None, logArgs=None):
         """ Constructor for an Event.
 
         :param timestamp: time (integer) representing when the Event occurs.
         :param router: flow that needs to update its window size
         :param logMessage: [optional] string describing the event for logging
+        :param logArgs: [optional] arguments to format logMessage with.
         """
-        super(self.__class__, self).__init__(timestamp, flow, logMessage)
+        global globalid
+        self.timestamp = timestamp
+        self.eventObject = flow
+        self._logFormat = logMessage
+        self._logArgs = logArgs
+        globalid += 1
+        self._internalid = globalid
 
 
 class UpdateRoutingTableEvent(Event):
     """ Event that tells router to update routing table """
+    __slots__ = ()
 
-    def __init__(self, timestamp, router, logMessage=None):
+    def __init__(self, timestamp, router, logMessage=None, logArgs=None):
         """ Constructor for an Event.
 
         :param timestamp: time (integer) representing when the Event occurs.
         :param router: router that needs to update its routing table
         :param logMessage; [optional] string describing the event for logging
+        :param logArgs: [optional] arguments to format logMessage with.
         """
-        super(self.__class__, self).__init__(timestamp, router, logMessage)
+        global globalid
+        self.timestamp = timestamp
+        self.eventObject = router
+        self._logFormat = logMessage
+        self._logArgs = logArgs
+        globalid += 1
+        self._internalid = globalid
 
 
 class LinkTickEvent(Event):
     """ Event that tells the Link to send another Packet from its buffer. """
+    __slots__ = ()
 
-    def __init__(self, timestamp, link, logMessage=None):
+    def __init__(self, timestamp, link, logMessage=None, logArgs=None):
         """ Constructor for an Event.
 
         :param timestamp: time (integer) representing when the Event occurs.
         :param link: Link that needs to send another packet.
         :param logMessage: [optional] string describing the event for
             logging purposes.
+        :param logArgs: [optional] arguments to format logMessage with.
         """
-        super(self.__class__, self).__init__(timestamp, link, logMessage)
+        global globalid
+        self.timestamp = timestamp
+        self.eventObject = link
+        self._logFormat = logMessage
+        self._logArgs = logArgs
+        globalid += 1
+        self._internalid = globalid
 
 
 globalid = 0
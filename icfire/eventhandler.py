@@ -23,12 +23,10 @@ eventObject.processEvent(). It is up to the eventObject to handle the Event.
 processEvent() should also return a list of new Events to enqueue.
 """
 
-from Queue import PriorityQueue
-
-from tqdm import trange
-
 import icfire.logger as logger
 import icfire.simtimer as simtimer
+from icfire.profiler import clock
+from icfire.scheduler import create as createScheduler
 
 
 class EventHandler(object):
@@ -37,25 +35,52 @@ class EventHandler(object):
     It is reponsible for actually running the simulation
     """
 
-    def __init__(self, network, initialEvents=None):
+    def __init__(self, network, initialEvents=None, scheduler=None,
+                 trace=None, profiler=None):
         """ Constructor for an EventHandler.
 
         :param network: network.Network object that models the network
-        :param initialEvents: List of initial events
+        :param initialEvents: List of initial events. Defaults to the
+            Network's events.
+        :param scheduler: [optional] scheduler.Scheduler holding the pending
+            Events, or the name of one (see scheduler.create). Defaults to
+            the scheduler of the Network.
+        :param trace: [optional] trace.TraceWriter to record every processed
+            Event to. The caller is responsible for closing it.
+        :param profiler: [optional] profiler.EventProfiler to time every
+            processed Event with.
         :return:
         """
         self._network = network
-        self._queue = PriorityQueue()
+        if scheduler is None:
+            scheduler = getattr(network, 'scheduler', 'heap')
+        if isinstance(scheduler, basestring):
+            scheduler = createScheduler(scheduler, network)
+        self._queue = scheduler
+        self._trace = trace
+        self.profiler = profiler
         self.time = 0
-        if initialEvents:
-            for e in initialEvents:
-                self._queue.put(e)
-        elif network.events:
-            for e in network.events:
-                self._queue.put(e)
-        else:
+        if initialEvents is None:
+            initialEvents = network.events
+        for e in initialEvents:
+            self._queue.put(e)
+        if not initialEvents:
             print "No events queued"
 
+    def addEvents(self, events):
+        """ Schedule more Events, e.g. for flows added after the start
+
+        :param events: list of Events
+        """
+        for e in events:
+            self._queue.put(e)
+
+    def __getstate__(self):
+        """ Pickle everything but the trace, which holds an open file """
+        state = self.__dict__.copy()
+        state['_trace'] = None
+        return state
+
     def step(self):
         """ Processes one Event from the queue, corresponding to one 'tick'.
 
@@ -66,43 +91,87 @@ class EventHandler(object):
         """
         # When we get an object from the queue, do not block if empty.
         # Simply raise an Empty exception. This may be changed later.
-        event = self._queue.get(block=False)
+        queue = self._queue
+        event = queue.get()
         simtimer.simtime = event.timestamp
 
-        # Log each event
-        logger.log('[%10.3f][%15s] %s' %
-                   (event.timestamp, event.__class__, event.logMessage))
+        # Log each event. Only format the message if someone will read it.
+        if logger.isEnabledFor(logger.EVENTS):
+            logger.log('[%10.3f][%15s] %s',
+                       event.timestamp, event.__class__, event.logMessage,
+                       category=logger.EVENTS, level=logger.DEBUG)
+        if self._trace is not None:
+            self._trace.record(event)
+
+        if self.profiler is not None:
+            return self._profiledStep(event)
 
         # enqueue new events
         newevents = event.eventObject.processEvent(event)
         for e in newevents:
-            self._queue.put(e)
+            queue.put(e)
+        self.time = event.timestamp
+        return event
+
+    def _profiledStep(self, event):
+        """ Rest of step(), timed by the profiler """
+        queue = self._queue
+        start = clock()
+        newevents = event.eventObject.processEvent(event)
+        for e in newevents:
+            queue.put(e)
+        self.profiler.record(event, clock() - start, queue.qsize())
         self.time = event.timestamp
         return event
 
     def completed(self):
         """ Check whether simulation is completed
+        Flows report when they finish to the Network, so this is a
+        constant time check rather than a loop over all flows.
+
         :return: true if all flows are done
         """
-        for flow_id in self._network.flows:
-            if not self._network.flows[flow_id].done:
-                return False
-        return True
+        return self._network.flowsRemaining == 0
+
+    def run(self, steps=0, until=None, max_wall_seconds=None, progress=None):
+        """ Run the simulation until all flows are done or a limit is reached
+
+        The wall clock is only read every so many steps, so
+        max_wall_seconds may be exceeded by a few thousand Events.
 
-    def run(self, steps=0):
-        """
         :param steps: [optional] Maximum number of steps to take.
             If 0, the simulation runs until completion.
+        :param until: [optional] Stop before the first Event at or after
+            this simulation time (ms).
+        :param max_wall_seconds: [optional] Stop after this much wall time.
+        :param progress: [optional] progress.ProgressReporter to report to.
+        :return: number of steps taken
         """
-
-        # If interval is 0 we branch and to avoid calling time.sleep(0)
-        if steps == 0:
-            while not self._queue.empty():
-                self.step()
-                if self.completed():
-                    break
-        else:
-            for _ in trange(steps):
-                self.step()
-                if self.completed():
+        queue = self._queue
+        start = clock()
+        deadline = None
+        if max_wall_seconds is not None:
+            deadline = start + max_wall_seconds
+        checkClock = deadline is not None or progress is not None
+        interval = progress.interval if progress is not None else 1000
+        if progress is not None:
+            progress.start(self, start)
+
+        count = 0
+        while not queue.empty():
+            if until is not None and queue.peek().timestamp >= until:
+                break
+            self.step()
+            count += 1
+            if self.completed() or count == steps:
+                break
+            if checkClock and count % interval == 0:
+                now = clock()
+                if progress is not None:
+                    progress.sample(self, count, now)
+                if deadline is not None and now >= deadline:
                     break
+
+        if progress is not None:
+            progress.finish(self, count, clock())
+        return count
@@ -15,6 +15,7 @@ Note that SuperSimpleFlow and SuperSimpleFlow2 are deprecated
 """
 
 from icfire import logger
+import icfire.simtimer as simtimer
 from icfire.packet import AckPacket
 from icfire.packet import DataPacket
 from icfire.stats import FlowStats
@@ -41,7 +42,32 @@ class Flow(object):
         self.bytes = bytes
         self.flowId = flowId
         self.stats = FlowStats(flowId)
-        self.done = False
+        self.network = None  # set by Network.addFlow
+        self.startedAt = None  # set by Network.addFlow
+        self.completedAt = None
+        self._done = False
+
+    @property
+    def done(self):
+        """ Whether the Flow has finished sending all of its bytes """
+        return self._done
+
+    @done.setter
+    def done(self, value):
+        """ Mark the Flow done or not, notifying the Network of changes
+
+        This lets the Network count finished flows instead of polling them.
+        """
+        value = bool(value)
+        if value and not self._done:
+            self.completedAt = simtimer.simtime
+            if self.network is not None:
+                self.network.flowCompleted(self)
+        elif not value and self._done:
+            self.completedAt = None
+            if self.network is not None:
+                self.network.flowReopened(self)
+        self._done = value
 
     def receiveAckPacket(self, packet, timestamp):
         """ Alter the flow state based on the ACK packet received.
@@ -336,7 +362,7 @@ class TCPRenoFlow(Flow):
         :param timestamp: time that this occurs
         """
         if not self.done and timestamp > self.nextTimeout:
-            logger.log('TIMED OUT!')
+            logger.log('TIMED OUT!', category=logger.FLOW)
 
             self.cwnd = 1
             self.canum = 0
@@ -470,7 +496,8 @@ class FastTCPFlow(TCPRenoFlow):
         if not self.done:
             self.stats.updateCurrentWindowSize(event.timestamp, self.cwndDouble)
             return [UpdateWindowEvent(event.timestamp + 2 * self.srtt, self,
-                                      logMessage='Updating window size on flow %s' % (self.flowId))]
+                                      logMessage='Updating window size on flow %s',
+                                      logArgs=(self.flowId,))]
         return []
 
     def _updateRTT(self, rtt):
@@ -0,0 +1,184 @@
+"""
+icfire.liveplot
+~~~~~~~~~~~~~~~
+
+Real time plots drawn by a separate process. Stats watched by a LivePlotter
+send the records added since their last send through a queue, at most every
+period seconds, and the plotting process redraws on its own schedule. Sends
+never block: if the plotting process falls behind and the queue is full,
+the records are sent again with the next ones.
+
+    >>> plotter = LivePlotter()
+    >>> plotter.watchNetwork(network, flows=['F1'], links=['L1'])
+    >>> EventHandler(network).run()
+    >>> plotter.close()
+
+Each Stats gets a figure laid out by its livePanels.
+
+"""
+
+import multiprocessing
+import time as realtimer
+from Queue import Empty, Full
+
+from icfire.stats import DELAY
+from icfire.timeseries import TimeSeries
+
+
+class LivePlotter(object):
+    """ Process that plots Stats while the simulation runs """
+
+    def __init__(self, interval=40, period=DELAY, maxsize=1000):
+        """ Start a plotting process
+
+        :param interval: interval (ms) to average rates over
+        :param period: seconds between sends of each Stats and between
+            redraws
+        :param maxsize: maximum number of messages waiting for the
+            plotting process
+        """
+        self.interval = interval
+        self.period = period
+        self.dropped = 0  # sends that found the queue full
+        self._watched = []
+        self._queue = multiprocessing.Queue(maxsize)
+        self._process = multiprocessing.Process(
+            target=_plotLoop, args=(self._queue, interval, period))
+        self._process.daemon = True
+        self._process.start()
+
+    def watch(self, stats):
+        """ Plot a Stats object
+
+        :param stats: HostStats, FlowStats or LinkStats
+        """
+        stats.setPlotter(self)
+        self._watched.append(stats)
+        self._queue.put(('watch', id(stats), stats.parent_id,
+                         stats.livePanels))
+
+    def watchNetwork(self, network, flows=None, links=None, hosts=None):
+        """ Plot the Stats of a Network
+
+        :param network: network.Network
+        :param flows: ids of flows to plot, defaults to all
+        :param links: ids of links to plot, defaults to all
+        :param hosts: addresses of hosts to plot, defaults to none
+        """
+        for f in network.flows if flows is None else flows:
+            self.watch(network.flows[f].stats)
+        for l in network.links if links is None else links:
+            self.watch(network.links[l].stats)
+        for h in hosts or []:
+            self.watch(network.nodes[h].stats)
+
+    def send(self, message):
+        """ Queue a message for the plotting process without waiting
+
+        :return: whether the message was queued
+        """
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except Full:
+            self.dropped += 1
+            return False
+
+    def close(self, wait=True):
+        """ Send the last records and stop watching
+
+        :param wait: wait until the plot windows are closed
+        """
+        for stats in self._watched:
+            stats.push(force=True)
+            stats.setPlotter(None)
+        self._watched = []
+        while self._process.is_alive():
+            try:
+                self._queue.put(('close', wait), timeout=self.period)
+                break
+            except Full:
+                pass
+        if wait:
+            self._process.join()
+
+
+def _plotLoop(queue, interval, period):
+    """ Main loop of the plotting process """
+    import matplotlib.pyplot as plt
+    from icfire.stats import calcCumsum, calcIntervalsum, calcRate, \
+        calcSmooth
+
+    helpers = {
+        'rate': lambda s: calcRate(s, interval),
+        'smooth': lambda s: calcSmooth(s, interval),
+        'intervalsum': lambda s: calcIntervalsum(s, interval),
+        'cumsum': calcCumsum,
+    }
+
+    figures = dict()  # stats id -> (figure, axes and their lines)
+    series = dict()  # (stats id, series name) -> TimeSeries or BinnedSeries
+    changed = set()
+    drawAt = realtimer.time() + period
+
+    while True:
+        try:
+            message = queue.get(timeout=max(drawAt - realtimer.time(), 0))
+        except Empty:
+            message = None
+
+        if message is None:
+            pass
+        elif message[0] == 'watch':
+            _, key, parentId, panels = message
+            figures[key] = _makeFigure(plt, parentId, panels)
+        elif message[0] == 'data':
+            _, key, name, payload = message
+            if isinstance(payload, tuple):
+                times, values = payload
+                if (key, name) not in series:
+                    series[(key, name)] = TimeSeries(values.dtype)
+                series[(key, name)].extend(times, values)
+            else:
+                series[(key, name)] = payload
+            changed.add(key)
+        elif message[0] == 'close':
+            _redraw(plt, figures, series, changed, helpers)
+            if message[1]:
+                plt.show()
+            return
+
+        if realtimer.time() >= drawAt:
+            _redraw(plt, figures, series, changed, helpers)
+            changed = set()
+            plt.pause(.001)
+            drawAt = realtimer.time() + period
+
+
+def _makeFigure(plt, parentId, panels):
+    fig = plt.figure()
+    axes = []
+    for i, (title, ylabel, lines) in enumerate(panels):
+        ax = fig.add_subplot(len(panels), 1, i + 1)
+        ax.set_title(title % parentId)
+        ax.set_ylabel(ylabel)
+        plotted = [(ax.plot([], [], label=label)[0], name, helper)
+                   for name, helper, label in lines]
+        if any(label for _, _, label in lines):
+            ax.legend()
+        axes.append((ax, plotted))
+    axes[-1][0].set_xlabel('Time (ms)')
+    fig.subplots_adjust(hspace=.5)
+    return fig, axes
+
+
+def _redraw(plt, figures, series, changed, helpers):
+    for key in changed:
+        fig, axes = figures[key]
+        for ax, lines in axes:
+            for line, name, helper in lines:
+                if (key, name) in series:
+                    line.set_data(*helpers[helper](series[(key, name)]))
+            ax.relim()
+            ax.autoscale_view()
+        fig.canvas.draw_idle()
@@ -4,10 +4,205 @@ icfire.logger
 
 Literally just log stuff
 
+Messages belong to a category (events, drops, routing, flow) and have a
+level. Only messages in an enabled category at or above the configured level
+are written. Messages are given as a format string and its arguments, and
+are only formatted if they will actually be written.
+
+Lines are collected in a large buffer before being written to the log file,
+optionally by a background thread so that disk I/O never stalls the event
+loop. Call configure() to change where and what gets logged, and disable()
+to turn logging into a no-op (disableInChild() in forked children).
+
 """
 
-logfile = open('out4all.txt', 'w')
+import atexit
+import sys
+import threading
+from Queue import Queue
+
+# Levels
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+# Categories
+EVENTS = 'events'  # every Event processed by the EventHandler
+DROPS = 'drops'  # dropped packets
+ROUTING = 'routing'  # forwarding decisions and routing table traffic
+FLOW = 'flow'  # packets sent by flows, ACKs, timeouts
+GENERAL = 'general'  # everything else
+CATEGORIES = (EVENTS, DROPS, ROUTING, FLOW, GENERAL)
+
+enabled = True  # False if nothing at all will be logged
+
+_filename = 'out4all.txt'
+_level = DEBUG
+_categories = frozenset(CATEGORIES)
+_buffersize = 1 << 20  # characters to collect before writing
+
+_lines = []
+_buffered = 0
+_logfile = None
+_writer = None
+_started = False  # the log file was created since the last configure()
+
+
+def configure(filename='out4all.txt', level=DEBUG, categories=CATEGORIES,
+              buffersize=1 << 20, background=False):
+    """ Set up the logger. Anything already logged is flushed to the previous
+    file first, and the log file is started over.
+
+    :param filename: file to log to. None disables logging.
+    :param level: minimum level of messages to write
+    :param categories: categories of messages to write
+    :param buffersize: number of characters to buffer before writing
+    :param background: write to the file from a background thread
+    """
+    global enabled, log, _filename, _level, _categories, _buffersize, \
+        _writer, _started
+    close()
+
+    _started = False
+    _filename = filename
+    _level = level
+    _categories = frozenset(categories)
+    _buffersize = buffersize
+    enabled = bool(filename and _categories)
+    log = _log if enabled else _nolog
+    if enabled and background:
+        _started = True
+        _writer = _BackgroundWriter()
+
+
+def disable():
+    """ Turn logging into a no-op
+
+    Buffered lines are flushed first, so in a forked child this would write
+    them a second time. Use disableInChild() there.
+    """
+    configure(filename=None)
+
+
+def disableInChild():
+    """ Turn logging into a no-op in a forked child process
+
+    Unlike disable(), this drops the log file, background writer and
+    buffered lines inherited from the parent instead of flushing them, so
+    nothing the parent logged is written twice. The parent should call
+    flushBeforeFork() before forking. Used by the workers of
+    parallel.ParallelEventHandler, sweep.sweep and warmstart.forkMap.
+    """
+    global enabled, log, _buffered, _logfile, _writer
+    del _lines[:]
+    _buffered = 0
+    _logfile = None
+    _writer = None
+    enabled = False
+    log = _nolog
+
+
+def isEnabledFor(category, level=DEBUG):
+    """ Check whether a message would be written
+
+    :param category: message category
+    :param level: message level
+    :return: True if the message would be written
+    """
+    return enabled and level >= _level and category in _categories
+
+
+def _log(msg, *args, **kwargs):
+    """ Write a line to the log
+
+    :param msg: message, or format string if args are given
+    :param args: [optional] arguments to format msg with
+    :param category: [optional] keyword, category of the message
+    :param level: [optional] keyword, level of the message
+    """
+    global _buffered
+    if kwargs.get('level', INFO) < _level or \
+            kwargs.get('category', GENERAL) not in _categories:
+        return
+
+    line = msg % args if args else msg
+    _lines.append(line)
+    _buffered += len(line) + 1
+    if _buffered >= _buffersize:
+        flush()
+
+
+def _nolog(msg, *args, **kwargs):
+    """ Logging is disabled, do nothing """
+    pass
+
+
+log = _log
+
+
+def flush():
+    """ Write out all buffered lines """
+    global _buffered, _logfile, _started
+    if not _lines:
+        return
+    data = '\n'.join(_lines) + '\n'
+    del _lines[:]
+    _buffered = 0
+
+    if _writer:
+        _writer.queue.put(data)
+    else:
+        if not _logfile:
+            # Lines logged after close() are added to the same file
+            _logfile = open(_filename, 'a' if _started else 'w')
+            _started = True
+        _logfile.write(data)
+        _logfile.flush()
+
+
+def flushBeforeFork():
+    """ Write out all buffered lines, and stdout and stderr, before
+    forking children that call disableInChild()
+    """
+    flush()
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+
+def close():
+    """ Flush and close the log file """
+    global _logfile, _writer
+    flush()
+    if _writer:
+        _writer.stop()
+        _writer = None
+    if _logfile:
+        _logfile.close()
+        _logfile = None
+
+
+class _BackgroundWriter(object):
+    """ Thread that writes chunks of log lines to the log file """
+
+    def __init__(self):
+        self.queue = Queue(maxsize=64)  # bound memory if the disk falls behind
+        self.thread = threading.Thread(target=self._run,
+                                       args=(_filename,),
+                                       name='icfire-logger')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self, filename):
+        with open(filename, 'w') as logfile:
+            while True:
+                data = self.queue.get()
+                if data is None:
+                    break
+                logfile.write(data)
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
 
 
-def log(msg):
-    logfile.write(msg + '\n')
+atexit.register(close)
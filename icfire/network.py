@@ -7,14 +7,13 @@ and exporting, and later on it may have built in functions to analyze network
 wide statistics. For example, it is capable of drawing our network itself.
 
 Network requires the NetworkX package and is primarily a wrapper over NetworkX
-for much of importing and exporting
+for much of importing and exporting. NetworkX and matplotlib are only imported
+when the graph is first used, e.g. by draw(), so headless runs never load them.
 
 """
 
 import json
 
-import networkx as nx
-
 from icfire import logger
 import icfire.flow as flow
 from icfire.event import UpdateRoutingTableEvent, UpdateFlowEvent, UpdateWindowEvent
@@ -22,14 +21,14 @@ from icfire.networkobjects.link import Link
 from icfire.networkobjects.router import Router
 from icfire.networkobjects.host import Host
 from icfire.stats import plotrate, plotsmooth, plotmaxes, plotintervalsum
-import matplotlib.pyplot as plt
+from icfire.summary import Summary
 
 
 class Network(object):
     """ This class contains all information encapsulating a computer network.
 
     The network is kept track of as a dictionary of objects, as well as within
-    a NetworkX graph.
+    a NetworkX graph that is built from them when first used.
 
     It is capable of importing and exporting the network and its specifications
     to file
@@ -38,38 +37,79 @@ class Network(object):
 
     """
 
-    def __init__(self):
-        self.G = nx.Graph(flows=[])
+    def __init__(self, statsResolution=None, scheduler='heap'):
+        """ Constructor for Network
+
+        :param statsResolution: (optional) interval (ms) to aggregate the
+         stats of hosts, links and flows into as they are recorded,
+         instead of keeping every record. Plots must then use a multiple
+         of it.
+        :param scheduler: (optional) name of the scheduler EventHandlers
+         of this network use by default, see scheduler.create
+        """
+        self._G = None  # NetworkX graph, built by the G property
+        self._edges = []  # (source_id, target_id, attributes) of each link
         self.nodes = dict()
         self.links = dict()
         self.flows = dict()
         self.events = []
+        self.statsResolution = statsResolution
+        self.scheduler = scheduler
+        self.staticRouters = []  # ids of routers with static routing
+
+        # Number of flows that have not finished yet
+        self.flowsRemaining = 0
+
+    @property
+    def G(self):
+        """ NetworkX graph of the nodes and links """
+        if self._G is None:
+            import networkx as nx
+
+            self._G = nx.Graph(flows=[])
+            for node_id, node in self.nodes.iteritems():
+                self._G.add_node(node_id, host=int(isinstance(node, Host)))
+            for source_id, target_id, attributes in self._edges:
+                # The first link between two nodes labels the edge
+                if not self._G.has_edge(source_id, target_id):
+                    self._G.add_edge(source_id, target_id, **attributes)
+        return self._G
 
     # graph creation functions
 
-    def addRouter(self, node_id, init_time, static_routing):
+    def addRouter(self, node_id, init_time, static_routing,
+                  cut_through=False, adaptive_routing=False):
         """ Adds a router to the list of hosts and to the graph representation
 
         :param node_id: (optional) specify a node id to use for this node.
         :param init_time: (optional) time the router starts up
         :param static_routing: (optional) specify whether to use static
-         or dyanmic routing
+         or dyanmic routing. Static routers get their routing tables from
+         installStaticRoutes() instead of exchanging them.
+        :param cut_through: (optional) forward data packets and ACKs without
+         an Event at the router
+        :param adaptive_routing: (optional) update the routing table less
+         often while routes are stable, see Router._updateRoutingTable
         :returns: id of router added
         """
-        if self.G.has_node(node_id):
-            logger.log("router " + str(node_id) + " is already in the graph.")
+        if node_id in self.nodes:
+            logger.log('router %s is already in the graph.', node_id,
+                       level=logger.WARNING)
             return
 
-        self.G.add_node(node_id, host=0)
-        self.nodes[node_id] = Router(node_id, [])
+        self.nodes[node_id] = Router(node_id, [], cut_through,
+                                     adaptive_routing)
+        self._G = None
 
-        if not static_routing:
+        if static_routing:
+            self.staticRouters.append(node_id)
+        else:
             # if dynamic routing, create a update routing table event
             self.events.append(
                 UpdateRoutingTableEvent(
                     init_time,
                     self.nodes[node_id],
-                    'Router %s updates routing table' % node_id))
+                    'Router %s updates routing table', (node_id,)))
 
         return node_id
 
@@ -79,17 +119,18 @@ class Network(object):
         :param node_id: (optional) specify a node id to use for this node.
         :returns: id of host added
         """
-        if node_id in self.G:
+        if node_id in self.nodes:
             print "Graph already has node " + node_id + ". Not adding."
             return node_id
-        else:
-            self.G.add_node(node_id, host=1)
         self.nodes[node_id] = Host(node_id)
+        self._G = None
+        if self.statsResolution is not None:
+            self.nodes[node_id].stats.setResolution(self.statsResolution)
 
         return node_id
 
     def addLink(self, source_id, target_id,
-                rate, delay, buffsize, linkid):
+                rate, delay, buffsize, linkid, analytic=False):
         """ Adds a link from source_id to target_id
 
         :param source_id: id of a node
@@ -98,18 +139,21 @@ class Network(object):
         :param delay: delay of the link (ms)
         :param buffsize: link buffer size (KB)
         :param linkid: (optional) optional unique id in
+        :param analytic: (optional) schedule packet arrivals when packets are
+            buffered instead of using LinkTickEvents
         :returns: integer or string key of the link
 
         """
         if source_id in self.nodes and target_id in self.nodes:
-            # If no linkid is provided, generate a unique
-            if not self.G.has_edge(source_id, target_id):
-                self.G.add_edge(source_id, target_id,
-                                rate=rate, delay=delay,
-                                buffsize=buffsize, linkid=linkid)
+            self._edges.append((source_id, target_id, dict(
+                rate=rate, delay=delay, buffsize=buffsize, linkid=linkid)))
+            self._G = None
             self.links[linkid] = Link(self.nodes[source_id],
                                       self.nodes[target_id],
-                                      rate, delay, buffsize, linkid)
+                                      rate, delay, buffsize, linkid,
+                                      analytic)
+            if self.statsResolution is not None:
+                self.links[linkid].stats.setResolution(self.statsResolution)
             self.nodes[source_id].addLink(self.links[linkid])
             self.nodes[target_id].addLink(self.links[linkid])
             return linkid
@@ -117,7 +161,8 @@ class Network(object):
             print("Source or target not in the graph!")
             return None
 
-    def addFlow(self, source_id, dest_id, bytes, timestamp, flowType, flowId):
+    def addFlow(self, source_id, dest_id, bytes, timestamp, flowType, flowId,
+                params=None):
         """ Adds a new Flow from source_id to dest_id
 
         Uses reflection on flowType to create the appropriate Flow object
@@ -127,6 +172,8 @@ class Network(object):
         :param bytes: number of bytes to send
         :param timestamp: time that Flow sends first packet
         :param flowType: name of Flow class to be used
+        :param params: (optional) dict of Flow attributes to override, e.g.
+         {"alpha": 30} for a FastTCPFlow
         :returns: if a flow has been created, the flowId is returned
         """
         if source_id not in self.nodes or dest_id not in self.nodes:
@@ -136,7 +183,18 @@ class Network(object):
         assert flowType in flow.__dict__
 
         f = flow.__dict__[flowType](source_id, dest_id, bytes, flowId)
+        if self.statsResolution is not None:
+            f.stats.setResolution(self.statsResolution)
+        if params:
+            for name, value in params.iteritems():
+                assert hasattr(f, name), '%s has no parameter %s' % (
+                    flowType, name)
+                setattr(f, name, value)
         self.flows[flowId] = f
+        f.network = self
+        f.startedAt = timestamp
+        if not f.done:
+            self.flowsRemaining += 1
 
         self.nodes[source_id].addFlow(f)
         fr = flow.FlowRecipient(flowId, f.stats)
@@ -145,14 +203,29 @@ class Network(object):
         # Create an Event to update the Flow (send first packet)
         self.events.append(
             UpdateFlowEvent(timestamp, self.nodes[source_id], flowId,
-                            'Initialize flow ' + repr(flowId)))
+                            'Initialize flow %r', (flowId,)))
 
         if flowType == 'FastTCPFlow':
             self.events.append(UpdateWindowEvent(timestamp,
                                                  self.flows[flowId],
-                                                 logMessage='Updating window size on flow %s' % flowId))
+                                                 logMessage='Updating window size on flow %s',
+                                                 logArgs=(flowId,)))
         return flowId
 
+    def flowCompleted(self, f):
+        """ Called by a Flow when it finishes
+
+        :param f: Flow that just finished
+        """
+        self.flowsRemaining -= 1
+
+    def flowReopened(self, f):
+        """ Called by a finished Flow that is marked not done again
+
+        :param f: Flow that is no longer finished
+        """
+        self.flowsRemaining += 1
+
     def load(self, filename):
         """ Load data from json file
 
@@ -161,6 +234,17 @@ class Network(object):
         with open(filename, 'r') as f:
             data = json.load(f)
             f.close()
+        self.loadDict(data)
+
+    def loadDict(self, data):
+        """ Load data in the format of the json files
+
+        :param data: dict with lists of hosts, routers, links and flows,
+            and optionally a stats_resolution and a scheduler (see __init__)
+        """
+        self.statsResolution = data.get('stats_resolution',
+                                        self.statsResolution)
+        self.scheduler = data.get('scheduler', self.scheduler)
 
         # load hosts
         for host in data["hosts"]:
@@ -169,7 +253,9 @@ class Network(object):
         # load routers
         for router in data["routers"]:
             self.addRouter(
-                router["id"], router["init_time"], router["static_routing"])
+                router["id"], router["init_time"], router["static_routing"],
+                router.get("cut_through", False),
+                router.get("adaptive_routing", False))
 
         # load links
         for link in data["links"]:
@@ -179,7 +265,12 @@ class Network(object):
             rate = link["rate"]
             delay = link["delay"]
             buffsize = link["buffsize"]
-            self.addLink(source_id, target_id, rate, delay, buffsize, id)
+            analytic = link.get("analytic", False)
+            self.addLink(source_id, target_id, rate, delay, buffsize, id,
+                         analytic)
+
+        if self.staticRouters:
+            self.installStaticRoutes()
 
         # load flows
         for flow in data["flows"]:
@@ -189,11 +280,66 @@ class Network(object):
             timestamp = flow["timestamp"]
             bytes = flow["bytes"]
             flowType = flow["flowType"]
-            self.addFlow(source_id, dest_id, bytes, timestamp, flowType, name)
+            params = flow.get("params")
+            self.addFlow(source_id, dest_id, bytes, timestamp, flowType, name,
+                         params)
+
+    def installStaticRoutes(self, routers=None):
+        """ Give routers fixed routing tables of shortest paths to hosts
+
+        Distances are sums of link delays (ms), found with Dijkstra's
+        algorithm from each host over the graph of routers, since hosts do
+        not forward packets. Of links with equal distances, the first one
+        added to the router is taken. Called by loadDict() when there are
+        routers with static routing.
+
+        :param routers: [optional] ids of the routers to install tables
+         in. Defaults to the routers added with static routing.
+        """
+        import networkx as nx
+
+        if routers is None:
+            routers = self.staticRouters
+        hosts = [n for n, node in self.nodes.iteritems()
+                 if isinstance(node, Host)]
+        allRouters = [n for n, node in self.nodes.iteritems()
+                      if isinstance(node, Router)]
+
+        tables = dict((r, dict()) for r in routers)
+        for dest in hosts:
+            distances = nx.single_source_dijkstra_path_length(
+                self.G.subgraph(allRouters + [dest]), dest, weight='delay')
+            for r in routers:
+                router = self.nodes[r]
+                best = None
+                for link in router.links:
+                    other = link.nodeB if link.nodeA is router else link.nodeA
+                    if other.address in distances:
+                        distance = link.delay + distances[other.address]
+                        if best is None or distance < best[1]:
+                            best = (link, distance)
+                if best is not None:
+                    tables[r][dest] = best
+
+        for r, table in tables.iteritems():
+            self.nodes[r].routing_table.clear()
+            self.nodes[r].routing_table.update(table)
+
+    def summary(self, time=None):
+        """ Summary metrics of the flows and links, without plotting
+
+        :param time: [optional] time (ms) the run ended at, e.g.
+            EventHandler.time. Defaults to the current simulation time.
+        :return: summary.Summary
+        """
+        return Summary(self, time)
 
     def draw(self):
         """ Display a representation of the network
         """
+        import matplotlib.pyplot as plt
+        import networkx as nx
+
         colors = [self.G.node[n]['host'] for n in self.G.nodes()]
         pos = nx.spring_layout(self.G)
         nx.draw(self.G, pos=pos, node_color=colors)
@@ -217,6 +363,7 @@ class Network(object):
         :param flotType: string to describe the type of flow used.
             Defaults to Reno
         """
+        import matplotlib.pyplot as plt
         # FLOWS
         # Byte Send Rate of all 3
         plt.figure()
@@ -10,8 +10,8 @@ Hosts own flows, and also keeps tabs on various stats through a stats objects.
 """
 
 from icfire.event import PacketEvent, UpdateFlowEvent
-from icfire.networkobjects.networkobject import Node
-from icfire.packet import Packet, RoutingRequestPacket, RoutingPacket, AckPacket, DataPacket
+from icfire.networkobjects.networkobject import Node, resolve
+from icfire.packet import RoutingRequestPacket, RoutingPacket, AckPacket, DataPacket
 from icfire.stats import HostStats
 
 from icfire import logger
@@ -29,7 +29,7 @@ class Host(Node):
         :param address: unique address of this Node
         :param links: list of Links (objects) this Node is connected to
         """
-        super(self.__class__, self).__init__(address, links)
+        super(Host, self).__init__(address, links)
         self.flows = dict()
         self.flowrecipients = dict()
         self.stats = HostStats(address)
@@ -62,46 +62,18 @@ class Host(Node):
         """
         packet = event.packet
         timestamp = event.timestamp
-        newPackets = []
         # Record arrival of new packet
-        if isinstance(packet, Packet):
-            self.stats.addBytesRecieved(timestamp, packet.size)
-
-        # Handle routing table update requests
-        if isinstance(event.packet, RoutingRequestPacket):
-            logger.log('Routing table packet for host %s' % self.address)
-            newPacket = RoutingPacket(
-                self.address, event.packet.source,
-                routingTable={self.address: [self.address, 0]})
-            newPackets.append(newPacket)
-
-        # Packet is ACK, update Flow accordingly
-        elif isinstance(event.packet, AckPacket):
-            assert packet.dest == self.address
-            assert packet.flowId in self.flows
-            newPackets = self.flows[packet.flowId].receiveAckPacket(
-                packet, event.timestamp)
-            for p in newPackets:
-                logger.log('Flow %s, packet %s from host %s to link %s' %
-                           (p.flowId, p.index,
-                            self.address, self.links[0].id))
-
-        # Treat packet as data packet, return appropriate ACK
-        elif isinstance(event.packet, DataPacket):
-            assert packet.dest == self.address
-            assert packet.flowId in self.flowrecipients
-
-            newPacket = self.flowrecipients[
-                packet.flowId].receiveDataPacket(packet, event.timestamp)
-            logger.log('ACK %s for flow %s from host %s to link %s' %
-                       (newPacket.index, newPacket.flowId,
-                        self.address, self.links[0].id))
-            newPackets.append(newPacket)
-
-        # Else we don't know what to do
-        else:
-            raise NotImplementedError(
-                'Handling of %s not implemented' % event.packet.__class__)
+        self.stats.addBytesRecieved(timestamp, packet.size)
+
+        try:
+            handler = self._packetHandlers[packet.__class__]
+        except KeyError:
+            handler = resolve(self._packetHandlers, packet.__class__)
+            # Else we don't know what to do
+            if handler is None:
+                raise NotImplementedError(
+                    'Handling of %s not implemented' % packet.__class__)
+        newPackets = handler(self, packet, timestamp)
 
         # Record new packets
         for p in newPackets:
@@ -109,13 +81,52 @@ class Host(Node):
 
         return self.links[0].addPackets(newPackets, self)
 
-    def _processOtherEvent(self, event):
-        """ Processes non-packet events """
-        if isinstance(event, UpdateFlowEvent):
-            return self._processUpdateFlowEvent(event)
-        else:
-            raise NotImplementedError(
-                'Handling of %s not implemented' % event.__class__)
+    def _receiveRoutingRequest(self, packet, timestamp):
+        """ Handle routing table update requests
+
+        :param packet: RoutingRequestPacket received
+        :param timestamp: time the packet arrived
+        :return: new packets to send
+        """
+        logger.log('Routing table packet for host %s', self.address,
+                   category=logger.ROUTING, level=logger.DEBUG)
+        return [RoutingPacket(self.address, packet.source,
+                              routingTable={self.address: [self.address, 0]})]
+
+    def _receiveAck(self, packet, timestamp):
+        """ Packet is ACK, update Flow accordingly
+
+        :param packet: AckPacket received
+        :param timestamp: time the packet arrived
+        :return: new packets to send
+        """
+        assert packet.dest == self.address
+        assert packet.flowId in self.flows
+        newPackets = self.flows[packet.flowId].receiveAckPacket(
+            packet, timestamp)
+        for p in newPackets:
+            logger.log('Flow %s, packet %s from host %s to link %s',
+                       p.flowId, p.index, self.address, self.links[0].id,
+                       category=logger.FLOW, level=logger.DEBUG)
+        return newPackets
+
+    def _receiveData(self, packet, timestamp):
+        """ Data packet, return the appropriate ACK
+
+        :param packet: DataPacket received
+        :param timestamp: time the packet arrived
+        :return: new packets to send
+        """
+        assert packet.dest == self.address
+        assert packet.flowId in self.flowrecipients
+
+        newPacket = self.flowrecipients[
+            packet.flowId].receiveDataPacket(packet, timestamp)
+        logger.log('ACK %s for flow %s from host %s to link %s',
+                   newPacket.index, newPacket.flowId,
+                   self.address, self.links[0].id,
+                   category=logger.FLOW, level=logger.DEBUG)
+        return [newPacket]
 
     def _processUpdateFlowEvent(self, updateflowevent):
         """ Check up on the Flow, e.g. for timeouts
@@ -130,10 +141,22 @@ class Host(Node):
         newpackets, rto = f.checkTimeout(t)
         packetEvents = \
             [PacketEvent(t, self, self.links[0], p,
-                         'Flow %s, packet %s from host %s to link %s' %
+                         'Flow %s, packet %s from host %s to link %s',
                          (f.flowId, p.index, self.address, self.links[0].id))
              for p in newpackets]
         packetEvents.append(
             UpdateFlowEvent(t + rto, self, f.flowId,
-                            'Check for timeout on flow %s' % f.flowId))
+                            'Check for timeout on flow %s', (f.flowId,)))
         return packetEvents
+
+    # Handlers for each Event and Packet class
+    _eventDispatch = {
+        PacketEvent: '_processPacketEvent',
+        UpdateFlowEvent: '_processUpdateFlowEvent',
+    }
+
+    _packetDispatch = {
+        RoutingRequestPacket: '_receiveRoutingRequest',
+        AckPacket: '_receiveAck',
+        DataPacket: '_receiveData',
+    }
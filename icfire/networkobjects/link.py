@@ -6,9 +6,15 @@ This module contains the objects that represent links in the network.
 Links connect different nodes and have buffers, data rates, and some sort
 of delay
 
+A Link normally sends one LinkTickEvent per buffered packet to time its
+transmission. In analytic mode, the buffer is FIFO and transmission times are
+fixed, so the departure time of a packet is already known when it is
+buffered. The Link then schedules the arrival PacketEvent right away, and the
+packet is removed from the buffer occupancy once its departure time passes.
+
 """
 
-from Queue import Queue
+from collections import deque
 
 from icfire.event import LinkTickEvent, PacketEvent
 from icfire.networkobjects.networkobject import NetworkObject
@@ -23,7 +29,8 @@ class Link(NetworkObject):
     This class represents a link in a network that packets can travel
     across"""
 
-    def __init__(self, nodeA, nodeB, rate, delay, maxbuffersize, linkid):
+    def __init__(self, nodeA, nodeB, rate, delay, maxbuffersize, linkid,
+                 analytic=False):
         """ Create a Link
 
         :param nodeA: Node that it is connected to (object)
@@ -32,6 +39,8 @@ class Link(NetworkObject):
         :param delay: time (ms) for a packet to propagate
         :param maxbuffersize: maximum buffer size (combined for both sides) (KB)
         :param linkid: id of the Link
+        :param analytic: [optional] compute departure times on arrival
+            instead of using LinkTickEvents
         """
         self.nodeA = nodeA
         self.nodeB = nodeB
@@ -40,7 +49,7 @@ class Link(NetworkObject):
         self.maxbuffersize = maxbuffersize * 1024
         self.id = linkid
 
-        self.buffer = Queue()  # Queue using a cyclic array
+        self.buffer = deque()  # (packet, sender) FIFO
         self.totalbuffersize = 0  # total size of items in the buffer, bytes
         self.buffersizes = dict()  # size of items in buffer for A, B in bytes
         self.buffersizes[self.nodeA] = 0
@@ -49,6 +58,10 @@ class Link(NetworkObject):
         self.freeAt = -9999999 # Next time the Link is free
         self.stats = LinkStats(self.id)
 
+        # Analytic mode: (departure time, size, sender) of buffered packets
+        self.analytic = analytic
+        self.departures = deque()
+
     def addPackets(self, packets, sender):
         """ Add packets and return new Events if any.
 
@@ -58,22 +71,25 @@ class Link(NetworkObject):
         :param packets: new packets to add
         :return: new Events
         """
+        if self.analytic:
+            return self._addPacketsAnalytic(packets, sender, simtimer.simtime)
+
         newevents = []
 
         # If this is the first packet in the buffer, start the LinkTickEvents
-        if self.buffer.qsize() == 0 and len(packets) > 0:
+        if not self.buffer and packets:
             newevents = [
                 LinkTickEvent(max(simtimer.simtime, self.freeAt), self,
-                              'Link ' + self.id + ' processes a packet')]
+                              'Link %s processes a packet', (self.id,))]
 
         for p in packets:
             if self.buffersizes[sender] + p.size > self.maxbuffersize:
                 # Drop em' like its hot
-                logger.log('Dropping packet %s from host %s at link %s' %
-                           (p.index, p.source, self.id))
+                logger.log('Dropping packet %s from host %s at link %s',
+                           p.index, p.source, self.id, category=logger.DROPS)
                 self.stats.addLostPackets(simtimer.simtime, 1)
             else:
-                self.buffer.put((p, sender))
+                self.buffer.append((p, sender))
                 self.totalbuffersize += p.size
                 self.buffersizes[sender] += p.size
 
@@ -88,21 +104,26 @@ class Link(NetworkObject):
         :return: new Events to enqueue
         """
         packet, sender = packet_event.packet, packet_event.sender
+        if self.analytic:
+            return self._addPacketsAnalytic([packet], sender,
+                                            packet_event.timestamp)
+
         if self.buffersizes[sender] + packet.size > self.maxbuffersize:
             self.stats.addLostPackets(packet_event.timestamp, 1)
-            logger.log('Dropping packet %s from host %s at link %s' %
-                       (packet.index, str(sender), self.id))
+            logger.log('Dropping packet %s from host %s at link %s',
+                       packet.index, sender, self.id, category=logger.DROPS)
             return []
 
-        self.buffer.put((packet, sender))
+        self.buffer.append((packet, sender))
         self.totalbuffersize += packet.size
         self.buffersizes[sender] += packet.size
         self.stats.updateBufferOccupancy(simtimer.simtime, self.totalbuffersize)
 
         # If this is the first packet in the buffer, start the LinkTickEvents
-        if self.buffer.qsize() == 1:
+        if len(self.buffer) == 1:
             linkevent = LinkTickEvent(max(packet_event.timestamp, self.freeAt),
-                                      self, 'Link ' + self.id + ' processes a packet')
+                                      self, 'Link %s processes a packet',
+                                      (self.id,))
             return [linkevent]
         return []
 
@@ -115,7 +136,7 @@ class Link(NetworkObject):
         :param event: LinkTickEvent to process
         :return: new Events to enqueue
         """
-        packet, sender = self.buffer.get()
+        packet, sender = self.buffer.popleft()
         self.totalbuffersize -= packet.size
         self.buffersizes[sender] -= packet.size
         self.stats.updateBufferOccupancy(simtimer.simtime, self.totalbuffersize)
@@ -125,33 +146,91 @@ class Link(NetworkObject):
         # forwarded, not the PacketEvent time
         otherNode = self._otherNode(sender)
         tick = 125.0 / 16384 * packet.size / self.rate  # convert bytes to ms
-        type = 'ACK' if packet.ack else 'packet'
-        newevents = [
-            PacketEvent(event.timestamp + self.delay + tick,
-                        self, otherNode, packet,
-                        'Node %s receives %s %s from link %s' %
-                        (otherNode.address, type, packet.index, self.id))]
+        newevents = [self._deliver(packet, otherNode,
+                                   event.timestamp + self.delay + tick)]
         self.stats.addBytesFlowed(event.timestamp, packet.size)
         # Make a new LinkTickEvent to time the next dequeue event
         self.freeAt = event.timestamp + tick
-        if not self.buffer.empty():
+        if self.buffer:
             newevents.append(
                 LinkTickEvent(self.freeAt, self,
-                              'Link %s processes a packet' % self.id))
+                              'Link %s processes a packet', (self.id,)))
 
         return newevents
 
-    def _processOtherEvent(self, event):
-        """ Processes non-packet events
+    def _addPacketsAnalytic(self, packets, sender, timestamp):
+        """ Buffer packets and schedule their arrival at the other node.
 
-        :param event: Event to process
-        :return: new Events to enqueue
+        :param packets: new packets to add
+        :param sender: Node sending the packets
+        :param timestamp: time the packets reach the Link
+        :return: new Events
         """
-        if isinstance(event, LinkTickEvent):
-            return self._linkTickEvent(event)
-        else:
-            raise NotImplementedError(
-                'Handling of %s not implemented' % event.__class__)
+        self._release(timestamp)
+
+        newevents = []
+        otherNode = self._otherNode(sender)
+        for p in packets:
+            if self.buffersizes[sender] + p.size > self.maxbuffersize:
+                logger.log('Dropping packet %s from host %s at link %s',
+                           p.index, p.source, self.id, category=logger.DROPS)
+                self.stats.addLostPackets(timestamp, 1)
+                continue
+
+            self.totalbuffersize += p.size
+            self.buffersizes[sender] += p.size
+
+            # Same times as a LinkTickEvent would give, since the buffer is
+            # FIFO and each packet leaves as soon as the Link is free
+            start = max(timestamp, self.freeAt)
+            tick = 125.0 / 16384 * p.size / self.rate  # convert bytes to ms
+            self.freeAt = start + tick
+            self.departures.append((start, p.size, sender))
+            self.stats.addBytesFlowed(start, p.size)
+            newevents.append(
+                self._deliver(p, otherNode, start + self.delay + tick))
+
+        if newevents:
+            self.stats.updateBufferOccupancy(timestamp, self.totalbuffersize)
+        return newevents
+
+    def _deliver(self, packet, otherNode, timestamp):
+        """ Create the Event for a packet reaching the other end of the Link.
+
+        If the other node is a cut-through Router, the Router's next Link
+        is looked up now and the packet goes straight to it, skipping the
+        trip through the Router.
+
+        :param packet: packet being sent
+        :param otherNode: Node at the other end of the Link
+        :param timestamp: time the packet reaches otherNode
+        :return: PacketEvent
+        """
+        if otherNode.cutThrough:
+            nextLink = otherNode.cutThroughLink(packet)
+            if nextLink:
+                return PacketEvent(timestamp, otherNode, nextLink, packet,
+                                   'Router %s forwards packet to %s',
+                                   (otherNode.address, nextLink.id))
+
+        type = 'ACK' if packet.ack else 'packet'
+        return PacketEvent(timestamp, self, otherNode, packet,
+                           'Node %s receives %s %s from link %s',
+                           (otherNode.address, type, packet.index, self.id))
+
+    def _release(self, timestamp):
+        """ Remove packets that have left by timestamp from the buffer.
+
+        Only used in analytic mode.
+
+        :param timestamp: current time
+        """
+        departures = self.departures
+        while departures and departures[0][0] <= timestamp:
+            start, size, sender = departures.popleft()
+            self.totalbuffersize -= size
+            self.buffersizes[sender] -= size
+            self.stats.updateBufferOccupancy(start, self.totalbuffersize)
 
     def _otherNode(self, node):
         """ Returns the other node the link is connected to
@@ -166,4 +245,12 @@ class Link(NetworkObject):
 
         :return: cost, in ms
         """
+        if self.analytic:
+            self._release(simtimer.simtime)
         return self.delay + 125.0 / 16384 * self.totalbuffersize / self.rate
+
+    # Handlers for each Event class
+    _eventDispatch = {
+        PacketEvent: '_processPacketEvent',
+        LinkTickEvent: '_linkTickEvent',
+    }
@@ -5,15 +5,64 @@ icfire.networkobject
 This module contains the base classes for all objects in the network and
 also the node objects. Network objects can process events.
 
+Network objects dispatch Events (and Nodes dispatch Packets) through tables
+keyed on the Event or Packet class, so processing an Event takes a single
+dict lookup instead of a chain of isinstance checks. Classes name the method
+handling each Event or Packet class in _eventDispatch and _packetDispatch,
+and every class gets its own _eventHandlers and _packetHandlers with the
+functions those names resolve to on it, so subclasses that override a
+handler method are dispatched to the override. Subclasses of a known Event
+or Packet type are looked up through their base classes the first time they
+are seen.
+
 """
 
 from icfire.event import PacketEvent
 from icfire.event import Event
 
 
+def resolve(table, cls):
+    """ Find the handler for a class in a dispatch table
+
+    Base classes of cls are checked in method resolution order, and the
+    result is stored in the table so the search only happens once per class.
+
+    :param table: dict of class -> handler
+    :param cls: Event or Packet class to look up
+    :return: handler, or None if there is no handler for cls
+    """
+    for base in cls.__mro__:
+        if base in table:
+            table[cls] = handler = table[base]
+            return handler
+    return None
+
+
+def _handlers(cls, table):
+    """ Resolve a table of class -> method name to class -> function
+
+    :param cls: NetworkObject class the methods are looked up on
+    :param table: dict of Event or Packet class -> method name
+    :return: dict of Event or Packet class -> function
+    """
+    return dict((key, getattr(cls, name).im_func)
+                for key, name in table.iteritems())
+
+
+class _DispatchType(type):
+    """ Metaclass that builds the handler tables of each class """
+
+    def __init__(cls, name, bases, namespace):
+        super(_DispatchType, cls).__init__(name, bases, namespace)
+        cls._eventHandlers = _handlers(cls, cls._eventDispatch)
+        cls._packetHandlers = _handlers(cls, cls._packetDispatch)
+
+
 class NetworkObject(object):
     """abstract class for all network objects"""
 
+    __metaclass__ = _DispatchType
+
     def __init__(self):
         raise NotImplementedError(
             'NetworkObject should never be instantiated.')
@@ -26,12 +75,17 @@ class NetworkObject(object):
         :param event: Event to be processed.
         :return: list of new Events to be enqueued.
         """
-        if isinstance(event, PacketEvent):
-            return self._processPacketEvent(event)
-        elif isinstance(event, Event):
-            return self._processOtherEvent(event)
-        else:
-            raise AssertionError('process event should only be given an event')
+        try:
+            handler = self._eventHandlers[event.__class__]
+        except KeyError:
+            handler = resolve(self._eventHandlers, event.__class__)
+            if handler is None:
+                if not isinstance(event, Event):
+                    raise AssertionError(
+                        'process event should only be given an event')
+                raise NotImplementedError(
+                    'Handling of %s not implemented' % event.__class__)
+        return handler(self, event)
 
     def _processPacketEvent(self, packet_event):
         """ Process a PacketEvent
@@ -49,12 +103,27 @@ class NetworkObject(object):
         """
         raise NotImplementedError('This should be overriden by subclass')
 
+    # Event class -> name of the handler method. Subclasses that do not
+    # define their own table handle PacketEvents and other Events with the
+    # two methods above.
+    _eventDispatch = {
+        PacketEvent: '_processPacketEvent',
+        Event: '_processOtherEvent',
+    }
+
+    # Packet class -> name of the handler method, for Nodes
+    _packetDispatch = {}
+
 
 class Node(NetworkObject):
     """ abstract class that represents a node in a network
 
     This class represents a node in a network connected by edges"""
 
+    # Whether Links may forward packets through this Node without an Event,
+    # see Router.cutThroughLink
+    cutThrough = False
+
     def __init__(self, address, links=None):
         """ Constructor for Node
 
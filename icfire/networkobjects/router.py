@@ -6,10 +6,12 @@ This module represents the routers
 """
 
 from icfire.event import PacketEvent, UpdateRoutingTableEvent
-from icfire.networkobjects.networkobject import Node
+from icfire.networkobjects.networkobject import Node, resolve
 from icfire.packet import RoutingPacket, RoutingRequestPacket, DataPacket, AckPacket
 from icfire import logger
 
+UNREACHABLE = 999999  # distance of destinations without a route
+
 
 class Router(Node):
     """ Represents router in a network
@@ -17,7 +19,8 @@ class Router(Node):
     This class represents a router in a network that is able to
     route packets"""
 
-    def __init__(self, address, links=None):
+    def __init__(self, address, links=None, cutThrough=False,
+                 adaptive=False):
         """ Constructor for Router
 
         The routing table should either have a default starting state, or
@@ -26,8 +29,27 @@ class Router(Node):
 
         :param address: unique address of this Node
         :param links: list of Links (objects) this Node is connected to
+        :param cutThrough: [optional] let Links hand data packets and ACKs
+            directly to the next Link instead of sending them to the Router
+        :param adaptive: [optional] back off the routing table updates
+            while routes are stable, see _updateRoutingTable
         """
-        super(self.__class__, self).__init__(address, links)
+        super(Router, self).__init__(address, links)
+        self.cutThrough = cutThrough
+
+        # Time (ms) between routing table updates. Adaptive Routers double
+        # it after every update that brought no distance change larger than
+        # changeThreshold (relative), up to maxUpdateInterval, and go back
+        # to updateInterval as soon as one does.
+        self.updateInterval = 5000
+        self.adaptive = adaptive
+        self.maxUpdateInterval = 80000
+        self.changeThreshold = .1
+        self._interval = self.updateInterval
+        self._nextUpdate = None  # time of the next update
+        self._routesChanged = True  # since the last update
+        # Link -> cost the distances in link_table were computed with
+        self._linkCosts = dict()
 
         # dict with destination address as key
         # values are 2-tuples (link object, distance)
@@ -47,73 +69,180 @@ class Router(Node):
         :param packet_event: PacketEvent to process
         :return: new Events to enqueue
         """
+        try:
+            handler = self._packetHandlers[event.packet.__class__]
+        except KeyError:
+            handler = resolve(self._packetHandlers, event.packet.__class__)
+            # Else we don't know what to do
+            if handler is None:
+                raise NotImplementedError(
+                    'Handling of %s not implemented' % event.packet.__class__)
+        return handler(self, event)
 
-        # Data packet, forward to correct link
-        if isinstance(event.packet, DataPacket) or \
-                isinstance(event.packet, AckPacket):
-            nextLink = self.getRoute(event.packet.dest)
-            if nextLink:
-                logger.log('Router %s forwards packet to %s' %
-                           (self.address, nextLink.id))
-                return nextLink.addPackets([event.packet], self)
-            else:
-                logger.log('Router %s dropped packet %s' %
-                           (self.address, event.packet.index))
+    def _forwardPacket(self, event):
+        """ Data packet, forward to correct link
 
-        # Received routing table information, update table
-        elif isinstance(event.packet, RoutingPacket):
-            neighborTable = event.packet.routingTable
-            link = event.sender
-            cost = link.cost()
+        :param event: PacketEvent carrying a DataPacket or AckPacket
+        :return: new Events to enqueue
+        """
+        nextLink = self.getRoute(event.packet.dest)
+        if nextLink:
+            logger.log('Router %s forwards packet to %s',
+                       self.address, nextLink.id,
+                       category=logger.ROUTING, level=logger.DEBUG)
+            return nextLink.addPackets([event.packet], self)
+
+        logger.log('Router %s dropped packet %s',
+                   self.address, event.packet.index,
+                   category=logger.DROPS)
+        return []
+
+    def _receiveRoutingTable(self, event):
+        """ Received routing table information, update table
+
+        Only destinations whose distance through the sending link changed
+        are looked at again. Routes come out the same as recomputing every
+        destination over every link: the shortest distance below
+        UNREACHABLE, with ties going to the first link in link_table.
+
+        :param event: PacketEvent carrying a RoutingPacket
+        :return: new Events to enqueue
+        """
+        neighborTable = event.packet.routingTable
+        link = event.sender
+        cost = link.cost()
 
-            # overwrite previous
-            self.link_table[link] = dict()
-            for dest in neighborTable:
-                # split horizon to avoid cycles
-                if neighborTable[dest][0] != link:
-                    self.link_table[link][dest] = neighborTable[dest][1] + cost
+        # split horizon to avoid cycles
+        distances = dict()
+        for dest in neighborTable:
+            if neighborTable[dest][0] != link:
+                distances[dest] = neighborTable[dest][1] + cost
 
-            # add dests to routing_table
-            for dest in self.link_table[link]:
-                if dest not in self.routing_table:
-                    self.routing_table[dest] = (link, self.link_table[link][dest])
+        # overwrite previous
+        previous = self.link_table.get(link)
+        self.link_table[link] = distances
+        self._linkCosts[link] = cost
 
-            # reset all and recalculate
+        if previous is None:
+            # A new link can change the order of link_table, and with it
+            # which of equally distant links is taken, so recalculate all
+            for dest in distances:
+                self.routing_table.setdefault(dest, None)
             for dest in self.routing_table:
-                self.routing_table[dest] = (None, 999999)
-                for link in self.link_table:
-                    if dest in self.link_table[link] and self.link_table[link][dest] < self.routing_table[dest][1]:
-                        self.routing_table[dest] = (link, self.link_table[link][dest])
-
-        # Received routing table request
-        elif isinstance(event.packet, RoutingRequestPacket):
-            # process request for routing table
-            logger.log('Routing table packet for router %s' % self.address)
-            return event.sender.addPackets(
-                [RoutingPacket(self.address, event.packet.source,
-                               routingTable=self.routing_table)], self)
-
-        # Else we don't know what to do
-        else:
-            raise NotImplementedError(
-                'Handling of %s not implemented' % event.packet.__class__)
+                self._recalculateRoute(dest)
+            return self._routesChange(event.timestamp)
 
+        changed = False
+        threshold = self.changeThreshold
+        for dest, distance in distances.iteritems():
+            old = previous.get(dest)
+            if old != distance:
+                if old is None or abs(distance - old) > threshold * old:
+                    changed = True
+                self._updateRoute(dest, link, distance)
+        for dest in previous:
+            if dest not in distances:
+                changed = True
+                self._recalculateRoute(dest)
+        if changed:
+            return self._routesChange(event.timestamp)
         return []
 
-    def _processOtherEvent(self, event):
-        """ Process other types of Events.
+    def _checkLinkCosts(self, timestamp):
+        """ Compare the costs of the Links with those of link_table
 
-        Routers can handle UpdateRoutingTableEvents too
+        A Router only hears from its neighbors when it polls them, so an
+        adaptive Router that has backed off would not see its own Links
+        congest until its next update. Distances through a Link whose cost
+        changed by more than changeThreshold (relative) are shifted by the
+        difference, as the next RoutingPacket over it would.
 
-        :param packet_event: Event to process
+        :param timestamp: current time
         :return: new Events to enqueue
         """
+        changed = False
+        threshold = self.changeThreshold
+        for link, old in self._linkCosts.iteritems():
+            cost = link.cost()
+            if abs(cost - old) <= threshold * old:
+                continue
+            changed = True
+            self._linkCosts[link] = cost
+            distances = self.link_table[link]
+            for dest in distances:
+                distances[dest] += cost - old
+                self._updateRoute(dest, link, distances[dest])
+        if changed:
+            return self._routesChange(timestamp)
+        return []
 
-        if isinstance(event, UpdateRoutingTableEvent):
-            return self._updateRoutingTable(event)
-        else:
-            raise NotImplementedError(
-                'Handling of %s not implemented' % event.__class__)
+    def _routesChange(self, timestamp):
+        """ Note a change of distances larger than changeThreshold
+
+        An adaptive Router that has backed off updates again
+        updateInterval from now instead of waiting out the longer interval.
+
+        :param timestamp: time of the change
+        :return: new Events to enqueue
+        """
+        self._routesChanged = True
+        if not self.adaptive or self._nextUpdate is None or \
+                self._nextUpdate <= timestamp + self.updateInterval:
+            return []
+        self._interval = self.updateInterval
+        self._nextUpdate = timestamp + self.updateInterval
+        return [UpdateRoutingTableEvent(self._nextUpdate, self,
+                                        'Router %s updates routing table',
+                                        (self.address,))]
+
+    def _updateRoute(self, dest, link, distance):
+        """ Update the route to dest after its distance through link changed
+
+        :param dest: destination address
+        :param link: Link whose distance changed
+        :param distance: new distance to dest through link
+        """
+        route = self.routing_table.get(dest)
+        if route is None:
+            # No other link leads to dest
+            self._recalculateRoute(dest)
+        elif distance < route[1]:
+            # Strictly shorter than every other link
+            self.routing_table[dest] = (link, distance)
+        elif route[0] is link or distance == route[1]:
+            # The best route got longer, or there is a tie to break
+            self._recalculateRoute(dest)
+
+    def _recalculateRoute(self, dest):
+        """ Find the shortest route to dest over all links
+
+        :param dest: destination address
+        """
+        best = (None, UNREACHABLE)
+        for link in self.link_table:
+            if dest in self.link_table[link] and \
+                    self.link_table[link][dest] < best[1]:
+                best = (link, self.link_table[link][dest])
+        self.routing_table[dest] = best
+
+    def _receiveRoutingRequest(self, event):
+        """ Received routing table request
+
+        Adaptive Routers also check the costs of their own Links here,
+        between their updates, see _checkLinkCosts.
+
+        :param event: PacketEvent carrying a RoutingRequestPacket
+        :return: new Events to enqueue
+        """
+        newevents = []
+        if self.adaptive:
+            newevents = self._checkLinkCosts(event.timestamp)
+        # process request for routing table
+        logger.log('Routing table packet for router %s', self.address,
+                   category=logger.ROUTING, level=logger.DEBUG)
+        return newevents + event.sender.addPackets(
+            [RoutingPacket(self.address, event.packet.source,
+                           routingTable=self.routing_table)], self)
 
     def _updateRoutingTable(self, event):
         """ Updates the internal routing table.
@@ -121,22 +250,57 @@ class Router(Node):
         This method should be the result of an Event that informs
         the Router to update. Begins bellman ford on all nodes in the graph
 
+        The next update is updateInterval later, or for adaptive Routers,
+        twice the previous interval if no distance changed by more than
+        changeThreshold since the last update.
+
         :param packet_event: UpdateRoutingTableEvent
         :return: new Events to enqueue
         """
+        if self.adaptive:
+            if self._nextUpdate is not None and \
+                    event.timestamp != self._nextUpdate:
+                # Replaced by an earlier update, see _routesChange
+                return []
+            if self._routesChanged:
+                self._interval = self.updateInterval
+            else:
+                self._interval = min(2 * self._interval,
+                                     self.maxUpdateInterval)
+            self._routesChanged = False
+            interval = self._interval
+        else:
+            interval = self.updateInterval
+        self._nextUpdate = event.timestamp + interval
+
         packetevents = \
             [PacketEvent(event.timestamp + i * 10, self, self.links[i],
                          RoutingRequestPacket(self.address),
-                         'Routing table request packet for router %s'
-                         % self.address)
+                         'Routing table request packet for router %s',
+                         (self.address,))
              for i in xrange(len(self.links))]
 
         packetevents.append(
-            UpdateRoutingTableEvent(event.timestamp + 5000, self,
-                                    'Router %s updates routing table'
-                                    % self.address))
+            UpdateRoutingTableEvent(self._nextUpdate, self,
+                                    'Router %s updates routing table',
+                                    (self.address,)))
         return packetevents
 
+    def cutThroughLink(self, packet):
+        """ Find the Link to forward a packet to without an Event.
+
+        Used by Links delivering to this Router when cut-through is enabled.
+        The route is looked up when the packet is sent to the Router rather
+        than when it arrives, which only matters if the routing table
+        changes in between.
+
+        :param packet: packet arriving at this Router
+        :return: next Link, or None if the Router must handle the packet
+        """
+        if isinstance(packet, DataPacket) or isinstance(packet, AckPacket):
+            return self.getRoute(packet.dest)
+        return None
+
     def getRoute(self, destination):
         """ Check routing table to see how to get to destination
 
@@ -147,3 +311,16 @@ class Router(Node):
         if destination in self.routing_table:
             return self.routing_table[destination][0]
         return None
+
+    # Handlers for each Event and Packet class
+    _eventDispatch = {
+        PacketEvent: '_processPacketEvent',
+        UpdateRoutingTableEvent: '_updateRoutingTable',
+    }
+
+    _packetDispatch = {
+        DataPacket: '_forwardPacket',
+        AckPacket: '_forwardPacket',
+        RoutingPacket: '_receiveRoutingTable',
+        RoutingRequestPacket: '_receiveRoutingRequest',
+    }
@@ -4,6 +4,9 @@ icfire.packet
 
 This module implements the base packet class and other sub packets
 
+Packets use __slots__ and set all of their fields directly in each
+constructor, since one is created for every data packet and ACK sent.
+
 """
 
 
@@ -11,6 +14,7 @@ class Packet(object):
     """This class represents a packet of data
 
     It can be sent between routers and hosts"""
+    __slots__ = ('source', 'dest', 'index', 'ack', 'fin', 'corrupted', 'size')
 
     def __init__(self, source, dest, index, size,
                  ack=False, fin=False, corrupted=False):
@@ -37,9 +41,16 @@ class Packet(object):
 
 class DataPacket(Packet):
     """ This class represents a packet transferring arbitrary data """
+    __slots__ = ('flowId', 'timestamp')
 
     def __init__(self, source, dest, index, flowId, timestamp=None):
-        super(self.__class__, self).__init__(source, dest, index, size=1024)
+        self.source = source
+        self.dest = dest
+        self.index = index
+        self.ack = False
+        self.fin = False
+        self.corrupted = False
+        self.size = 1024
 
         self.flowId = flowId
         self.timestamp = timestamp
@@ -47,10 +58,16 @@ class DataPacket(Packet):
 
 class AckPacket(Packet):
     """ This class represents an ack packet """
+    __slots__ = ('flowId', 'timestamp')
 
     def __init__(self, source, dest, index, flowId, timestamp=None):
-        super(self.__class__, self).__init__(
-            source, dest, index, size=64, ack=True)
+        self.source = source
+        self.dest = dest
+        self.index = index
+        self.ack = True
+        self.fin = False
+        self.corrupted = False
+        self.size = 64
 
         self.flowId = flowId
         self.timestamp = timestamp
@@ -58,10 +75,16 @@ class AckPacket(Packet):
 
 class RoutingPacket(Packet):
     """ This class represents a routing table packet """
+    __slots__ = ('routingTable',)
 
     def __init__(self, source, dest, routingTable=None):
-        super(self.__class__, self).__init__(
-            source, dest, index=None, size=1024)
+        self.source = source
+        self.dest = dest
+        self.index = None
+        self.ack = False
+        self.fin = False
+        self.corrupted = False
+        self.size = 1024
 
         # Routing table can fit inside 1024 bytes
         self.routingTable = routingTable
@@ -69,7 +92,13 @@ class RoutingPacket(Packet):
 
 class RoutingRequestPacket(Packet):
     """ This class represents a request for routing table """
+    __slots__ = ()
 
     def __init__(self, source):
-        super(self.__class__, self).__init__(
-            source, dest=None, index=None, size=64)
+        self.source = source
+        self.dest = None
+        self.index = None
+        self.ack = False
+        self.fin = False
+        self.corrupted = False
+        self.size = 64
@@ -0,0 +1,396 @@
+"""
+icfire.parallel
+~~~~~~~~~~~~~~~
+
+Conservative parallel discrete event simulation (PDES).
+
+The Nodes of a Network are split into partitions, and each partition's
+Events are processed by its own worker process. Workers are forked, so each
+one starts with a full copy of the Network but only processes the Events of
+the Nodes it owns. Links between two partitions are "cut": packets crossing
+them are sent to the other worker as messages.
+
+Synchronization uses time windows. A packet sent over a cut Link arrives at
+least the Link's delay after it is sent, so with a lookahead L equal to the
+smallest cut Link delay, no worker can receive a message earlier than L
+after the earliest pending Event T of any worker. Every worker safely
+processes all of its Events before T + L, then the messages are exchanged
+and the next window starts.
+
+Results differ slightly from a sequential run:
+
+- Each worker has its own copy of a cut Link and only sends its own
+  direction on it, so cut Links behave as full duplex links with a
+  separate buffer and transmitter per direction. Links inside a partition
+  are unchanged.
+- Routing tables are copied when they are sent over a cut Link instead of
+  being read by the receiving Router when they arrive.
+- Events with the same timestamp may be processed in a different order.
+
+Cut Links should have a delay of at least a few packet transmission times,
+otherwise windows are short and workers spend their time synchronizing.
+
+After a run, Node, Link and Flow stats and the state of every Flow are
+merged back into the Network that was passed in. Logging is disabled in the
+workers.
+
+"""
+
+import multiprocessing
+import traceback
+from collections import deque
+from heapq import heappush
+
+import icfire.logger as logger
+import icfire.simtimer as simtimer
+from icfire.event import PacketEvent
+from icfire.eventhandler import EventHandler
+from icfire.networkobjects.link import Link
+from icfire.networkobjects.router import Router
+from icfire.packet import RoutingPacket
+from icfire.scheduler import HeapScheduler
+from icfire.timeseries import BinnedSeries, TimeSeries
+
+
+def partition(network, nparts):
+    """ Split the Nodes of a Network into connected partitions
+
+    Nodes are ordered breadth first, so neighbouring Nodes tend to end up in
+    the same partition, and split into nparts blocks of Routers. Hosts are
+    placed with the Router they are connected to.
+
+    :param network: network.Network to partition
+    :param nparts: number of partitions
+    :return: dict of node address -> partition index
+    """
+    nodes = network.nodes
+    routers = [a for a in sorted(nodes) if isinstance(nodes[a], Router)]
+    if not routers:
+        routers = sorted(nodes)
+
+    # Breadth first order over the Routers, one component at a time
+    order = []
+    seen = set()
+    for start in routers:
+        if start in seen:
+            continue
+        seen.add(start)
+        frontier = deque([start])
+        while frontier:
+            address = frontier.popleft()
+            order.append(address)
+            for link in nodes[address].links:
+                other = link._otherNode(nodes[address]).address
+                if other not in seen and other in routers:
+                    seen.add(other)
+                    frontier.append(other)
+
+    owner = dict()
+    for i, address in enumerate(order):
+        owner[address] = i * nparts // len(order)
+    for address in nodes:
+        if address not in owner:
+            links = nodes[address].links
+            neighbor = links[0]._otherNode(nodes[address]).address \
+                if links else None
+            owner[address] = owner.get(neighbor, 0)
+    return owner
+
+
+def cutLinks(network, owner):
+    """ Links whose two Nodes are in different partitions
+
+    :param network: network.Network
+    :param owner: dict of node address -> partition index
+    :return: list of Links
+    """
+    return [l for l in network.links.values()
+            if owner[l.nodeA.address] != owner[l.nodeB.address]]
+
+
+class _PartitionScheduler(HeapScheduler):
+    """ HeapScheduler that sends Events for other partitions to an outbox
+
+    A PacketEvent belongs to the partition of the Node receiving it, or, if
+    it is sent to a Link, to the partition of the Node sending it. All
+    other Events are created by the partition that owns them.
+    """
+
+    def __init__(self, remote, nparts):
+        """ Constructor
+
+        :param remote: dict of Node (object) -> partition index, for the
+            Nodes of other partitions
+        :param nparts: number of partitions
+        """
+        super(_PartitionScheduler, self).__init__()
+        self.remote = remote
+        self.outbox = [[] for _ in xrange(nparts)]
+
+    def put(self, event):
+        remote = self.remote
+        part = remote.get(event.eventObject)
+        if part is None and event.__class__ is PacketEvent:
+            part = remote.get(event.sender)
+        if part is None:
+            heappush(self._heap, (event.timestamp, event._internalid, event))
+        else:
+            self.outbox[part].append(_encode(event))
+
+    def putLocal(self, event):
+        """ Add an Event without checking which partition owns it """
+        heappush(self._heap, (event.timestamp, event._internalid, event))
+
+    def takeOutbox(self):
+        """ Return and clear the messages for each partition """
+        outbox = self.outbox
+        self.outbox = [[] for _ in outbox]
+        return outbox
+
+
+def _ref(obj):
+    """ Picklable reference to a Link or Node """
+    if isinstance(obj, Link):
+        return (True, obj.id)
+    return (False, obj.address)
+
+
+def _deref(network, ref):
+    """ Look up a reference made by _ref in this process' Network """
+    isLink, key = ref
+    return network.links[key] if isLink else network.nodes[key]
+
+
+def _encode(event):
+    """ Encode a PacketEvent as a message for another partition """
+    packet = event.packet
+    if packet.__class__ is RoutingPacket:
+        # Routing tables refer to Links, send their ids instead
+        table = dict()
+        for dest, entry in packet.routingTable.iteritems():
+            if isinstance(entry[0], Link):
+                table[dest] = (True, entry[0].id, entry[1])
+            else:
+                table[dest] = (False, entry[0], entry[1])
+        packet = RoutingPacket(packet.source, packet.dest, table)
+    return (event.timestamp, _ref(event.sender), _ref(event.eventObject),
+            packet, event._logFormat, event._logArgs)
+
+
+def _decode(network, message):
+    """ Rebuild a PacketEvent from a message made by _encode """
+    timestamp, sender, receiver, packet, logFormat, logArgs = message
+    if packet.__class__ is RoutingPacket:
+        links = network.links
+        packet.routingTable = dict(
+            (dest, (links[key] if isLink else key, dist))
+            for dest, (isLink, key, dist) in packet.routingTable.iteritems())
+    return PacketEvent(timestamp, _deref(network, sender),
+                       _deref(network, receiver), packet, logFormat, logArgs)
+
+
+def _owns(event, owner):
+    """ Partition that processes one of the Network's initial Events """
+    obj = event.eventObject
+    address = getattr(obj, 'address', None)
+    if address is None:
+        address = getattr(obj, 'source_id')  # Flow
+    return owner[address]
+
+
+def _results(network, part, owner):
+    """ Stats and Flow state of the objects owned by a worker """
+    nodes = dict((a, n.stats) for a, n in network.nodes.iteritems()
+                 if owner[a] == part and hasattr(n, 'stats'))
+    links = dict((i, l.stats) for i, l in network.links.iteritems()
+                 if part in (owner[l.nodeA.address], owner[l.nodeB.address]))
+    flows = dict()
+    for flowId, f in network.flows.iteritems():
+        if part == owner[f.source_id]:
+            state = dict(f.__dict__)
+            del state['network']
+            flows[flowId] = state
+        elif part == owner[f.dest_id]:
+            flows[flowId] = {'stats': f.stats}
+    return nodes, links, flows
+
+
+def _mergeStats(target, source):
+    """ Add the records of a Stats object from a worker into target
+
+    Records of the two directions of a cut Link are added together if they
+    share a timestamp.
+    """
+    for name, records in vars(source).iteritems():
+        if isinstance(records, (TimeSeries, BinnedSeries)):
+            getattr(target, name).merge(records)
+
+
+def _worker(network, part, owner, nparts, conn):
+    """ Process the Events of one partition, one window at a time """
+    try:
+        logger.disableInChild()
+        remote = dict((n, owner[a]) for a, n in network.nodes.iteritems()
+                      if owner[a] != part)
+        queue = _PartitionScheduler(remote, nparts)
+        handler = EventHandler(
+            network, [e for e in network.events if _owns(e, owner) == part],
+            queue)
+
+        conn.send(queue.peek().timestamp if queue.qsize() else None)
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            end, inbox = message
+            for m in inbox:
+                queue.putLocal(_decode(network, m))
+
+            steps = 0
+            heap = queue._heap
+            while heap and heap[0][0] < end:
+                handler.step()
+                steps += 1
+            done = len(network.flows) - network.flowsRemaining
+            conn.send((queue.takeOutbox(),
+                       heap[0][0] if heap else None, steps, done,
+                       handler.time))
+        conn.send(_results(network, part, owner))
+    except Exception:
+        conn.send(('error', traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+class ParallelEventHandler(object):
+    """ Runs a Network on several processes
+
+    Works like EventHandler, using the Network's initial Events.
+    """
+
+    def __init__(self, network, nparts=None, owner=None):
+        """ Constructor for a ParallelEventHandler.
+
+        :param network: network.Network object that models the network
+        :param nparts: [optional] number of worker processes. Defaults to
+            the number of CPUs.
+        :param owner: [optional] dict of node address -> partition index.
+            Defaults to partition(network, nparts).
+        """
+        if owner is None:
+            owner = partition(network, nparts or multiprocessing.cpu_count())
+        self._network = network
+        self.owner = owner
+        self.nparts = max(owner.values()) + 1
+
+        cut = cutLinks(network, owner)
+        if cut and min(l.delay for l in cut) <= 0:
+            raise ValueError('Links between partitions need a delay > 0')
+        self.lookahead = min(l.delay for l in cut) if cut else float('inf')
+
+        self.time = 0
+        self.steps = 0
+        self.windows = 0
+        self._flowsDone = 0
+
+    def completed(self):
+        """ Check whether simulation is completed
+        :return: true if all flows are done
+        """
+        return self._flowsDone == len(self._network.flows)
+
+    def run(self, steps=0, until=None):
+        """ Run the partitions until all flows are done
+
+        Partitions stop at the end of a window, so a run can process up to
+        one window of Events past the completion of the last flow, or
+        past steps. The Network's initial Events are used, so run should
+        only be called once.
+
+        :param steps: [optional] Stop after at least this many Events in
+            total. If 0, the simulation runs until completion.
+        :param until: [optional] Stop before the first Event at or after
+            this time.
+        """
+        nparts = self.nparts
+        conns = []
+        workers = []
+
+        # Anything buffered now would otherwise be written by every worker
+        logger.flushBeforeFork()
+
+        for part in xrange(nparts):
+            conn, child = multiprocessing.Pipe()
+            p = multiprocessing.Process(
+                target=_worker,
+                args=(self._network, part, self.owner, nparts, child))
+            p.daemon = True
+            p.start()
+            child.close()
+            conns.append(conn)
+            workers.append(p)
+
+        try:
+            nexttimes = [self._recv(c) for c in conns]
+            inboxes = [[] for _ in xrange(nparts)]
+            while True:
+                pending = [t for t in nexttimes if t is not None]
+                pending.extend(m[0] for inbox in inboxes for m in inbox)
+                if not pending or (until is not None and
+                                   min(pending) >= until):
+                    break
+
+                end = min(pending) + self.lookahead
+                if until is not None:
+                    end = min(end, until)
+                for conn, inbox in zip(conns, inboxes):
+                    conn.send((end, inbox))
+                inboxes = [[] for _ in xrange(nparts)]
+                self._flowsDone = 0
+                for part, conn in enumerate(conns):
+                    outbox, nexttime, n, done, time = self._recv(conn)
+                    for dest, messages in enumerate(outbox):
+                        inboxes[dest].extend(messages)
+                    nexttimes[part] = nexttime
+                    self.steps += n
+                    self._flowsDone += done
+                    self.time = max(self.time, time)
+                self.windows += 1
+
+                if self.completed() or (steps and self.steps >= steps):
+                    break
+
+            for conn in conns:
+                conn.send(None)
+            for conn in conns:
+                self._merge(*self._recv(conn))
+        finally:
+            for conn in conns:
+                conn.close()
+            for p in workers:
+                p.join()
+        simtimer.simtime = self.time
+
+    def _recv(self, conn):
+        """ Receive a message from a worker, raising its errors here """
+        message = conn.recv()
+        if isinstance(message, tuple) and message[:1] == ('error',):
+            raise RuntimeError('Partition failed:\n' + message[1])
+        return message
+
+    def _merge(self, nodes, links, flows):
+        """ Merge the results of one worker into the Network """
+        network = self._network
+        for address, stats in nodes.iteritems():
+            _mergeStats(network.nodes[address].stats, stats)
+        for linkid, stats in links.iteritems():
+            _mergeStats(network.links[linkid].stats, stats)
+        for flowId, state in flows.iteritems():
+            f = network.flows[flowId]
+            _mergeStats(f.stats, state.pop('stats'))
+            if state:
+                done = state.pop('_done')
+                completedAt = state.pop('completedAt')
+                f.__dict__.update(state)
+                f.done = done
+                f.completedAt = completedAt
@@ -0,0 +1,113 @@
+"""
+icfire.profiler
+~~~~~~~~~~~~~~~
+
+Profiling of the event loop. An EventProfiler given to an EventHandler
+records, for every Event processed, the wall time spent in processEvent
+(including the Link and Node work it triggers), grouped by Event class and
+by the object the Event occurs on, as well as the peak number of pending
+Events.
+
+    >>> profiler = EventProfiler()
+    >>> EventHandler(network, profiler=profiler).run()
+    >>> print profiler.report()
+    >>> profiler.save('profile.json')
+
+Timing adds two clock reads per Event, so it is only done when a profiler
+is given.
+
+"""
+
+import json
+from timeit import default_timer
+
+from icfire.trace import objectName
+
+clock = default_timer
+
+
+class EventProfiler(object):
+    """ Collects per Event class and per object timings """
+
+    def __init__(self):
+        self.byClass = dict()  # Event class -> [count, seconds]
+        self.byObject = dict()  # object -> [count, seconds]
+        self.events = 0
+        self.seconds = 0.
+        self.peakQueue = 0
+        self.peakQueueTime = None  # simulation time of the peak
+
+    def record(self, event, seconds, queuesize):
+        """ Record one processed Event
+
+        :param event: Event that was processed
+        :param seconds: wall time spent processing it
+        :param queuesize: number of Events pending afterwards
+        """
+        self.events += 1
+        self.seconds += seconds
+
+        entry = self.byClass.get(event.__class__)
+        if entry is None:
+            entry = self.byClass[event.__class__] = [0, 0.]
+        entry[0] += 1
+        entry[1] += seconds
+
+        entry = self.byObject.get(event.eventObject)
+        if entry is None:
+            entry = self.byObject[event.eventObject] = [0, 0.]
+        entry[0] += 1
+        entry[1] += seconds
+
+        if queuesize > self.peakQueue:
+            self.peakQueue = queuesize
+            self.peakQueueTime = event.timestamp
+
+    def toDict(self):
+        """ Profile as a dict, sorted by time spent
+
+        :return: dict with totals, per class and per object lists of
+            (name, count, seconds)
+        """
+        def rows(table, name):
+            return sorted(([name(k), v[0], v[1]] for k, v in table.iteritems()),
+                          key=lambda r: -r[2])
+
+        return {
+            'events': self.events,
+            'seconds': self.seconds,
+            'peakQueue': self.peakQueue,
+            'peakQueueTime': self.peakQueueTime,
+            'classes': rows(self.byClass, lambda c: c.__name__),
+            'objects': rows(self.byObject, lambda o: '%s %s' % (
+                o.__class__.__name__, objectName(o))),
+        }
+
+    def save(self, filename):
+        """ Write the profile as json
+
+        :param filename: file to write to
+        """
+        with open(filename, 'w') as f:
+            json.dump(self.toDict(), f, indent=2)
+
+    def report(self, top=20):
+        """ Profile as a text table
+
+        :param top: number of objects to list
+        :return: string
+        """
+        profile = self.toDict()
+        lines = ['%d events in %.3f s, peak queue %d at %s ms' % (
+            self.events, self.seconds, self.peakQueue, self.peakQueueTime)]
+        for title, table in (('Event class', profile['classes']),
+                             ('Object', profile['objects'][:top])):
+            lines.append('')
+            lines.append('%-30s %10s %10s %8s %10s' % (
+                title, 'count', 'seconds', '%', 'us/event'))
+            for name, count, seconds in table:
+                lines.append('%-30s %10d %10.3f %8.1f %10.2f' % (
+                    name, count, seconds,
+                    100. * seconds / self.seconds if self.seconds else 0,
+                    1e6 * seconds / count))
+        return '\n'.join(lines)
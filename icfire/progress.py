@@ -0,0 +1,73 @@
+"""
+icfire.progress
+~~~~~~~~~~~~~~~
+
+Progress reports for long runs. EventHandler.run() only looks at the clock
+every so many Events and hands the ProgressReporter a sample, so reporting
+costs nothing on most steps. A report line looks like
+
+    1200000 events  sim 12345.6 ms  wall 10.2 s  117647 events/s  1210.4 sim ms/s
+
+with the rates measured since the previous line.
+
+"""
+
+import sys
+
+
+class ProgressReporter(object):
+    """ Prints progress every N events or every T seconds of wall time """
+
+    def __init__(self, events=None, seconds=5.0, stream=None, check=1000):
+        """ Constructor for a ProgressReporter
+
+        :param events: [optional] print every this many Events
+        :param seconds: print every this many seconds, if events is not
+            given
+        :param stream: [optional] file to print to, defaults to stderr
+        :param check: number of Events between looks at the clock, if
+            events is not given
+        """
+        self.events = events
+        self.seconds = seconds
+        self.stream = stream
+        self.interval = events or check  # Events between calls to sample()
+
+    def start(self, handler, now):
+        """ Called by run() before the first step
+
+        :param handler: EventHandler being run
+        :param now: wall clock time
+        """
+        self._start = self._last = now
+        self._lastCount = 0
+        self._lastTime = handler.time
+
+    def sample(self, handler, count, now):
+        """ Called by run() every interval steps
+
+        :param handler: EventHandler being run
+        :param count: number of steps so far in this run
+        :param now: wall clock time
+        """
+        if self.events or now - self._last >= self.seconds:
+            self._report(handler, count, now)
+
+    def finish(self, handler, count, now):
+        """ Called by run() when it stops """
+        if count != self._lastCount:
+            self._report(handler, count, now)
+
+    def _report(self, handler, count, now):
+        wall = max(now - self._last, 1e-9)
+        line = '%d events  sim %.1f ms  wall %.1f s  %.0f events/s  ' \
+               '%.1f sim ms/s' % (
+                   count, handler.time, now - self._start,
+                   (count - self._lastCount) / wall,
+                   (handler.time - self._lastTime) / wall)
+        stream = self.stream or sys.stderr
+        stream.write(line + '\n')
+        stream.flush()
+        self._last = now
+        self._lastCount = count
+        self._lastTime = handler.time
@@ -0,0 +1,246 @@
+"""
+icfire.scheduler
+~~~~~~~~~~~~~~~~
+
+Schedulers hold the pending Events of an EventHandler and hand them back in
+timestamp order. Ties are broken by Event creation order, so every scheduler
+produces exactly the same sequence of Events.
+
+The simulation loop runs on a single thread, so schedulers do not lock.
+
+An EventHandler uses the scheduler named by the 'scheduler' key of the json
+files (see create), or a HeapScheduler by default.
+
+"""
+
+from bisect import insort
+from heapq import heappush, heappop, nlargest
+from Queue import Empty
+
+
+class Scheduler(object):
+    """ Abstract class for the pending Event set of an EventHandler.
+
+    get() should raise a Queue.Empty error if there are no Events left.
+    """
+
+    def put(self, event):
+        """ Add an Event
+
+        :param event: Event to schedule
+        """
+        raise NotImplementedError('This should be overriden by subclass')
+
+    def get(self, block=False):
+        """ Remove and return the Event with the smallest timestamp
+
+        :param block: unused, kept for compatibility with Queue.get
+        :return: next Event
+        """
+        raise NotImplementedError('This should be overriden by subclass')
+
+    def peek(self):
+        """ Return the Event with the smallest timestamp without removing it
+
+        :return: next Event
+        """
+        event = self.get()
+        self.put(event)
+        return event
+
+    def qsize(self):
+        """ Number of Events pending """
+        raise NotImplementedError('This should be overriden by subclass')
+
+    def empty(self):
+        """ True if there are no Events pending """
+        return self.qsize() == 0
+
+    def __len__(self):
+        return self.qsize()
+
+
+class HeapScheduler(Scheduler):
+    """ Binary heap of (timestamp, event id, Event) tuples.
+
+    Ordering is done by native tuple comparison, which avoids calling
+    Event.__cmp__ on every heap operation.
+    """
+
+    def __init__(self, events=None):
+        """ Constructor for a HeapScheduler
+
+        :param events: [optional] initial Events to schedule
+        """
+        self._heap = []
+        if events:
+            for e in events:
+                self.put(e)
+
+    def put(self, event):
+        heappush(self._heap, (event.timestamp, event._internalid, event))
+
+    def get(self, block=False):
+        if not self._heap:
+            raise Empty
+        return heappop(self._heap)[2]
+
+    def peek(self):
+        if not self._heap:
+            raise Empty
+        return self._heap[0][2]
+
+    def qsize(self):
+        return len(self._heap)
+
+    def empty(self):
+        return not self._heap
+
+
+class CalendarScheduler(Scheduler):
+    """ Calendar queue (R. Brown, 1988).
+
+    Events are hashed by timestamp into an array of buckets that each cover
+    `width` ms. One pass over all buckets covers a "year" of nbuckets * width
+    ms. Dequeuing walks the buckets in time order, so with a suitable width
+    both enqueue and dequeue take O(1) on average no matter how many Events
+    are pending. The bucket count doubles or halves as the queue grows or
+    shrinks, and the width is then re-estimated from the earliest Events.
+
+    Each bucket is a list kept in descending time order, so the earliest
+    Event of a bucket is popped from the end of the list.
+    """
+
+    def __init__(self, width=1.0, nbuckets=16, events=None, resize=True):
+        """ Constructor for a CalendarScheduler
+
+        :param width: time (ms) covered by one bucket
+        :param nbuckets: initial number of buckets
+        :param events: [optional] initial Events to schedule
+        :param resize: grow and shrink the calendar with the queue size
+        """
+        self._size = 0
+        self._resize = resize
+        self._minbuckets = nbuckets
+        self._build(float(width), nbuckets)
+        if events:
+            for e in events:
+                self.put(e)
+
+    @classmethod
+    def fromNetwork(cls, network, **kwargs):
+        """ Create a CalendarScheduler sized for the Links of a Network.
+
+        Bucket width is the transmission time of a data packet on the fastest
+        Link, which is the finest spacing between events on one Link. The
+        calendar covers the longest propagation plus transmission delay, so
+        packets in flight land within the current year.
+
+        :param network: network.Network to size the calendar for
+        :param kwargs: passed to the constructor
+        :return: CalendarScheduler
+        """
+        links = network.links.values()
+        if not links:
+            return cls(**kwargs)
+        width = min(125.0 / 16384 * 1024 / l.rate for l in links)
+        year = max(l.delay + 125.0 / 16384 * 1024 / l.rate for l in links)
+        nbuckets = 16
+        while nbuckets * width < year:
+            nbuckets *= 2
+        kwargs.setdefault('width', width)
+        kwargs.setdefault('nbuckets', nbuckets)
+        return cls(**kwargs)
+
+    def _build(self, width, nbuckets, items=()):
+        """ (Re)create the bucket array and insert items into it """
+        self._width = width
+        self._nbuckets = nbuckets
+        self._buckets = [[] for _ in xrange(nbuckets)]
+        self._vb = None  # virtual bucket (floor(time / width)) being scanned
+        for item in items:
+            self._insert(item)
+
+    def _insert(self, item):
+        """ Insert a (-timestamp, -event id, Event) item """
+        key = -item[0] // self._width
+        if self._vb is None or key < self._vb:
+            self._vb = key
+        insort(self._buckets[int(key) % self._nbuckets], item)
+
+    def _rebuild(self, nbuckets):
+        """ Resize to nbuckets, estimating a new width from the head Events """
+        items = [item for bucket in self._buckets for item in bucket]
+        times = sorted(-item[0] for item in nlargest(25, items))
+        gaps = [b - a for a, b in zip(times, times[1:]) if b > a]
+        width = 3.0 * sum(gaps) / len(gaps) if gaps else self._width
+        self._build(width, nbuckets, items)
+
+    def put(self, event):
+        self._insert((-event.timestamp, -event._internalid, event))
+        self._size += 1
+        if self._resize and self._size > 2 * self._nbuckets:
+            self._rebuild(2 * self._nbuckets)
+
+    def _head(self):
+        """ Find the bucket holding the earliest Event at its end
+
+        Moves the scan to that bucket, so a following get() or peek() finds
+        it right away.
+        """
+        buckets, nbuckets, width = self._buckets, self._nbuckets, self._width
+        vb = self._vb
+
+        # Walk one year of buckets looking for an Event in the current bucket
+        for _ in xrange(nbuckets):
+            bucket = buckets[int(vb) % nbuckets]
+            if bucket and -bucket[-1][0] // width <= vb:
+                break
+            vb += 1
+        else:
+            # Sparse queue: jump directly to the earliest Event
+            bucket = max((b for b in buckets if b), key=lambda b: b[-1])
+            vb = -bucket[-1][0] // width
+
+        self._vb = vb
+        return bucket
+
+    def get(self, block=False):
+        if not self._size:
+            raise Empty
+        event = self._head().pop()[2]
+        self._size -= 1
+        if self._resize and self._nbuckets > self._minbuckets and \
+                self._size < self._nbuckets / 2:
+            self._rebuild(self._nbuckets / 2)
+        return event
+
+    def peek(self):
+        if not self._size:
+            raise Empty
+        return self._head()[-1][2]
+
+    def qsize(self):
+        return self._size
+
+    def empty(self):
+        return not self._size
+
+
+SCHEDULERS = ('heap', 'calendar')
+
+
+def create(name, network):
+    """ Create a scheduler by name
+
+    :param name: 'heap' for a HeapScheduler, or 'calendar' for a
+        CalendarScheduler sized for the Links of network
+    :param network: network.Network the Events will come from
+    :return: Scheduler
+    """
+    if name == 'heap':
+        return HeapScheduler()
+    if name == 'calendar':
+        return CalendarScheduler.fromNetwork(network)
+    raise ValueError('Unknown scheduler %s, expected one of %s'
+                     % (name, ', '.join(SCHEDULERS)))
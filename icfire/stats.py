@@ -3,21 +3,102 @@ icfire.stats
 ~~~~~~~~~~~~
 Stats encapsulate the statistics and data of each node
 
+By default every record is kept in a TimeSeries. Given a resolution, Stats
+instead aggregate records into a BinnedSeries as they arrive, and the plots
+and helpers below work from the bins. Plots of such Stats must use a
+multiple of that resolution.
+
+Stats given a plotter stream their records to a plotting process while the
+simulation runs, see icfire.liveplot.
+
+matplotlib and scipy are imported by the functions that plot, so recording
+stats does not load them.
+
 """
 
 import time as realtimer
 
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import ndimage
+
+from icfire.timeseries import BinnedSeries, TimeSeries
 
 
 class Stats(object):
     """Base class for statistical objects"""
 
-    def __init__(self, parent_id):
+    # Figure layout for live plots: (title, ylabel, lines) for each subplot,
+    # with (series, helper, label) for each line. Titles get the parent id.
+    livePanels = []
+
+    def __init__(self, parent_id, resolution=None, plotter=None):
         self.parent_id = parent_id
-        pass
+        self.resolution = resolution
+        self.plotter = None
+        if plotter is not None:
+            plotter.watch(self)
+
+    def _newSeries(self, dtype=float):
+        """ Empty series to record into, binned if there is a resolution """
+        if self.resolution is None:
+            return TimeSeries(dtype)
+        return BinnedSeries(self.resolution, dtype)
+
+    def setResolution(self, resolution):
+        """ Aggregate records into intervals of resolution (ms)
+
+        Must be called before anything is recorded.
+
+        :param resolution: interval length, or None to keep every record
+        """
+        self.resolution = resolution
+        for name, series in vars(self).items():
+            if isinstance(series, (TimeSeries, BinnedSeries)):
+                assert not len(series), 'Stats already has records'
+                setattr(self, name, self._newSeries(series.dtype))
+
+    def setPlotter(self, plotter):
+        """ Stream records to a plotting process, see icfire.liveplot
+
+        :param plotter: liveplot.LivePlotter, or None to stop
+        """
+        self.plotter = plotter
+        self._pushAt = 0  # wall time of the next push
+        self._pushed = dict()  # series name -> records pushed
+
+    def push(self, force=False):
+        """ Send the records since the last push to the plotter
+
+        Called after every record while there is a plotter, but only sends
+        once every plotter.period seconds unless forced.
+
+        :param force: send now
+        """
+        now = realtimer.time()
+        if now < self._pushAt and not force:
+            return
+        self._pushAt = now + self.plotter.period
+        for name in set(line[0] for _, _, lines in self.livePanels
+                        for line in lines):
+            series = getattr(self, name)
+            start = self._pushed.get(name, 0)
+            if len(series) == start:
+                continue
+            if isinstance(series, BinnedSeries):
+                # Small enough to send whole
+                payload = series
+            else:
+                # Resend the last record pushed, in case more was added to it
+                start = max(start - 1, 0)
+                payload = (series.times[start:].copy(),
+                           series.values[start:].copy())
+            if self.plotter.send(('data', id(self), name, payload)):
+                self._pushed[name] = len(series)
+
+    def __getstate__(self):
+        # Plotting processes can not be pickled
+        state = dict(self.__dict__)
+        state['plotter'] = None
+        return state
 
     def analyze(self):
         """ This script does a full analysis over the objects in the Stats """
@@ -34,31 +115,16 @@ class HostStats(Stats):
     This class should model the per-host send/recieve rate
     """
 
-    def __init__(self, host_id, realTimePlot=False, subPlot=None, figure=None, interval=40):
-        super(HostStats, self).__init__(host_id)
-        self.bytessent = dict()
-        self.bytesreceived = dict()
-        self.realTimePlot = realTimePlot
-        if self.realTimePlot:
-            plt.ion()
-            self.curTime = [realtimer.time()] * 3
-            if not figure:
-                self.fig = plt.figure()
-            if not subPlot:
-                self.ax = self.fig.add_subplot(111)
-            else:
-                self.ax = self.fig.add_subplot(subPlot)
-            self.l1 = self.ax.plot([], [], label='sent')[0]
-            self.l2 = self.ax.plot([], [], label='received')[0]
-            self.xMax = 0
-            self.yMax = 0
-            self.yMin = 0
-            self.interval = interval
-            plt.legend()
-            self.ax.set_title("Bytes send and recieve rates from host " +
-                              str(self.parent_id))
-            self.ax.set_ylabel("Bytes/ms")
-            self.ax.set_xlabel("Time (ms)")
+    livePanels = [
+        ('Bytes send and recieve rates from host %s', 'Bytes/ms',
+         [('bytessent', 'rate', 'sent'),
+          ('bytesreceived', 'rate', 'received')]),
+    ]
+
+    def __init__(self, host_id, plotter=None, resolution=None):
+        super(HostStats, self).__init__(host_id, resolution, plotter)
+        self.bytessent = self._newSeries(int)
+        self.bytesreceived = self._newSeries(int)
 
     def addBytesSent(self, timestamp, bytes):
         """ Function called to aggregate data into the stats
@@ -66,27 +132,9 @@ class HostStats(Stats):
         :param timestamp: time this occurred
         :param bytes: number of bytes
         """
-        if timestamp in self.bytessent:
-            self.bytessent[timestamp] += bytes
-        else:
-            self.bytessent[timestamp] = bytes
-
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[0] + DELAY:
-                self.curTime[0] = realtimer.time()
-                time, rate = calcRate(self.bytessent, self.interval)
-
-                if len(time) > 0:
-                    self.xMax = updateMax(self.xMax, max(time), 1.5)
-                    self.yMax = updateMax(self.yMax, max(rate), 1.2)
-                    self.yMin = updateMin(self.yMin, min(rate), 1.2)
-
-                    self.ax.axis([0, self.xMax, self.yMin, self.yMax])
-                    self.l1.set_data(time, rate)
-
-                if realtimer.time() > self.curTime[-1] + DELAY:
-                    self.curTime[-1] = realtimer.time()
-                    self.fig.canvas.draw()
+        self.bytessent.add(timestamp, bytes)
+        if self.plotter is not None:
+            self.push()
 
     def addBytesRecieved(self, timestamp, bytes):
         """ Function called to aggregate data into the stats
@@ -94,30 +142,14 @@ class HostStats(Stats):
         :param timestamp: time this occurred
         :param bytes: number of bytes
         """
-        if timestamp in self.bytessent:
-            self.bytesreceived[timestamp] += bytes
-        else:
-            self.bytesreceived[timestamp] = bytes
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[1] + DELAY:
-                self.curTime[1] = realtimer.time()
-                time, rate = calcRate(self.bytesreceived, self.interval)
-
-                if len(time) > 0:
-                    self.xMax = updateMax(self.xMax, max(time), 1.5)
-                    self.yMax = updateMax(self.yMax, max(rate), 1.2)
-                    self.yMin = updateMin(self.yMin, min(rate), 1.2)
-
-                    self.ax.axis([0, self.xMax, self.yMin, self.yMax])
-                    self.l2.set_data(time, rate)
-
-                if realtimer.time() > self.curTime[-1] + DELAY:
-                    self.curTime[-1] = realtimer.time()
-                    self.fig.canvas.draw()
+        self.bytesreceived.add(timestamp, bytes)
+        if self.plotter is not None:
+            self.push()
 
     def analyze(self, interval=40):
         """ This script does a full analysis over the stats stored in a host
         """
+        import matplotlib.pyplot as plt
         plt.figure()
         plotrate(self.bytessent, interval, label="sent")
         plotrate(self.bytesreceived, interval, label="received")
@@ -135,51 +167,25 @@ class FlowStats(Stats):
     2. packet round-trip delay
     """
 
-    def __init__(self, flow_id, realTimePlot=False, figure=None, interval=40):
-        super(FlowStats, self).__init__(flow_id)
-        self.bytessent = dict()
-        self.bytesreceived = dict()
-        self.rttdelay = dict()
-        self.windowsize = dict()
-
-        self.realTimePlot = realTimePlot
-        if self.realTimePlot:
-            plt.ion()
-            self.curTime = [realtimer.time()] * 5
-            if not figure:
-                self.fig = plt.figure()
-            self.ax = [self.fig.add_subplot(4, 1, i) for i in range(4)]
-            self.l = []
-            self.l.append(self.ax[0].plot([], [], label='bytes sent')[0])
-            self.l.append(self.ax[0].plot([], [], label='bytes received')[0])
-            self.ax[0].set_title('Cumulative Bytes sent and received in flow ' +
-                                 str(self.parent_id))
-
-            self.ax[0].set_ylabel("Bytes")
-            self.ax[0].set_xlabel('Time (ms)')
-
-            self.l.append(self.ax[1].plot([], [], label='sent')[0])
-            self.l.append(self.ax[1].plot([], [], label='bytes received')[0])
-            self.ax[1].set_title('Send and receive data rates in flow ' +
-                                 str(self.parent_id))
-            self.ax[1].set_ylabel('Bytes/ms')
-
-            self.l.append(self.ax[2].plot([], [])[0])
-            self.ax[2].set_title('Rount-Trip delay in flow ' +
-                                 str(self.parent_id))
-            self.ax[2].set_ylabel('Round-Trip delay (ms)')
-
-            self.l.append(self.ax[3].plot([], [])[0])
-            self.ax[3].set_title('Window size of flow ' + str(self.parent_id))
-            self.ax[3].set_ylabel('Window size')
-
-            [self.ax[i].legend() for i in range(len(self.ax))]
-            self.xMax = [0] * len(self.ax)
-            self.yMax = [0] * len(self.ax)
-            self.yMin = [0] * len(self.ax)
-            self.interval = interval
-
-            self.fig.subplots_adjust(hspace=.5)
+    livePanels = [
+        ('Cumulative Bytes sent and received in flow %s', 'Bytes',
+         [('bytessent', 'cumsum', 'bytes sent'),
+          ('bytesreceived', 'cumsum', 'bytes received')]),
+        ('Send and receive data rates in flow %s', 'Bytes/ms',
+         [('bytessent', 'rate', 'sent'),
+          ('bytesreceived', 'rate', 'received')]),
+        ('Rount-Trip delay in flow %s', 'Round-Trip delay (ms)',
+         [('rttdelay', 'smooth', None)]),
+        ('Window size of flow %s', 'Window size',
+         [('windowsize', 'smooth', None)]),
+    ]
+
+    def __init__(self, flow_id, plotter=None, resolution=None):
+        super(FlowStats, self).__init__(flow_id, resolution, plotter)
+        self.bytessent = self._newSeries(int)
+        self.bytesreceived = self._newSeries(int)
+        self.rttdelay = self._newSeries()
+        self.windowsize = self._newSeries()
 
     def addRTT(self, timestamp, rttd):
         """ Function called to aggregate data into the stats
@@ -187,23 +193,9 @@ class FlowStats(Stats):
         :param timestamp: time this occurred
         :param bytes: number of bytes
         """
-        self.rttdelay[timestamp] = rttd
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[0] + DELAY:
-                self.curTime[0] = realtimer.time()
-                time, rate = calcSmooth(self.rttdelay, self.interval)
-
-                if len(time) > 0:
-                    self.xMax[2] = updateMax(self.xMax[2], max(time), 1.5)
-                    self.yMax[2] = updateMax(self.yMax[2], max(rate), 1.2)
-                    self.yMin[2] = updateMin(self.yMin[2], min(rate), 1.2)
-
-                    self.ax[2].axis([0, self.xMax[2], self.yMin[2], self.yMax[2]])
-                    self.l[4].set_data(time, rate)
-
-                if realtimer.time() > self.curTime[-1] + DELAY:
-                    self.curTime[-1] = realtimer.time()
-                    self.fig.canvas.draw()
+        self.rttdelay.set(timestamp, rttd)
+        if self.plotter is not None:
+            self.push()
 
     def addBytesSent(self, timestamp, bytes):
         """ Function called to aggregate data into the stats
@@ -211,34 +203,9 @@ class FlowStats(Stats):
         :param timestamp: time this occurred
         :param bytes: number of bytes
         """
-        if timestamp in self.bytessent:
-            self.bytessent[timestamp] += bytes
-        else:
-            self.bytessent[timestamp] = bytes
-
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[1] + DELAY:
-                self.curTime[1] = realtimer.time()
-                time, cumSum = calcCumsum(self.bytessent)
-                time2, rate = calcRate(self.bytessent, self.interval)
-
-                if len(time) > 0:
-                    self.xMax[0] = updateMax(self.xMax[0], max(time), 1.5)
-                    self.yMax[0] = updateMax(self.yMax[0], max(cumSum), 1.2)
-                    self.yMin[0] = updateMin(self.yMin[0], min(cumSum), 1.2)
-                    self.ax[0].axis([0, self.xMax[0], self.yMin[0], self.yMax[0]])
-                    self.l[0].set_data(time, cumSum)
-
-                if len(time2) > 0:
-                    self.xMax[1] = updateMax(self.xMax[1], max(time2), 1.5)
-                    self.yMax[1] = updateMax(self.yMax[1], max(rate), 1.2)
-                    self.yMin[1] = updateMin(self.yMin[1], min(rate), 1.2)
-                    self.ax[0].axis([0, self.xMax[0], self.yMin[0], self.yMax[0]])
-                    self.l[2].set_data(time2, rate)
-
-                if realtimer.time() > self.curTime[-1] + DELAY:
-                    self.curTime[-1] = realtimer.time()
-                    self.fig.canvas.draw()
+        self.bytessent.add(timestamp, bytes)
+        if self.plotter is not None:
+            self.push()
 
     def addBytesReceived(self, timestamp, bytes):
         """ Function called to aggregate data into the stats
@@ -246,36 +213,9 @@ class FlowStats(Stats):
         :param timestamp: time this occurred
         :param bytes: number of bytes
         """
-
-        if timestamp in self.bytesreceived:
-            self.bytesreceived[timestamp] += bytes
-
-        else:
-            self.bytesreceived[timestamp] = bytes
-
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[2] + DELAY:
-                self.curTime[2] = realtimer.time()
-                time, cumSum = calcCumsum(self.bytesreceived)
-                time2, rate = calcRate(self.bytesreceived, self.interval)
-
-                if len(time) > 0:
-                    self.xMax[0] = updateMax(self.xMax[0], max(time), 1.5)
-                    self.yMax[0] = updateMax(self.yMax[0], max(cumSum), 1.2)
-                    self.yMin[0] = updateMin(self.yMin[0], min(cumSum), 1.2)
-                    self.ax[0].axis([0, self.xMax[0], self.yMin[0], self.yMax[0]])
-                    self.l[1].set_data(time, cumSum)
-
-                if len(time2) > 0:
-                    self.xMax[1] = updateMax(self.xMax[1], max(time2), 1.5)
-                    self.yMax[1] = updateMax(self.yMax[1], max(rate), 1.2)
-                    self.yMin[1] = updateMin(self.yMin[1], min(rate), 1.2)
-                    self.ax[1].axis([0, self.xMax[1], self.yMin[1], self.yMax[1]])
-                    self.l[3].set_data(time2, rate)
-
-                if realtimer.time() > self.curTime[-1] + DELAY:
-                    self.curTime[-1] = realtimer.time()
-                    self.fig.canvas.draw()
+        self.bytesreceived.add(timestamp, bytes)
+        if self.plotter is not None:
+            self.push()
 
     def updateCurrentWindowSize(self, timestamp, cwnd):
         """ Function called to aggregate window size into stats
@@ -283,21 +223,9 @@ class FlowStats(Stats):
         :param timestamp: time this occurred
         :param cwnd: current window size
         """
-        self.windowsize[timestamp] = cwnd
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[3] + DELAY:
-                self.curTime[3] = realtimer.time()
-                time, cwnd = calcSmooth(self.windowsize, self.interval)
-                if len(time) > 0:
-                    self.xMax[3] = updateMax(self.xMax[3], max(time), 1.5)
-                    self.yMax[3] = updateMax(self.yMax[3], max(cwnd), 1.2)
-                    self.yMin[3] = updateMin(self.yMin[3], min(cwnd), 1.2)
-                    self.ax[3].axis([0, self.xMax[3], self.yMin[3], self.yMax[3]])
-                    self.l[5].set_data(time, cwnd)
-
-                    if realtimer.time() > self.curTime[-1] + DELAY:
-                        self.curTime[-1] = realtimer.time()
-                        self.fig.canvas.draw()
+        self.windowsize.set(timestamp, cwnd)
+        if self.plotter is not None:
+            self.push()
 
     def analyze(self, interval=40, sameFigure=True, step=False):
         """ This script does a full analysis over the stats stored in a flow
@@ -306,6 +234,7 @@ class FlowStats(Stats):
             Use this function as an example file to generate custom graphs,
             such as aggregating data from various links
         """
+        import matplotlib.pyplot as plt
         plt.figure()
         if sameFigure:
             rows = 3
@@ -358,6 +287,7 @@ class FlowStats(Stats):
 
     def plot(self):
         """ Plots the raw data as a scatterplot """
+        import matplotlib.pyplot as plt
         plt.figure()
         plotraw(self.bytessent)
         plt.figure()
@@ -378,127 +308,44 @@ class LinkStats(Stats):
 
     """
 
-    def __init__(self, link_id, realTimePlot=False, figure=None, interval=40):
-        super(LinkStats, self).__init__(link_id)
-        self.bufferoccupancy = dict()
-        self.lostpackets = dict()
-        self.bytesflowed = dict()
-
-        self.realTimePlot = realTimePlot
-        if self.realTimePlot:
-            plt.ion()
-            self.curTime = [realtimer.time()] * 4
-            if not figure:
-                self.fig = plt.figure()
-            else:
-                self.fig = figure
-            self.ax = [self.fig.add_subplot(4, 1, i) for i in range(4)]
-            self.l = [self.ax[i].plot([], [])[0] for i in range(4)]
-
-            self.ax[0].set_title('Byte flow rate through link ' +
-                                 str(self.parent_id))
-            self.ax[0].set_ylabel('Flow Rate (Byte/ms)')
-            self.ax[0].set_xlabel('Time (ms)')
-
-            self.ax[1].set_title('Cummulative byte flow through link ' +
-                                 str(self.parent_id))
-            self.ax[1].set_ylabel('Bytes')
-
-            self.ax[2].set_title('Packets lost in link ' +
-                                 str(self.parent_id))
-            self.ax[2].set_ylabel('Packets')
-
-            self.ax[3].set_title('Buffer occupancy in link ' +
-                                 str(self.parent_id))
-            self.ax[3].set_ylabel('Occupancy (kb)')
-
-            self.xMax = [0] * len(self.ax)
-            self.yMax = [0] * len(self.ax)
-            self.yMin = [0] * len(self.ax)
-            self.interval = interval
-
-            self.fig.subplots_adjust(hspace=.5)
+    livePanels = [
+        ('Byte flow rate through link %s', 'Flow Rate (Byte/ms)',
+         [('bytesflowed', 'rate', None)]),
+        ('Cummulative byte flow through link %s', 'Bytes',
+         [('bytesflowed', 'cumsum', None)]),
+        ('Packets lost in link %s', 'Packets',
+         [('lostpackets', 'intervalsum', None)]),
+        ('Buffer occupancy in link %s', 'Occupancy (kb)',
+         [('bufferoccupancy', 'rate', None)]),
+    ]
+
+    def __init__(self, link_id, plotter=None, resolution=None):
+        super(LinkStats, self).__init__(link_id, resolution, plotter)
+        self.bufferoccupancy = self._newSeries(int)
+        self.lostpackets = self._newSeries(int)
+        self.bytesflowed = self._newSeries(int)
 
     def addLostPackets(self, timestamp, nlost):
         """ Record packets that were dropped """
-        if timestamp in self.lostpackets:
-            self.lostpackets[timestamp] += nlost
-        else:
-            self.lostpackets[timestamp] = nlost
-
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[0] + DELAY:
-                self.curTime[0] = realtimer.time()
-
-                time, packets = calcIntervalsum(self.lostpackets, self.interval)
-                if len(time) > 0:
-
-                    self.xMax[2] = updateMax(self.xMax[2], max(time), 1.5)
-                    self.yMax[2] = updateMax(self.yMax[2], max(packets), 1.2)
-                    self.yMin[2] = updateMin(self.yMin[2], min(packets), 1.2)
-                    self.ax[2].axis([0, self.xMax[2], self.yMin[2], self.yMax[2 \
-                        ]])
-                    self.l[2].set_data(time, packets)
-                    if realtimer.time() > self.curTime[-1] + DELAY:
-                        self.curTime[-1] = realtimer.time()
-                        self.fig.canvas.draw()
+        self.lostpackets.add(timestamp, nlost)
+        if self.plotter is not None:
+            self.push()
 
     def addBytesFlowed(self, timestamp, bytes):
         """ Record bytes transmitted """
-        if timestamp in self.bytesflowed:
-            self.bytesflowed[timestamp] += bytes
-        else:
-            self.bytesflowed[timestamp] = bytes
-
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[1] + DELAY:
-                self.curTime[1] = realtimer.time()
-
-                time, rate = calcRate(self.bytesflowed, self.interval)
-                time2, cumSum = calcCumsum(self.bytesflowed)
-
-                if len(time) > 0:
-                    self.xMax[0] = updateMax(self.xMax[0], max(time), 1.5)
-                    self.yMax[0] = updateMax(self.yMax[0], max(rate), 1.2)
-                    self.yMin[0] = updateMin(self.yMin[0], min(rate), 1.2)
-                    self.ax[0].axis([0, self.xMax[0], self.yMin[0], self.yMax[0 \
-                        ]])
-                    self.l[0].set_data(time, rate)
-                if len(time2) > 0:
-                    self.xMax[1] = updateMax(self.xMax[1], max(time2), 1.5)
-                    self.yMax[1] = updateMax(self.yMax[1], max(cumSum), 1.2)
-                    self.yMin[1] = updateMin(self.yMin[1], min(cumSum), 1.2)
-                    self.ax[1].axis([0, self.xMax[1], self.yMin[1], self.yMax[1 \
-                        ]])
-                    self.l[1].set_data(time2, cumSum)
-
-                if realtimer.time() > self.curTime[-1] + DELAY:
-                    self.curTime[-1] = realtimer.time()
-                    self.fig.canvas.draw()
+        self.bytesflowed.add(timestamp, bytes)
+        if self.plotter is not None:
+            self.push()
 
     def updateBufferOccupancy(self, timestamp, buffersize):
         """ Record buffer occupancy """
-        self.bufferoccupancy[timestamp] = buffersize
-
-        if self.realTimePlot:
-            if realtimer.time() > self.curTime[2] + DELAY:
-                self.curTime[2] = realtimer.time()
-
-                time, occupancy = calcRate(self.bufferoccupancy, self.interval)
-
-                if len(time) > 0:
-                    self.xMax[3] = updateMax(self.xMax[3], max(time), 1.5)
-                    self.yMax[3] = updateMax(self.yMax[3], max(occupancy), 1.2)
-                    self.yMin[3] = updateMin(self.yMin[3], min(occupancy), 1.2)
-                    self.ax[3].axis([0, self.xMax[3], self.yMin[3], self.yMax[3 \
-                        ]])
-                    self.l[3].set_data(time, occupancy)
-                    if realtimer.time() > self.curTime[-1] + DELAY:
-                        self.curTime[-1] = realtimer.time()
-                        self.fig.canvas.draw()
+        self.bufferoccupancy.set(timestamp, buffersize)
+        if self.plotter is not None:
+            self.push()
 
     def analyze(self, interval=40, sameFigure=True, step=False):
         """ Analyze and display plots """
+        import matplotlib.pyplot as plt
         plt.figure()
         if sameFigure:
             plt.subplot(4, 1, 1)
@@ -543,35 +390,95 @@ class LinkStats(Stats):
 """ Helper Functions """
 
 
+def _series(datadict):
+    """ Times and values of data in time order
+
+    A BinnedSeries gives the end and the sum of each of its intervals.
+
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
+    :return times, values: numpy arrays
+    """
+    if isinstance(datadict, TimeSeries):
+        return datadict.times, datadict.values
+    if isinstance(datadict, BinnedSeries):
+        return datadict.times, datadict.sums
+    times = np.fromiter(datadict.iterkeys(), float, len(datadict))
+    values = np.array(datadict.values())
+    order = np.argsort(times)
+    return times[order], values[order]
+
+
+def _bins(datadict, resolution):
+    """ Assigns time-value pairs to time intervals
+
+    Interval k ends at the k-th sum of resolution (the same running sum the
+    plots use for their time axis), and interval 0 holds all times before 0.
+    The interval of the last data point is still incomplete, so only the
+    intervals before it are returned.
+
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
+    :param resolution: interval in milliseconds to aggregate over
+    :return edges, bins, values: end times of the complete intervals, and
+        the interval index and value of every data point in time order
+    """
+    times, values = _series(datadict)
+    if not len(times):
+        return np.zeros(0, np.array(resolution).dtype), \
+            np.zeros(0, int), values
+
+    last = times[-1]
+    edges = np.empty(max(int(last // resolution) + 2, 1),
+                     np.array(resolution).dtype)
+    edges[0] = 0
+    edges[1:] = resolution
+    np.cumsum(edges, out=edges)
+    while edges[-1] <= last:  # rounding of the running sum
+        edges = np.append(edges, edges[-1] + resolution)
+
+    bins = np.searchsorted(edges, times, 'right')
+    return edges[:bins[-1]], bins, values
+
+
+def _intervals(series, resolution):
+    """ Complete intervals of a BinnedSeries at a resolution
+
+    :param series: BinnedSeries
+    :param resolution: a multiple of the resolution of series
+    :return times, sums, counts, maxes: arrays with one entry per interval,
+        leaving out the unfinished interval of the last record
+    """
+    times, sums, counts, maxes, _ = series.rebin(resolution)
+    n = max(len(times) - 1, 0)
+    return times[:n], sums[:n], counts[:n], maxes[:n]
+
+
+def _sums(bins, values, n):
+    """ Sums of values in each of the first n intervals, in the order of
+    values, keeping integer values integers
+    """
+    sums = np.bincount(bins, values, n + 1)[:n]
+    if values.dtype.kind in 'iu':
+        sums = sums.astype(values.dtype)
+    return sums
+
+
 def calcRate(datadict, resolution):
     """ Calculates the rate of data value averaged over a time interval
 
     Creates a dicrete time interval and averages all values within interval
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param resolution: interval in milliseconds to aggregate over
     """
-
-    sortedtimes = sorted(datadict.keys())
-    sorteddata = [datadict[key] for key in sortedtimes]
-    assert (len(sortedtimes) == len(sorteddata))
-    time = 0
-    datatotal = 0
-    times = []
-    rates = []
-
-    for i in range(len(sortedtimes)):
-        while (True):
-            if sortedtimes[i] < time:
-                datatotal += sorteddata[i]
-                break
-            else:
-                times.append(time)
-                rates.append(datatotal / float(resolution))
-                datatotal = 0
-                time += resolution
-
-    return times, rates
+    if isinstance(datadict, BinnedSeries):
+        times, sums, _, _ = _intervals(datadict, resolution)
+        return times, sums / float(resolution)
+    times, bins, values = _bins(datadict, resolution)
+    rates = np.bincount(bins, values, len(times) + 1)[:len(times)]
+    return times, rates / float(resolution)
 
 
 def calcSmooth(datadict, resolution):
@@ -579,34 +486,25 @@ def calcSmooth(datadict, resolution):
 
     Creates dicrete timeintervals and averages all values within
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param resolution: interval in milliseconds to aggregate over
     :return time, rates: time and rates lists for plotting
     """
-    sortedtimes = sorted(datadict.keys())
-    sorteddata = [datadict[key] for key in sortedtimes]
-    assert (len(sortedtimes) == len(sorteddata))
-    time = 0
-    datatotal = 0
-    times = []
-    rates = []
-    count = 0
-    for i in range(len(sortedtimes)):
-        while (True):
-            if sortedtimes[i] < time:
-                datatotal += sorteddata[i]
-                count += 1
-                break
-            elif count > 0:
-                times.append(time)
-                rates.append(datatotal / count)
-                datatotal = 0
-                time += resolution
-                count = 0
-            else:
-                time += resolution
-
-    return times, rates
+    if isinstance(datadict, BinnedSeries):
+        times, sums, counts, _ = _intervals(datadict, resolution)
+    else:
+        times, bins, values = _bins(datadict, resolution)
+        counts = np.bincount(bins, minlength=len(times) + 1)[:len(times)]
+        sums = _sums(bins, values, len(times))
+
+    # Intervals without data are left out
+    nonempty = counts > 0
+    if sums.dtype.kind in 'iu':
+        rates = sums[nonempty] // counts[nonempty]
+    else:
+        rates = sums[nonempty] / counts[nonempty]
+    return times[nonempty], rates
 
 
 def calcIntervalsum(datadict, resolution):
@@ -614,41 +512,28 @@ def calcIntervalsum(datadict, resolution):
 
     Creates discrete time interval sums of all values
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param resolution: interval in milliseconds to aggregate over
     """
-    sortedtimes = sorted(datadict.keys())
-    sorteddata = [datadict[key] for key in sortedtimes]
-    assert (len(sortedtimes) == len(sorteddata))
-    time = 0
-    datatotal = 0
-    times = []
-    rates = []
-    for i in range(len(sortedtimes)):
-        while (True):
-            if sortedtimes[i] < time:
-                datatotal += sorteddata[i]
-                break
-            else:
-                times.append(time)
-                rates.append(datatotal)
-                datatotal = 0
-                time += resolution
-
-    return times, rates
+    if isinstance(datadict, BinnedSeries):
+        times, sums, _, _ = _intervals(datadict, resolution)
+        return times, sums
+    times, bins, values = _bins(datadict, resolution)
+    return times, _sums(bins, values, len(times))
 
 
 def calcCumsum(datadict):
     """ Calculates the cumulative sum 
 
-    :param datadict: dictionary of time-value pairs
-    """
-    sortedtimes = sorted(datadict.keys())
-    sorteddata = [datadict[key] for key in sortedtimes]
-    assert (len(sortedtimes) == len(sorteddata))
-    cumsum = np.cumsum(sorteddata)
+    For a BinnedSeries, this is the cumulative sum at the end of each
+    interval.
 
-    return sortedtimes, cumsum
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
+    """
+    sortedtimes, sorteddata = _series(datadict)
+    return sortedtimes, np.cumsum(sorteddata)
 
 
 def calcMax(datadict, resolution):
@@ -656,27 +541,25 @@ def calcMax(datadict, resolution):
 
     Creates discrete time interval sums of all values
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param resolution: interval in milliseconds to aggregate over
     """
-    sortedtimes = sorted(datadict.keys())
-    sorteddata = [datadict[key] for key in sortedtimes]
-    assert (len(sortedtimes) == len(sorteddata))
-    time = 0
-    currmax = 0
-    times = []
-    maxes = []
-    for i in range(len(sortedtimes)):
-        while (True):
-            if sortedtimes[i] < time:
-                currmax = max(currmax, sorteddata[i])
-                break
-            else:
-                times.append(time)
-                maxes.append(currmax)
-                currmax = 0
-                time += resolution
-
+    if isinstance(datadict, BinnedSeries):
+        times, _, _, maxes = _intervals(datadict, resolution)
+        return times, np.maximum(maxes, 0)
+    times, bins, values = _bins(datadict, resolution)
+    complete = bins < len(times)
+    bins = bins[complete]
+    values = values[complete]
+
+    # Empty intervals, and intervals with only negative values, are 0
+    maxes = np.zeros(len(times), values.dtype)
+    if len(bins):
+        starts = np.flatnonzero(np.diff(bins)) + 1
+        starts = np.concatenate(([0], starts))
+        maxes[bins[starts]] = np.maximum.reduceat(values, starts)
+    np.maximum(maxes, 0, out=maxes)
     return times, maxes
 
 
@@ -686,10 +569,12 @@ def plotrate(datadict, resolution, xlabel=True, step=False, **kwargs):
     This works by creating discrete time interval and averaging all values
     within said interval
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param resolution: interval in millisecond to aggregate over
     :param kwargs: dictionary, or keyword arguments to be passed to pyplot
     """
+    import matplotlib.pyplot as plt
 
     times, rates = calcRate(datadict, resolution)
 
@@ -711,10 +596,12 @@ def plotsmooth(datadict, resolution, xlabel=True, step=False, **kwargs):
     This works by creating discrete time interval and averaging all values
     within said interval
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param resolution: interval in millisecond to aggregate over
     :param kwargs: dictionary, or keyword arguments to be passed to pyplot
     """
+    import matplotlib.pyplot as plt
     times, rates = calcSmooth(datadict, resolution)
 
     if step:
@@ -735,10 +622,12 @@ def plotintervalsum(datadict, resolution, xlabel=True, step=False, **kwargs):
     This works by creating discrete time interval and summing all values
     within said interval
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param resolution: interval in millisecond to aggregate over
     :param kwargs: dictionary, or keyword arguments to be passed to pyplot
     """
+    import matplotlib.pyplot as plt
     times, rates = calcIntervalsum(datadict, resolution)
 
     if step:
@@ -756,9 +645,11 @@ def plotintervalsum(datadict, resolution, xlabel=True, step=False, **kwargs):
 def plotcumsum(datadict, xlabel=True, step=False, **kwargs):
     """ Plots a cumulative sum
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param kwargs: dictionary, or keyword arguments to be passed to pyplot
     """
+    import matplotlib.pyplot as plt
 
     sortedtimes, cumsum = calcCumsum(datadict)
 
@@ -780,10 +671,12 @@ def plotmaxes(datadict, resolution, xlabel=True, step=False, **kwargs):
     This works by creating discrete time interval and taking the max of
     all values within said interval
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param resolution: interval in millisecond to aggregate over
     :param kwargs: dictionary, or keyword arguments to be passed to pyplot
     """
+    import matplotlib.pyplot as plt
     times, maxes = calcMax(datadict, resolution)
 
     if step:
@@ -801,10 +694,15 @@ def plotmaxes(datadict, resolution, xlabel=True, step=False, **kwargs):
 def plotraw(datadict, xlabel=True, **kwargs):
     """ Plots the raw data
 
-    :param datadict: dictionary of time-value pairs
+    :param datadict: TimeSeries, BinnedSeries, or dictionary of time-value
+        pairs
     :param kwargs: dictionary, or keyword arguments to be passed to pyplot
     """
-    plt.scatter(datadict.keys(), datadict.values())
+    import matplotlib.pyplot as plt
+    if isinstance(datadict, BinnedSeries):
+        plt.scatter(datadict.times, datadict.lasts)
+    else:
+        plt.scatter(*_series(datadict))
     if xlabel:
         plt.xlabel("Time (ms)")
     zeroxaxis()
@@ -815,6 +713,7 @@ def plotraw(datadict, xlabel=True, **kwargs):
 def zeroxaxis():
     """ Sets the left hand side of the axis to 0
     """
+    import matplotlib.pyplot as plt
     cumaxis = list(plt.axis())
     cumaxis[0] = 0
     plt.axis(cumaxis)
@@ -823,6 +722,7 @@ def zeroxaxis():
 def zeroyaxis():
     """ Sets the left hand side of the axis to 0
     """
+    import matplotlib.pyplot as plt
     cumaxis = list(plt.axis())
     cumaxis[2] = 0
     plt.axis(cumaxis)
@@ -863,6 +763,7 @@ def updateMin(curMin, newMin, ratio=1.2, threshold=.9):
 def movingaverage(datadict, ylabel="Bytes/ms",
                   title="Data rate using moving average"):
     """ NOT REALLY WORKING DO NOT USE """
+    import matplotlib.pyplot as plt
     x = sorted(datadict.keys())
     dx = np.diff(x)
     y = [datadict[key] for key in x]
@@ -880,6 +781,8 @@ def finitedifference(datadict, ylabel="Bytes/ms",
         :param title: (optional) graph title
 
     """
+    import matplotlib.pyplot as plt
+    from scipy import ndimage
     x = sorted(datadict.keys())
     # Apply weighted convolutional filter to smooth
     y = np.cumsum([datadict[key] for key in x])
@@ -0,0 +1,221 @@
+"""
+icfire.summary
+~~~~~~~~~~~~~~
+
+Summary metrics of a run, computed from the recorded stats with numpy
+reductions and without plotting, so they can be used on machines without a
+display, e.g. by sweeps.
+
+    >>> summary = network.summary(handler.time)
+    >>> summary.flows['F1']['goodput']
+    >>> summary.save('summary.json')
+    >>> summary.saveCsv('summary.csv')
+
+For each flow: bytes sent, received and delivered in order, throughput and
+goodput (bytes/ms, over the time the flow was active), start and completion
+times, and the mean and percentiles of its RTT. For each link: bytes flowed,
+utilization of its capacity, packets lost and peak buffer occupancy. For the
+whole network: Jain's fairness index of the flow goodputs.
+
+Stats that were binned (see icfire.timeseries.BinnedSeries) give the same
+totals, means and peaks, but RTT percentiles are then taken over the mean RTT
+of each interval, weighted by the number of samples in it.
+
+"""
+
+import csv
+import json
+
+import numpy as np
+
+import icfire.simtimer as simtimer
+from icfire.timeseries import BinnedSeries
+
+PERCENTILES = (50, 90, 99)
+
+FLOW_COLUMNS = ('start', 'completedAt', 'completionTime', 'sent', 'received',
+                'delivered', 'throughput', 'goodput', 'rtt')
+LINK_COLUMNS = ('flowed', 'utilization', 'lost', 'peakBuffer')
+
+
+class Summary(object):
+    """ Summary metrics of the flows and links of a Network """
+
+    def __init__(self, network, time=None, percentiles=PERCENTILES):
+        """ Compute the metrics
+
+        :param network: network.Network that was run
+        :param time: [optional] time (ms) the run ended at. Defaults to the
+            current simulation time.
+        :param percentiles: RTT percentiles to compute
+        """
+        if time is None:
+            time = simtimer.simtime
+        self.time = time
+        self.percentiles = percentiles
+        self.flows = dict((flowId, self._flow(network, f))
+                          for flowId, f in network.flows.iteritems())
+        self.links = dict((linkId, self._link(l))
+                          for linkId, l in network.links.iteritems())
+        self.fairness = jainIndex([m['goodput'] for m in
+                                   self.flows.itervalues()
+                                   if m['goodput'] is not None])
+
+    def _flow(self, network, f):
+        stats = f.stats
+        start = f.startedAt
+        end = f.completedAt if f.completedAt is not None else self.time
+        duration = end - start if start is not None else 0
+
+        sent = int(stats.bytessent.total())
+        received = int(stats.bytesreceived.total())
+        if f.bytes and f.completedAt is not None:
+            delivered = f.bytes
+        else:
+            # Data packets are 1024 bytes, and the recipient acknowledges
+            # the next index it expects
+            recipient = network.nodes[f.dest_id].flowrecipients.get(f.flowId)
+            delivered = recipient.lastAck * 1024 if recipient else 0
+            if f.bytes:
+                delivered = min(delivered, f.bytes)
+
+        metrics = {
+            'start': start,
+            'completedAt': f.completedAt,
+            'completionTime': f.completedAt - start
+            if f.completedAt is not None and start is not None else None,
+            'sent': sent,
+            'received': received,
+            'delivered': delivered,
+            'throughput': received / float(duration) if duration > 0
+            else None,
+            'goodput': delivered / float(duration) if duration > 0
+            else None,
+        }
+
+        rtts = stats.rttdelay
+        metrics['rtt'] = float(rtts.mean()) if _count(rtts) else None
+        for q, value in zip(self.percentiles,
+                            percentiles(rtts, self.percentiles)):
+            metrics['rttP%d' % q] = value
+        return metrics
+
+    def _link(self, l):
+        flowed = int(l.stats.bytesflowed.total())
+        capacity = l.rate * 16384 / 125.  # bytes/ms, as Link converts
+        occupancy = l.stats.bufferoccupancy
+        if not len(occupancy):
+            peak = 0
+        elif isinstance(occupancy, BinnedSeries):
+            peak = int(occupancy.maxes.max())
+        else:
+            peak = int(occupancy.values.max())
+        return {
+            'flowed': flowed,
+            'utilization': flowed / (capacity * self.time)
+            if self.time > 0 else None,
+            'lost': int(l.stats.lostpackets.total()),
+            'peakBuffer': peak,
+        }
+
+    def flat(self):
+        """ Metrics as one flat dict, e.g. for a row of a sweep
+
+        :return: dict of 'id.metric' -> value, plus time and fairness
+        """
+        metrics = {'time': self.time, 'fairness': self.fairness}
+        for table in (self.flows, self.links):
+            for key, values in table.iteritems():
+                for name, value in values.iteritems():
+                    metrics['%s.%s' % (key, name)] = value
+        return metrics
+
+    def toDict(self):
+        """ Summary as a dict
+
+        :return: dict with time, fairness and per flow and per link dicts
+        """
+        return {
+            'time': self.time,
+            'fairness': self.fairness,
+            'flows': self.flows,
+            'links': self.links,
+        }
+
+    def save(self, filename):
+        """ Write the summary as json
+
+        :param filename: file to write to
+        """
+        with open(filename, 'w') as f:
+            json.dump(self.toDict(), f, indent=2, sort_keys=True)
+
+    def rows(self):
+        """ One row per flow and per link, for tables
+
+        :return: list of dicts, with the kind and id of the object
+        """
+        rows = []
+        for kind, table in (('flow', self.flows), ('link', self.links)):
+            for key in sorted(table):
+                row = {'kind': kind, 'id': key}
+                row.update(table[key])
+                rows.append(row)
+        return rows
+
+    def saveCsv(self, filename):
+        """ Write the rows of the summary as csv
+
+        :param filename: file to write to
+        """
+        with open(filename, 'wb') as f:
+            writer = csv.DictWriter(f, ('kind', 'id') + FLOW_COLUMNS +
+                                    tuple('rttP%d' % q
+                                          for q in self.percentiles) +
+                                    LINK_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows())
+
+
+def _count(series):
+    """ Number of records in a series """
+    if isinstance(series, BinnedSeries):
+        return series.counts.sum()
+    return len(series)
+
+
+def percentiles(series, qs):
+    """ Percentiles of the values of a series
+
+    :param series: TimeSeries or BinnedSeries
+    :param qs: percentiles to compute, between 0 and 100
+    :return: list of floats, or of None if the series is empty
+    """
+    if not _count(series):
+        return [None] * len(qs)
+    if not isinstance(series, BinnedSeries):
+        return [float(v) for v in np.percentile(series.values, qs)]
+
+    # Mean of each interval, weighted by its number of records
+    counts = series.counts
+    full = counts > 0
+    means = series.sums[full] / counts[full].astype(float)
+    weights = counts[full]
+    order = np.argsort(means, kind='mergesort')
+    cumulative = np.cumsum(weights[order])
+    ranks = np.asarray(qs, float) / 100 * cumulative[-1]
+    index = np.minimum(np.searchsorted(cumulative, ranks, 'left'),
+                       len(order) - 1)
+    return [float(v) for v in means[order][index]]
+
+
+def jainIndex(values):
+    """ Jain's fairness index, 1 if all values are equal
+
+    :param values: list of non negative values, e.g. flow goodputs
+    :return: float between 1/n and 1, or None if there are no values
+    """
+    values = np.asarray(values, float)
+    if not len(values) or not values.any():
+        return None
+    return float(values.sum() ** 2 / (len(values) * (values ** 2).sum()))
@@ -0,0 +1,256 @@
+"""
+icfire.sweep
+~~~~~~~~~~~~
+
+Parameter sweeps. A sweep runs the same network description many times with
+different parameters, one run per point of a grid, on a pool of processes,
+and collects summary metrics of every run into a table.
+
+Grid keys name the parameter to vary, optionally prefixed by the id of the
+flow, link or router it applies to. Without a prefix the parameter is set on
+every flow, link or router that has it:
+
+    >>> points = expandGrid({'flowType': ['TCPRenoFlow', 'FastTCPFlow'],
+    ...                      'buffsize': [32, 64, 128],
+    ...                      'L1.rate': [10, 20]})
+    >>> rows = sweep(data, points)
+
+Link and router parameters are the keys of the json files. Flow parameters
+are the json keys and the Flow attributes listed in FLOW_PARAMS, e.g. alpha
+and gamma of FastTCPFlow.
+
+No plots are opened by the runs. Worker processes do not log; runs in this
+process (processes=1) log as the caller configured icfire.logger.
+
+"""
+
+import copy
+import itertools
+import multiprocessing
+
+import icfire.event as event
+import icfire.logger as logger
+import icfire.simtimer as simtimer
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+
+FLOW_KEYS = ('source_id', 'dest_id', 'bytes', 'timestamp', 'flowType')
+LINK_KEYS = ('source_id', 'target_id', 'rate', 'delay', 'buffsize',
+             'analytic')
+ROUTER_KEYS = ('init_time', 'static_routing', 'cut_through',
+               'adaptive_routing')
+
+# Flow attributes that can be set through the "params" of a flow, by type
+FLOW_PARAMS = {
+    'FastTCPFlow': ('alpha', 'gamma'),
+}
+
+
+def expandGrid(grid):
+    """ All combinations of the values in a parameter grid
+
+    :param grid: dict of parameter -> list of values
+    :return: list of dicts of parameter -> value, one for each point
+    """
+    keys = sorted(grid)
+    return [dict(zip(keys, values))
+            for values in itertools.product(*[grid[k] for k in keys])]
+
+
+def applyParams(data, params):
+    """ Copy of a network description with parameters applied
+
+    :param data: dict in the format of the json files
+    :param params: dict of parameter -> value
+    :return: new dict
+    """
+    data = copy.deepcopy(data)
+
+    # Flow types first, since they decide which Flow parameters apply, and
+    # those of single flows after the one for all flows
+    for key, value in sorted(params.iteritems(), key=_order):
+        target, _, name = key.rpartition('.')
+        found = False
+        for obj in data['flows']:
+            if target in ('', obj['name']):
+                if name in FLOW_KEYS:
+                    obj[name] = value
+                    found = True
+                elif _isFlowParam(name):
+                    # Flow parameters only apply to some flow types, so a
+                    # sweep over flow types can leave them unused on some
+                    # points. checkParams makes sure some point uses them.
+                    found = True
+                    if name in FLOW_PARAMS.get(obj['flowType'], ()):
+                        obj.setdefault('params', dict())[name] = value
+        for kind, keys in (('links', LINK_KEYS), ('routers', ROUTER_KEYS)):
+            if name in keys:
+                for obj in data[kind]:
+                    if target in ('', obj['id']):
+                        obj[name] = value
+                        found = True
+        if not found:
+            raise ValueError('Parameter %s does not match anything' % key)
+    return data
+
+
+def checkParams(data, points):
+    """ Check that every Flow parameter of a sweep applies to some flow
+
+    applyParams accepts Flow parameters on flows whose type does not take
+    them, e.g. alpha on a TCPRenoFlow, since a sweep over flow types only
+    uses them on some points. Without any such point, every value of the
+    parameter would give the same runs.
+
+    :param data: dict in the format of the json files
+    :param points: list of dicts of parameter -> value
+    :raise ValueError: if a Flow parameter is not used by any point
+    """
+    unused = set(key for params in points for key in params
+                 if _isFlowParam(key.rpartition('.')[2]))
+    for params in points:
+        types = _flowTypes(data, params)
+        for key in list(unused):
+            target, _, name = key.rpartition('.')
+            if key in params and any(
+                    name in FLOW_PARAMS.get(flowType, ())
+                    for flowId, flowType in types.iteritems()
+                    if target in ('', flowId)):
+                unused.remove(key)
+    if unused:
+        raise ValueError('Parameter %s does not apply to the flow type of '
+                         'any flow it targets' % sorted(unused)[0])
+
+
+def _isFlowParam(name):
+    """ Whether name is a Flow attribute set through "params" """
+    return any(name in p for p in FLOW_PARAMS.itervalues())
+
+
+def _order(item):
+    """ Order to apply parameters in, see applyParams """
+    target, _, name = item[0].rpartition('.')
+    return name != 'flowType', target != ''
+
+
+def _flowTypes(data, params):
+    """ Types of the flows of a network description with params applied
+
+    :return: dict of flow name -> flow type
+    """
+    types = dict((f['name'], f['flowType']) for f in data['flows'])
+    for key, value in sorted(params.iteritems(), key=_order):
+        target, _, name = key.rpartition('.')
+        if name == 'flowType':
+            for flowId in types:
+                if target in ('', flowId):
+                    types[flowId] = value
+    return types
+
+
+def summarize(network, handler):
+    """ Summary metrics of a finished run
+
+    :param network: network.Network that was run
+    :param handler: EventHandler that ran it
+    :return: dict of metric -> value, see icfire.summary
+    """
+    metrics = network.summary(handler.time).flat()
+    metrics['completed'] = handler.completed()
+    return metrics
+
+
+def runPoint(data, params, steps=0, until=None):
+    """ Load and run one point of a sweep
+
+    :param data: dict in the format of the json files
+    :param params: dict of parameter -> value
+    :param steps: maximum number of steps, 0 to run until completion
+    :param until: [optional] simulation time (ms) to stop at
+    :return: dict of parameters and summary metrics
+    """
+    # Start each run from the same global state, whichever process runs it
+    event.globalid = 0
+    simtimer.simtime = -9999999
+
+    network = Network()
+    network.loadDict(applyParams(data, params))
+    handler = EventHandler(network)
+    handler.run(steps, until)
+
+    row = dict(params)
+    row.update(summarize(network, handler))
+    return row
+
+
+def _runPoint(args):
+    return runPoint(*args)
+
+
+def _initWorker():
+    """ Pool initializer, drop the logger state inherited from the parent """
+    logger.disableInChild()
+
+
+def sweep(data, points, steps=0, processes=None, until=None):
+    """ Run every point of a sweep
+
+    :param data: dict in the format of the json files
+    :param points: list of dicts of parameter -> value, see expandGrid
+    :param steps: maximum number of steps per run, 0 to run until completion
+    :param processes: number of processes. Defaults to the number of CPUs,
+        1 runs everything in this process.
+    :param until: [optional] simulation time (ms) to stop each run at
+    :return: list of rows, one for each point, in the order of points
+    :raise ValueError: if a Flow parameter does not apply to any flow,
+        see checkParams
+    """
+    checkParams(data, points)
+    tasks = [(data, params, steps, until) for params in points]
+    if processes == 1:
+        return map(_runPoint, tasks)
+
+    # Anything buffered now would otherwise be written by every worker
+    logger.flushBeforeFork()
+
+    pool = multiprocessing.Pool(processes, _initWorker)
+    try:
+        return pool.map(_runPoint, tasks, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def columns(rows, first=()):
+    """ Column names of a table of rows
+
+    :param rows: list of dicts
+    :param first: columns to put first, e.g. the swept parameters
+    :return: list of column names
+    """
+    names = set()
+    for row in rows:
+        names.update(row)
+    return list(first) + sorted(names.difference(first))
+
+
+def formatTable(rows, first=()):
+    """ Format rows as a plain text table
+
+    :param rows: list of dicts
+    :param first: columns to put first
+    :return: string
+    """
+    names = columns(rows, first)
+    cells = [names] + [[_format(row.get(n)) for n in names] for row in rows]
+    widths = [max(len(r[i]) for r in cells) for i in xrange(len(names))]
+    return '\n'.join('  '.join(c.rjust(w) for c, w in zip(r, widths))
+                     for r in cells)
+
+
+def _format(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return '%.4g' % value
+    return str(value)
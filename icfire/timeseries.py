@@ -0,0 +1,412 @@
+"""
+icfire.timeseries
+~~~~~~~~~~~~~~~~~
+
+Append-only time series for statistics. Simulation time never goes back, so
+records arrive in time order and a series can be kept in two growable numpy
+arrays, one of times and one of values, that are always sorted. Reading a
+series returns views of these arrays, without copying or sorting.
+
+    >>> series = TimeSeries(int)
+    >>> series.add(1.5, 1024)
+    >>> series.add(1.5, 64)      # same time, added to the last record
+    >>> series.add(2.0, 1024)
+    >>> series.times, series.values
+    (array([1.5, 2. ]), array([1088, 1024]))
+
+For long simulations, a BinnedSeries keeps only the sum, count, maximum and
+last value of the records in each interval of a fixed resolution, so its
+memory grows with the simulated time instead of the number of records.
+
+    >>> series = BinnedSeries(40, int)
+    >>> series.add(1.5, 1024)
+    >>> series.add(41.0, 64)
+    >>> series.times, series.sums, series.counts
+    (array([ 0, 40, 80]), array([   0, 1024,   64]), array([0, 1, 1]))
+
+Interval k ends at k * resolution, and interval 0 holds records before 0.
+
+"""
+
+import numpy as np
+
+
+class TimeSeries(object):
+    """ Series of (time, value) records in time order """
+
+    def __init__(self, dtype=float, capacity=64):
+        """ Constructor for a TimeSeries
+
+        :param dtype: numpy type of the values, e.g. int for byte counts
+        :param capacity: number of records to allocate space for at first
+        """
+        self._times = np.empty(capacity)
+        self._values = np.empty(capacity, dtype)
+        self._n = 0
+        self._last = float('-inf')  # time of the last record
+
+    @property
+    def dtype(self):
+        """ numpy type of the values """
+        return self._values.dtype
+
+    @property
+    def times(self):
+        """ Times of the records, as a read only array """
+        return self._view(self._times)
+
+    @property
+    def values(self):
+        """ Values of the records, as a read only array """
+        return self._view(self._values)
+
+    def _view(self, buf):
+        view = buf[:self._n]
+        view.flags.writeable = False
+        return view
+
+    def add(self, timestamp, value):
+        """ Add a value, to the last one if it has the same time
+
+        :param timestamp: time of the record, no earlier than the last one
+        :param value: value to add
+        """
+        if timestamp == self._last:
+            self._values[self._n - 1] += value
+        else:
+            self._append(timestamp, value)
+
+    def set(self, timestamp, value):
+        """ Record a value, replacing the last one if it has the same time
+
+        :param timestamp: time of the record, no earlier than the last one
+        :param value: value to record
+        """
+        if timestamp == self._last:
+            self._values[self._n - 1] = value
+        else:
+            self._append(timestamp, value)
+
+    def _append(self, timestamp, value):
+        if timestamp < self._last:
+            raise ValueError('Record at %s is before the last one at %s' %
+                             (timestamp, self._last))
+        n = self._n
+        if n == len(self._times):
+            # Views handed out keep the old arrays alive, so growing never
+            # changes them
+            self._times = np.resize(self._times, 2 * n or 1)
+            self._values = np.resize(self._values, 2 * n or 1)
+        self._times[n] = timestamp
+        self._values[n] = value
+        self._n = n + 1
+        self._last = timestamp
+
+    def extend(self, times, values):
+        """ Append records, e.g. ones sent from another series
+
+        If the first record has the time of the last one, it replaces it.
+
+        :param times: array of times, in order, no earlier than the last one
+        :param values: array of values
+        """
+        if len(times) and times[0] == self._last:
+            self._values[self._n - 1] = values[0]
+            times, values = times[1:], values[1:]
+        if not len(times):
+            return
+        if times[0] < self._last:
+            raise ValueError('Record at %s is before the last one at %s' %
+                             (times[0], self._last))
+        n, end = self._n, self._n + len(times)
+        if end > len(self._times):
+            size = max(2 * len(self._times), end)
+            self._times = np.resize(self._times, size)
+            self._values = np.resize(self._values, size)
+        self._times[n:end] = times
+        self._values[n:end] = values
+        self._n = end
+        self._last = times[-1]
+
+    def merge(self, other):
+        """ Add the records of another series to this one
+
+        Values of records with the same time are added together.
+
+        :param other: TimeSeries
+        """
+        times = np.concatenate((self.times, other.times))
+        values = np.concatenate((self.values, other.values))
+        order = np.argsort(times, kind='mergesort')
+        times = times[order]
+        values = values[order]
+        if len(times):
+            starts = np.flatnonzero(np.concatenate(
+                ([True], times[1:] != times[:-1])))
+            times = times[starts]
+            values = np.add.reduceat(values, starts)
+            self._last = times[-1]
+        self._times = times
+        self._values = values.astype(self._values.dtype)
+        self._n = len(times)
+
+    def total(self):
+        """ Sum of the values """
+        return self.values.sum()
+
+    def mean(self):
+        """ Mean of the values """
+        return self.values.mean()
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        """ Iterates over (time, value) pairs """
+        return iter(zip(self.times.tolist(), self.values.tolist()))
+
+    def __eq__(self, other):
+        return isinstance(other, TimeSeries) and \
+            np.array_equal(self.times, other.times) and \
+            np.array_equal(self.values, other.values)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'TimeSeries(%d records)' % self._n
+
+    def __getstate__(self):
+        # Leave out the unused space at the end
+        state = dict(self.__dict__)
+        state['_times'] = self.times.copy()
+        state['_values'] = self.values.copy()
+        return state
+
+
+class BinnedSeries(object):
+    """ Series of records aggregated into intervals of a fixed resolution
+
+    Only the interval of the last record is open. Earlier intervals are
+    stored in growable numpy arrays, and intervals without records keep
+    the last value of the interval before them.
+    """
+
+    def __init__(self, resolution, dtype=float, capacity=64):
+        """ Constructor for a BinnedSeries
+
+        :param resolution: length of the intervals (ms)
+        :param dtype: numpy type of the values, e.g. int for byte counts
+        :param capacity: number of intervals to allocate space for at first
+        """
+        self.resolution = resolution
+        self._sums = np.zeros(capacity, dtype)
+        self._counts = np.zeros(capacity, int)
+        self._maxes = np.zeros(capacity, dtype)
+        self._lasts = np.zeros(capacity, dtype)
+        self._bin = -1  # index of the open interval
+        self._end = float('-inf')  # end time of the open interval
+        self._last = float('-inf')  # time of the last record
+
+        # Open interval
+        self._sum = 0
+        self._count = 0
+        self._max = 0
+        self._value = 0  # value of the last record
+        self._maxBefore = None  # maximum before the last record
+
+    @property
+    def dtype(self):
+        """ numpy type of the values """
+        return self._sums.dtype
+
+    @property
+    def times(self):
+        """ End times of the intervals """
+        return np.arange(self._bin + 1) * self.resolution
+
+    @property
+    def sums(self):
+        """ Sums of the values in each interval """
+        return self._view(self._sums)
+
+    @property
+    def counts(self):
+        """ Numbers of records in each interval """
+        return self._view(self._counts)
+
+    @property
+    def maxes(self):
+        """ Maximum value in each interval, 0 for empty intervals """
+        return self._view(self._maxes)
+
+    @property
+    def lasts(self):
+        """ Value of the last record at the end of each interval """
+        return self._view(self._lasts)
+
+    def _view(self, buf):
+        self._store()
+        view = buf[:self._bin + 1]
+        view.flags.writeable = False
+        return view
+
+    def add(self, timestamp, value):
+        """ Add a value, to the last one if it has the same time
+
+        :param timestamp: time of the record, no earlier than the last one
+        :param value: value to add
+        """
+        if timestamp == self._last:
+            self._replace(self._value + value)
+        else:
+            self._record(timestamp, value)
+
+    def set(self, timestamp, value):
+        """ Record a value, replacing the last one if it has the same time
+
+        :param timestamp: time of the record, no earlier than the last one
+        :param value: value to record
+        """
+        if timestamp == self._last:
+            self._replace(value)
+        else:
+            self._record(timestamp, value)
+
+    def _replace(self, value):
+        """ Replace the value of the last record """
+        self._sum += value - self._value
+        self._value = value
+        if self._maxBefore is None or value > self._maxBefore:
+            self._max = value
+        else:
+            self._max = self._maxBefore
+
+    def _record(self, timestamp, value):
+        if timestamp < self._last:
+            raise ValueError('Record at %s is before the last one at %s' %
+                             (timestamp, self._last))
+        self._last = timestamp
+        if timestamp >= self._end:
+            k = int(timestamp // self.resolution) + 1 if timestamp >= 0 else 0
+            if k != self._bin:
+                self._open(k)
+        self._maxBefore = self._max if self._count else None
+        if not self._count or value > self._max:
+            self._max = value
+        self._sum += value
+        self._count += 1
+        self._value = value
+
+    def _store(self):
+        """ Write the open interval to the arrays """
+        b = self._bin
+        if b >= 0:
+            self._sums[b] = self._sum
+            self._counts[b] = self._count
+            self._maxes[b] = self._max
+            self._lasts[b] = self._value
+
+    def _open(self, k):
+        """ Close the open interval and open interval k """
+        if k >= len(self._sums):
+            size = max(2 * len(self._sums), k + 1)
+            for name in ('_sums', '_counts', '_maxes', '_lasts'):
+                old = getattr(self, name)
+                new = np.zeros(size, old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+        self._store()
+        self._lasts[self._bin + 1:k] = self._value
+        self._bin = k
+        self._end = k * self.resolution
+        self._sum = 0
+        self._count = 0
+        self._max = 0
+
+    def rebin(self, resolution):
+        """ Intervals of a coarser resolution
+
+        :param resolution: a multiple of the resolution of this series
+        :return times, sums, counts, maxes, lasts: arrays as the
+            properties of the same names, one entry per interval
+        """
+        factor = int(round(float(resolution) / self.resolution))
+        if factor < 1 or abs(factor * self.resolution - resolution) > \
+                1e-9 * resolution:
+            raise ValueError('Resolution %s is not a multiple of %s' %
+                             (resolution, self.resolution))
+        sums, counts = self.sums, self.counts
+        maxes, lasts = self.maxes, self.lasts
+        if factor == 1 or not len(sums):
+            return self.times, sums, counts, maxes, lasts
+
+        # Interval 0 stays on its own, the rest are grouped by factor
+        starts = np.concatenate(([0], np.arange(1, len(sums), factor)))
+        ends = np.concatenate((starts[1:], [len(sums)])) - 1
+        newsums = np.add.reduceat(sums, starts)
+        newcounts = np.add.reduceat(counts, starts)
+        if maxes.dtype.kind == 'f':
+            lowest = -np.inf
+        else:
+            lowest = np.iinfo(maxes.dtype).min
+        newmaxes = np.maximum.reduceat(
+            np.where(counts > 0, maxes, lowest), starts)
+        newmaxes[newcounts == 0] = 0
+        times = np.arange(len(starts)) * resolution
+        return times, newsums, newcounts, newmaxes, lasts[ends]
+
+    def merge(self, other):
+        """ Add the records of another series with the same resolution
+
+        Sums, counts and last values of each interval are added together.
+
+        :param other: BinnedSeries
+        """
+        assert other.resolution == self.resolution
+        n = max(self._bin, other._bin) + 1
+        if not n:
+            return
+        fields = []
+        for name in ('sums', 'counts', 'maxes', 'lasts'):
+            a, b = getattr(self, name), getattr(other, name)
+            merged = np.zeros(n, a.dtype)
+            merged[:len(a)] += a
+            if name == 'maxes':
+                merged[:len(b)] = np.maximum(merged[:len(b)], b)
+            else:
+                merged[:len(b)] += b
+            fields.append(merged)
+        self._sums, self._counts, self._maxes, self._lasts = fields
+        self._bin = n - 1
+        self._end = self._bin * self.resolution
+        self._last = max(self._last, other._last)
+        self._sum = self._sums[-1]
+        self._count = self._counts[-1]
+        self._max = self._maxes[-1]
+        self._value = self._lasts[-1]
+        self._maxBefore = None
+
+    def total(self):
+        """ Sum of the values """
+        return self.sums.sum()
+
+    def mean(self):
+        """ Mean of the values """
+        return self.sums.sum() / float(self.counts.sum())
+
+    def __len__(self):
+        return self._bin + 1
+
+    def __eq__(self, other):
+        return isinstance(other, BinnedSeries) and \
+            self.resolution == other.resolution and \
+            all(np.array_equal(getattr(self, name), getattr(other, name))
+                for name in ('sums', 'counts', 'maxes', 'lasts'))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'BinnedSeries(%s ms, %d intervals)' % (self.resolution,
+                                                      len(self))
@@ -0,0 +1,204 @@
+"""
+icfire.trace
+~~~~~~~~~~~~
+
+Binary event traces. A TraceWriter records every Event the EventHandler
+processes as a fixed-width 32 byte record:
+
+    timestamp   float64  time of the Event
+    type        int16    Event type code
+    packet      int16    Packet type code, -1 if the Event carries no packet
+    object      int32    id of the object the Event occurs on
+    sender      int32    id of the packet sender, -1 if none
+    index       int32    packet index, -1 if none
+    flow        int32    id of the flow, -1 if none
+    size        int32    packet size in bytes, 0 if none
+
+Object, flow and type ids index into name tables that are saved next to the
+trace as <filename>.json. Records are packed into a large chunk in memory
+and written a chunk at a time.
+
+A TraceReader memory-maps a trace as a NumPy structured array, so analysis
+can slice millions of events without parsing text:
+
+    >>> trace = TraceReader('tc2.trace')
+    >>> r = trace.records
+    >>> acks = r[r['packet'] == trace.packetCode('AckPacket')]
+
+"""
+
+import json
+import struct
+
+from icfire.event import Event, PacketEvent, LinkTickEvent, UpdateFlowEvent, \
+    UpdateWindowEvent, UpdateRoutingTableEvent
+from icfire.packet import DataPacket, AckPacket, RoutingPacket, \
+    RoutingRequestPacket
+
+RECORD = struct.Struct('<dhhiiiii')
+
+# NumPy dtype matching RECORD
+DTYPE = [('timestamp', '<f8'), ('type', '<i2'), ('packet', '<i2'),
+         ('object', '<i4'), ('sender', '<i4'), ('index', '<i4'),
+         ('flow', '<i4'), ('size', '<i4')]
+
+# Initial type tables. Other classes are appended as they are seen.
+EVENT_TYPES = [Event, PacketEvent, LinkTickEvent, UpdateFlowEvent,
+               UpdateWindowEvent, UpdateRoutingTableEvent]
+PACKET_TYPES = [DataPacket, AckPacket, RoutingPacket, RoutingRequestPacket]
+
+
+def objectName(obj):
+    """ Name used to identify an object in traces and reports
+
+    :param obj: Link, Node, Flow or any other object
+    :return: Link id, Node address, flow id or str(obj)
+    """
+    for attr in ('id', 'address', 'flowId'):
+        name = getattr(obj, attr, None)
+        if name is not None:
+            return name
+    return str(obj)
+
+
+class _NameTable(object):
+    """ Assigns consecutive integer ids to keys """
+
+    def __init__(self, keys=()):
+        self.ids = dict()
+        self.names = []
+        for k in keys:
+            self.get(k)
+
+    def get(self, key):
+        try:
+            return self.ids[key]
+        except KeyError:
+            self.ids[key] = i = len(self.names)
+            self.names.append(key)
+            return i
+
+
+class TraceWriter(object):
+    """ Writes processed Events to a binary trace file """
+
+    def __init__(self, filename, chunksize=65536):
+        """ Create a trace file
+
+        :param filename: file to write the trace to
+        :param chunksize: number of records to buffer before writing
+        """
+        self.filename = filename
+        self._file = open(filename, 'wb')
+        self._chunk = bytearray(chunksize * RECORD.size)
+        self._capacity = chunksize
+        self._count = 0
+
+        self._types = _NameTable(EVENT_TYPES)
+        self._packets = _NameTable(PACKET_TYPES)
+        self._objects = _NameTable()  # keyed by object, named by objectName
+        self._flows = _NameTable()
+
+    def record(self, event):
+        """ Add a record for an Event
+
+        :param event: Event being processed
+        """
+        sender = -1
+        packettype = -1
+        index = -1
+        flow = -1
+        size = 0
+
+        packet = getattr(event, 'packet', None)
+        if packet is not None:
+            sender = self._objects.get(event.sender)
+            packettype = self._packets.get(packet.__class__)
+            if packet.index is not None:
+                index = packet.index
+            size = packet.size
+            flowId = getattr(packet, 'flowId', None)
+        else:
+            flowId = getattr(event, 'flowId', None)
+            if flowId is None:
+                flowId = getattr(event.eventObject, 'flowId', None)
+        if flowId is not None:
+            flow = self._flows.get(flowId)
+
+        RECORD.pack_into(self._chunk, self._count * RECORD.size,
+                         event.timestamp, self._types.get(event.__class__),
+                         packettype, self._objects.get(event.eventObject),
+                         sender, index, flow, size)
+        self._count += 1
+        if self._count == self._capacity:
+            self.flush()
+
+    def flush(self):
+        """ Write buffered records to the file """
+        if self._count:
+            self._file.write(
+                memoryview(self._chunk)[:self._count * RECORD.size])
+            self._count = 0
+
+    def close(self):
+        """ Write remaining records and the name tables """
+        self.flush()
+        self._file.close()
+        with open(self.filename + '.json', 'w') as f:
+            json.dump({
+                'types': [c.__name__ for c in self._types.names],
+                'packets': [c.__name__ for c in self._packets.names],
+                'objects': [objectName(o) for o in self._objects.names],
+                'flows': self._flows.names,
+            }, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader(object):
+    """ Reads a trace written by TraceWriter """
+
+    def __init__(self, filename):
+        """ Memory-map a trace file
+
+        :param filename: trace file
+        """
+        import numpy as np
+
+        with open(filename + '.json', 'r') as f:
+            names = json.load(f)
+        self.types = names['types']
+        self.packets = names['packets']
+        self.objects = names['objects']
+        self.flows = names['flows']
+
+        dtype = np.dtype(DTYPE)
+        assert dtype.itemsize == RECORD.size
+        try:
+            self.records = np.memmap(filename, dtype=dtype, mode='r')
+        except ValueError:
+            # numpy cannot map empty files
+            self.records = np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def typeCode(self, name):
+        """ Code of an Event type, e.g. 'PacketEvent' """
+        return self.types.index(name)
+
+    def packetCode(self, name):
+        """ Code of a Packet type, e.g. 'AckPacket' """
+        return self.packets.index(name)
+
+    def objectId(self, name):
+        """ Id of an object, given its Link id or Node address """
+        return self.objects.index(name)
+
+    def flowId(self, name):
+        """ Id of a flow, given its flow id """
+        return self.flows.index(name)
@@ -0,0 +1,180 @@
+"""
+icfire.warmstart
+~~~~~~~~~~~~~~~~
+
+Warm starts. Dynamic routing needs a while to converge (Routers usually
+start tens of seconds before the first flow), and every run of a network
+repeats that warmup. Here the network is loaded without its flows and run up
+to the start of the first flow once. Runs are then forked from the converged
+state: each child process shares the parent's memory copy-on-write, adds its
+own flows and continues from there.
+
+    >>> handler = warmup(data)
+    >>> rows = forkMap(lambda flows: runFlows(handler, flows), variants)
+
+warmSweep() does this for a parameter sweep (see icfire.sweep), with one
+warmup for each combination of link and router parameters.
+
+Results match a run started from scratch, except that Events of the flows
+are created after the warmup, so Events with equal timestamps may be
+processed in a different order. Only Unix platforms can fork.
+
+"""
+
+import cPickle as pickle
+import multiprocessing
+import os
+import traceback
+from collections import deque
+
+import icfire.logger as logger
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+from icfire.sweep import FLOW_KEYS, FLOW_PARAMS, applyParams, checkParams, \
+    summarize
+
+
+def warmup(data, until=None):
+    """ Load a network without its flows and run it up to a time
+
+    :param data: dict in the format of the json files
+    :param until: [optional] time to run up to. Defaults to the start of
+        the first flow, or 0 if there are no flows.
+    :return: EventHandler stopped before its first Event at or after until
+    """
+    if until is None:
+        until = min([f['timestamp'] for f in data['flows']] or [0])
+    network = Network()
+    network.loadDict(dict(data, flows=[]))
+    handler = EventHandler(network)
+
+    queue = handler._queue
+    while not queue.empty() and queue.peek().timestamp < until:
+        handler.step()
+    return handler
+
+
+def runFlows(handler, flows, steps=0, until=None):
+    """ Add flows to a warmed up EventHandler and run it
+
+    :param handler: EventHandler, e.g. from warmup()
+    :param flows: list of flows in the format of the json files
+    :param steps: [optional] Maximum number of steps to take after the
+        warmup. If 0, the simulation runs until completion.
+    :param until: [optional] simulation time (ms) to stop at
+    :return: handler
+    """
+    network = handler._network
+    first = len(network.events)
+    for f in flows:
+        network.addFlow(f['source_id'], f['dest_id'], f['bytes'],
+                        f['timestamp'], f['flowType'], f['name'],
+                        f.get('params'))
+    handler.addEvents(network.events[first:])
+    handler.run(steps, until)
+    return handler
+
+
+def forkMap(fn, items, processes=None):
+    """ Call fn on each item in a child process forked from this one
+
+    Children see the state of this process at the time of the fork, and
+    results are pickled back through a pipe.
+
+    :param fn: function of one item
+    :param items: list of items
+    :param processes: [optional] maximum number of children at a time.
+        Defaults to the number of CPUs.
+    :return: list of results, in the order of items
+    """
+    processes = processes or multiprocessing.cpu_count()
+    results = [None] * len(items)
+    pending = deque(enumerate(items))
+    running = deque()
+
+    # Anything buffered now would otherwise be written by every child
+    logger.flushBeforeFork()
+
+    while pending or running:
+        while pending and len(running) < processes:
+            i, item = pending.popleft()
+            r, w = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(r)
+                logger.disableInChild()
+                try:
+                    result = (True, fn(item))
+                except Exception:
+                    result = (False, traceback.format_exc())
+                try:
+                    with os.fdopen(w, 'wb') as f:
+                        pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+                finally:
+                    os._exit(0)
+            os.close(w)
+            running.append((i, pid, r))
+
+        i, pid, r = running.popleft()
+        with os.fdopen(r, 'rb') as f:
+            data = f.read()
+        os.waitpid(pid, 0)
+        if not data:
+            raise RuntimeError('Child process for item %d died' % i)
+        ok, result = pickle.loads(data)
+        if not ok:
+            raise RuntimeError('Child process for item %d failed:\n%s' %
+                               (i, result))
+        results[i] = result
+    return results
+
+
+def _isFlowParam(key):
+    """ Whether a sweep parameter only changes the flows """
+    name = key.rpartition('.')[2]
+    return name in FLOW_KEYS or \
+        any(name in p for p in FLOW_PARAMS.itervalues())
+
+
+def warmSweep(data, points, steps=0, processes=None, until=None):
+    """ Run a parameter sweep from warmed up networks
+
+    Points that only differ in flow parameters share one warmup. Link and
+    router parameters are applied before the warmup.
+
+    :param data: dict in the format of the json files
+    :param points: list of dicts of parameter -> value, see expandGrid
+    :param steps: maximum number of steps per run after the warmup, 0 to
+        run until completion
+    :param processes: [optional] number of processes. Defaults to the
+        number of CPUs.
+    :param until: [optional] simulation time (ms) to stop each run at
+    :return: list of rows, one for each point, in the order of points
+    :raise ValueError: if a Flow parameter does not apply to any flow,
+        see sweep.checkParams
+    """
+    checkParams(data, points)
+    logger.disable()
+
+    # Group points by the parameters that change the warmup
+    groups = dict()
+    for i, params in enumerate(points):
+        key = tuple(sorted((k, v) for k, v in params.iteritems()
+                           if not _isFlowParam(k)))
+        groups.setdefault(key, []).append(i)
+
+    rows = [None] * len(points)
+    for key, indices in sorted(groups.iteritems()):
+        variants = [applyParams(data, points[i]) for i in indices]
+        start = min([f['timestamp'] for v in variants for f in v['flows']]
+                    or [0])
+        handler = warmup(applyParams(data, dict(key)), start)
+
+        def run(variant):
+            runFlows(handler, variant['flows'], steps, until)
+            return summarize(handler._network, handler)
+
+        for i, metrics in zip(indices, forkMap(run, variants, processes)):
+            rows[i] = dict(points[i])
+            rows[i].update(metrics)
+    return rows
@@ -7,6 +7,62 @@ echo
 echo "running event handler test"
 python ../tests/eventhandler_test.py
 
+echo
+echo "running scheduler test"
+python ../tests/scheduler_test.py
+
+echo
+echo "running logger test"
+python ../tests/logger_test.py
+
+echo
+echo "running trace test"
+python ../tests/trace_test.py
+
+echo
+echo "running profiler test"
+python ../tests/profiler_test.py
+
+echo
+echo "running progress test"
+python ../tests/progress_test.py
+
+echo
+echo "running stats test"
+python ../tests/stats_test.py
+
+echo
+echo "running timeseries test"
+python ../tests/timeseries_test.py
+
+echo
+echo "running liveplot test"
+python ../tests/liveplot_test.py
+
+echo
+echo "running summary test"
+python ../tests/summary_test.py
+
+echo
+echo "running flow test"
+python ../tests/flow_test.py
+
+echo
+echo "running parallel test"
+python ../tests/parallel_test.py
+
+echo
+echo "running sweep test"
+python ../tests/sweep_test.py
+
+echo
+echo "running checkpoint test"
+python ../tests/checkpoint_test.py
+
+echo
+echo "running warm start test"
+python ../tests/warmstart_test.py
+
 echo
 echo "running network creation test"
 python ../tests/network_test.py
\ No newline at end of file
@@ -0,0 +1,81 @@
+""" Run a parameter sweep over a network description
+
+Example:
+
+    python sweep.py ../testcases/tc1Reno.json \\
+        -p flowType=TCPRenoFlow,FastTCPFlow -p buffsize=32,64,128 \\
+        --steps 500000 --csv tc1sweep.csv
+
+Every combination of the values given with -p is run, on all cores by
+default, and a table of summary metrics is printed.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')  # never open plots
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from icfire.scheduler import SCHEDULERS
+from icfire.sweep import expandGrid, sweep, columns, formatTable
+from icfire.warmstart import warmSweep
+
+
+def parseValue(text):
+    """ Parse a json value, or keep the text as a string """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('network', help='json network description')
+    parser.add_argument('-p', '--param', action='append', default=[],
+                        metavar='KEY=V1,V2,...',
+                        help='parameter values to sweep, e.g. L1.rate=10,20')
+    parser.add_argument('--steps', type=int, default=0,
+                        help='maximum steps per run (default: to completion)')
+    parser.add_argument('--until', type=float, default=None,
+                        help='simulation time in ms to stop each run at')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help='number of processes (default: number of CPUs)')
+    parser.add_argument('--scheduler', choices=SCHEDULERS, default=None,
+                        help='event scheduler (default: as in the network '
+                             'description, or heap)')
+    parser.add_argument('--csv', help='also write the table to a csv file')
+    parser.add_argument('--warm', action='store_true',
+                        help='fork runs from a network warmed up without '
+                             'flows instead of starting each from scratch')
+    args = parser.parse_args()
+
+    grid = dict()
+    for param in args.param:
+        key, _, values = param.partition('=')
+        grid[key] = [parseValue(v) for v in values.split(',')]
+
+    with open(args.network, 'r') as f:
+        data = json.load(f)
+    if args.scheduler:
+        data['scheduler'] = args.scheduler
+
+    run = warmSweep if args.warm else sweep
+    rows = run(data, expandGrid(grid), args.steps, args.processes,
+               args.until)
+    first = sorted(grid)
+    print formatTable(rows, first)
+
+    if args.csv:
+        with open(args.csv, 'wb') as f:
+            writer = csv.DictWriter(f, columns(rows, first))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+""" Unittests for checkpoint.py """
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import checkpoint, logger
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc2Fast.json')
+
+
+def snapshot(handler):
+    """ Stats and state to compare between runs """
+    network = handler._network
+    return (handler.time,
+            [(f.cwnd, f.lastAck, f.stats.bytesreceived, f.stats.rttdelay)
+             for _, f in sorted(network.flows.items())],
+            [(l.stats.bufferoccupancy, l.stats.lostpackets, len(l.buffer))
+             for _, l in sorted(network.links.items())],
+            [sorted((d, l and l.id, c) for d, (l, c) in
+                    network.nodes[r].routing_table.items())
+             for r in ('R1', 'R2', 'R3', 'R4')])
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'test.ckpt')
+        network = Network()
+        network.load(TESTCASE)
+        self.handler = EventHandler(network)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testResume(self):
+        """ Tests that a restored run continues exactly like the original. """
+        for _ in xrange(20000):
+            self.handler.step()
+        checkpoint.save(self.handler, self.filename)
+        for _ in xrange(20000):
+            self.handler.step()
+        expected = snapshot(self.handler)
+
+        for _ in xrange(2):
+            handler = checkpoint.load(self.filename)
+            for _ in xrange(20000):
+                handler.step()
+            self.assertEqual(expected, snapshot(handler))
+
+    def testRun(self):
+        """ Tests that run leaves a checkpoint of where it stopped. """
+        checkpoint.run(self.handler, self.filename, interval=3000, steps=10000)
+        self.assertEqual(snapshot(self.handler),
+                         snapshot(checkpoint.load(self.filename)))
+        self.assertFalse(os.path.exists(self.filename + '.tmp'))
+
+    def testRunUntil(self):
+        """ Tests that run stops like EventHandler.run at a given time. """
+        network = Network()
+        network.load(TESTCASE)
+        expected = EventHandler(network)
+        steps = expected.run(until=2000)
+
+        self.assertEqual(steps, checkpoint.run(self.handler, self.filename,
+                                               interval=3000, until=2000))
+        self.assertEqual(snapshot(expected), snapshot(self.handler))
+        self.assertEqual(snapshot(self.handler),
+                         snapshot(checkpoint.load(self.filename)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+""" Unittests for flow.py """
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+
+
+class FlowCompletionTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        self.network = Network()
+        for i in xrange(3):
+            self.network.addHost('S%d' % i)
+            self.network.addHost('T%d' % i)
+            self.network.addLink('S%d' % i, 'T%d' % i, 10, 10, 64, 'L%d' % i)
+            self.network.addFlow('S%d' % i, 'T%d' % i, 4096 * (i + 1),
+                                 100 * i, 'TCPRenoFlow', 'F%d' % i)
+
+    def testDoneCountsOnce(self):
+        """ Tests that the Network counts each finished flow once. """
+        f = self.network.flows['F0']
+        self.assertEqual(3, self.network.flowsRemaining)
+        f.done = True
+        f.done = True
+        self.assertEqual(2, self.network.flowsRemaining)
+        self.assertFalse(EventHandler(self.network).completed())
+
+    def testReopen(self):
+        """ Tests that a flow marked not done is counted again. """
+        f = self.network.flows['F0']
+        f.done = True
+        f.done = False
+        f.done = False
+        self.assertEqual(3, self.network.flowsRemaining)
+        self.assertIsNone(f.completedAt)
+        f.done = True
+        self.assertEqual(2, self.network.flowsRemaining)
+
+    def testRunToCompletion(self):
+        """ Tests that run stops once every flow has finished. """
+        handler = EventHandler(self.network)
+        handler.run()
+        self.assertTrue(handler.completed())
+        self.assertEqual(0, self.network.flowsRemaining)
+        for f in self.network.flows.values():
+            self.assertTrue(f.done)
+            self.assertLessEqual(f.completedAt, handler.time)
+        self.assertEqual(handler.time,
+                         max(f.completedAt
+                             for f in self.network.flows.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+""" Unittests for liveplot.py """
+import sys
+import os
+import unittest
+
+import matplotlib
+matplotlib.use('Agg')
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.eventhandler import EventHandler
+from icfire.liveplot import LivePlotter
+from icfire.network import Network
+from icfire.timeseries import TimeSeries
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc2Fast.json')
+
+
+class PlotterStub(object):
+    """ Collects messages instead of sending them to a process """
+
+    def __init__(self, full=False):
+        self.period = 0
+        self.full = full
+        self.messages = []
+
+    def send(self, message):
+        if self.full:
+            return False
+        self.messages.append(message)
+        return True
+
+
+class LivePlotTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        self.network = Network()
+        self.network.load(TESTCASE)
+
+    def testDeltas(self):
+        """ Tests that the records sent rebuild the recorded series. """
+        stats = self.network.links['L1'].stats
+        stub = PlotterStub()
+        stats.setPlotter(stub)
+        handler = EventHandler(self.network)
+        handler.run(3000)
+        stub.full = True  # these records have to be sent again
+        handler.run(1000)
+        stub.full = False
+        handler.run(1000)
+        stats.push(force=True)
+
+        rebuilt = dict()
+        for _, key, name, (times, values) in stub.messages:
+            self.assertEqual(id(stats), key)
+            rebuilt.setdefault(name, TimeSeries(values.dtype)).extend(
+                times, values)
+        self.assertEqual(set(name for name in ('bytesflowed', 'lostpackets',
+                                               'bufferoccupancy')
+                             if len(getattr(stats, name))), set(rebuilt))
+        for name, series in rebuilt.iteritems():
+            self.assertEqual(getattr(stats, name), series)
+
+    def testProcess(self):
+        """ Tests plotting a run in another process. """
+        plotter = LivePlotter(period=.01)
+        plotter.watchNetwork(self.network, flows=['F1'], links=['L1'],
+                             hosts=['S1'])
+        EventHandler(self.network).run(5000)
+        plotter.close()
+        self.assertFalse(plotter._process.is_alive())
+        self.assertEqual(0, plotter._process.exitcode)
+        self.assertIsNone(self.network.links['L1'].stats.plotter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+""" Unittests for logger.py """
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+
+
+class LoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'log.txt')
+
+    def tearDown(self):
+        logger.configure()
+        shutil.rmtree(self.dir)
+
+    def read(self):
+        with open(self.filename) as f:
+            return f.read().splitlines()
+
+    def testFilters(self):
+        """ Tests that only enabled categories and levels are written. """
+        logger.configure(self.filename, level=logger.INFO,
+                         categories=[logger.DROPS, logger.FLOW])
+        self.assertTrue(logger.isEnabledFor(logger.DROPS, logger.INFO))
+        self.assertFalse(logger.isEnabledFor(logger.DROPS, logger.DEBUG))
+        self.assertFalse(logger.isEnabledFor(logger.EVENTS, logger.WARNING))
+
+        logger.log('drop %s', 1, category=logger.DROPS)
+        logger.log('event %s', 2, category=logger.EVENTS)
+        logger.log('flow %s', 3, category=logger.FLOW, level=logger.DEBUG)
+        logger.log('flow %d%%', 4, category=logger.FLOW, level=logger.WARNING)
+        logger.close()
+
+        self.assertEqual(['drop 1', 'flow 4%'], self.read())
+
+    def testDisable(self):
+        """ Tests that a disabled logger writes nothing. """
+        logger.configure(self.filename)
+        logger.disable()
+        self.assertFalse(logger.enabled)
+        self.assertFalse(logger.isEnabledFor(logger.DROPS, logger.WARNING))
+        logger.log('drop %s', 1, category=logger.DROPS, level=logger.WARNING)
+        logger.close()
+
+        self.assertFalse(os.path.exists(self.filename))
+
+    def testLogAfterClose(self):
+        """ Tests that lines logged after close() are appended, and that
+        configure() starts the file over. """
+        logger.configure(self.filename)
+        logger.log('first')
+        logger.close()
+        logger.log('second')
+        logger.close()
+        self.assertEqual(['first', 'second'], self.read())
+
+        logger.configure(self.filename)
+        logger.log('third')
+        logger.close()
+        self.assertEqual(['third'], self.read())
+
+    def testDisableInChild(self):
+        """ Tests that a child drops the lines it inherited unwritten. """
+        logger.configure(self.filename)
+        logger.log('before fork')
+        logger.flushBeforeFork()
+        self.assertEqual(['before fork'], self.read())
+
+        logger.log('buffered in parent')
+        pid = os.fork()
+        if pid == 0:
+            logger.disableInChild()
+            logger.log('in child')
+            logger.close()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        logger.close()
+        self.assertEqual(['before fork', 'buffered in parent'], self.read())
+
+    def testBackground(self):
+        """ Tests that the background writer writes every line in order. """
+        logger.configure(self.filename, buffersize=100, background=True)
+        for i in xrange(1000):
+            logger.log('line %d', i)
+        logger.close()
+
+        self.assertEqual(['line %d' % i for i in xrange(1000)], self.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,16 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.getcwd()))
 
+import json
+import subprocess
 import unittest
 from icfire.network import *
+from icfire import logger
+from icfire.eventhandler import EventHandler
+from icfire.packet import RoutingPacket, RoutingRequestPacket
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTCASE = os.path.join(ROOT, 'testcases', 'tc2Fast.json')
 
 
 class NetworkTest(unittest.TestCase):
@@ -58,5 +66,101 @@ class NetworkTest(unittest.TestCase):
         self.assertEqual(len(N.getLinkList()), 2)
 
 
+
+class LazyImportTest(unittest.TestCase):
+
+    def testHeadlessImport(self):
+        """ Tests that running a network does not load plotting packages. """
+        code = ('import sys; sys.path.insert(0, %r); '
+                'from icfire.network import Network; '
+                'from icfire.eventhandler import EventHandler; '
+                'from icfire import logger; logger.disable(); '
+                'n = Network(); n.load(%r); EventHandler(n).run(1000); '
+                'print sorted(m for m in ("matplotlib", "scipy", "networkx") '
+                'if m in sys.modules)') % (ROOT, TESTCASE)
+        out = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual('[]', out.strip())
+
+    def testGraph(self):
+        """ Tests the graph built from the nodes and links. """
+        network = Network()
+        network.load(TESTCASE)
+        G = network.G
+        self.assertEqual(sorted(network.nodes), sorted(G.nodes()))
+        nodes = dict(G.nodes(data=True))
+        self.assertEqual(1, nodes['S1']['host'])
+        self.assertEqual(0, nodes['R1']['host'])
+        self.assertEqual(9, G.number_of_edges())
+        self.assertEqual('L1', G['R1']['R2']['linkid'])
+        self.assertIs(G, network.G)
+
+        network.addHost('S4')
+        network.addLink('S4', 'R1', 10, 10, 64, 'LS4')
+        self.assertEqual(10, network.G['S4']['R1']['rate'])
+
+
+
+class StaticRoutingTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(ROOT, 'testcases', 'tc1Reno.json')) as f:
+            self.data = json.load(f)
+        for router in self.data['routers']:
+            router['static_routing'] = True
+        # Make the path through R3 shorter than the one through R2
+        self.data['links'][2]['delay'] = 5
+
+    def testTables(self):
+        """ Tests the installed shortest paths. """
+        network = Network()
+        network.loadDict(self.data)
+        routes = dict((r, dict((dest, (link.id, distance)) for dest, (
+            link, distance) in network.nodes[r].routing_table.iteritems()))
+            for r in network.staticRouters)
+        self.assertEqual({'H1': ('L0', 10), 'H2': ('L2', 25)}, routes['R1'])
+        self.assertEqual({'H1': ('L1', 20), 'H2': ('L3', 20)}, routes['R2'])
+        self.assertEqual({'H1': ('L4', 25), 'H2': ('L5', 10)}, routes['R4'])
+
+    def testRun(self):
+        """ Tests that flows run without any routing packets. """
+        logger.disable()
+        network = Network()
+        network.loadDict(self.data)
+        handler = EventHandler(network)
+        for _ in xrange(50000):
+            event = handler.step()
+            self.assertNotIsInstance(getattr(event, 'packet', None),
+                                     (RoutingPacket, RoutingRequestPacket))
+        self.assertGreater(network.flows['F1'].stats.bytesreceived.total(),
+                           0)
+
+
+class AdaptiveRoutingTest(unittest.TestCase):
+
+    def testFewerUpdates(self):
+        """ Tests that adaptive routers update less often. """
+        logger.disable()
+        with open(os.path.join(ROOT, 'testcases', 'tc1Reno.json')) as f:
+            data = json.load(f)
+        counts = []
+        for adaptive in (False, True):
+            for router in data['routers']:
+                router['adaptive_routing'] = adaptive
+            network = Network()
+            network.loadDict(data)
+            self.assertEqual(adaptive, network.nodes['R1'].adaptive)
+            handler = EventHandler(network)
+            requests = 0
+            while handler.time < 10000:
+                event = handler.step()
+                if isinstance(getattr(event, 'packet', None),
+                              RoutingRequestPacket):
+                    requests += 1
+            self.assertGreater(
+                network.flows['F1'].stats.bytesreceived.total(), 0)
+            counts.append(requests)
+        self.assertLess(counts[1], counts[0])
+
+
 if __name__ == '__main__':
     unittest.main()
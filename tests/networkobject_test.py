@@ -1,12 +1,19 @@
 """ Unittests for networkobject.py """
 import sys
 import os
+import random
 import unittest
 
+from icfire import logger
+from icfire.eventhandler import EventHandler
 from icfire.networkobjects.host import Host
-from icfire.networkobjects.networkobject import NetworkObject
+from icfire.networkobjects.networkobject import NetworkObject, Node
 from icfire.networkobjects.link import Link
-from icfire.event import Event, PacketEvent
+from icfire.networkobjects.router import Router, UNREACHABLE
+from icfire.network import Network
+from icfire.event import Event, PacketEvent, LinkTickEvent, UpdateFlowEvent, \
+    UpdateRoutingTableEvent
+from icfire.packet import DataPacket, RoutingPacket, RoutingRequestPacket
 
 sys.path.append(os.path.dirname(os.getcwd()))
 
@@ -18,6 +25,39 @@ class NetworkObjectTest(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             NetworkObject()
 
+    def testDispatch(self):
+        """ Tests that Events are dispatched on their class and bases. """
+        class TickSubclass(LinkTickEvent):
+            __slots__ = ()
+
+        l = Link(NodeStub('A'), NodeStub('B'), 10, 10, 8, 'L1')
+        with self.assertRaises(NotImplementedError):
+            l.processEvent(UpdateFlowEvent(0, l, 'F1'))
+        with self.assertRaises(AssertionError):
+            l.processEvent('not an event')
+
+        l.buffer.append((DataPacket('A', 'B', 0, 'F1'), l.nodeA))
+        l.totalbuffersize = l.buffersizes[l.nodeA] = 1024
+        e, = l.processEvent(TickSubclass(0, l))
+        self.assertEqual(l.nodeB, e.eventObject)
+        self.assertIs(Link._eventHandlers[TickSubclass],
+                      Link._eventHandlers[LinkTickEvent])
+
+    def testDispatchToOverride(self):
+        """ Tests that subclasses overriding a handler method get the
+        Events and Packets it handles. """
+        class QuietRouter(Router):
+            def _receiveRoutingTable(self, event):
+                self.received = event.packet
+                return []
+
+        r = QuietRouter('R')
+        l = Link(NodeStub('A'), r, 10, 10, 8, 'L1')
+        packet = RoutingPacket('A', 'R', routingTable={'A': ['A', 0]})
+        self.assertEqual([], r.processEvent(PacketEvent(0, l, r, packet)))
+        self.assertIs(packet, r.received)
+        self.assertEqual({}, r.routing_table)
+
 
 class LinkTest(unittest.TestCase):
 
@@ -38,6 +78,172 @@ class LinkTest(unittest.TestCase):
         self.assertEqual('nodeA', l._otherNode('nodeB'))
         self.assertEqual('nodeB', l._otherNode('nodeA'))
 
+    def testAnalytic(self):
+        """ Tests that analytic mode delivers and drops the same packets at
+        the same times as LinkTickEvents do.
+        """
+        random.seed(143)
+        arrivals = []
+        t = 0
+        for i in xrange(2000):
+            t += random.expovariate(1.5) + 1e-6
+            arrivals.append((t, random.random() < .3, i))
+
+        results = []
+        for analytic in (False, True):
+            a, b = NodeStub('A'), NodeStub('B')
+            l = Link(a, b, 10, 10, 8, 'L1', analytic)
+            events = [PacketEvent(t, b if fromB else a, l,
+                                  DataPacket('x', 'y', i, 'F1'))
+                      for t, fromB, i in arrivals]
+            eventHandler = EventHandler(None, events)
+            while not eventHandler._queue.empty():
+                eventHandler.step()
+            l.cost()  # catch up on departures in analytic mode
+            results.append((a.received, b.received, l.stats.lostpackets,
+                            l.stats.bytesflowed, l.stats.bufferoccupancy))
+
+        self.assertTrue(results[0][2])  # some packets should be dropped
+        for original, analytic in zip(*results):
+            self.assertEqual(original, analytic)
+
+
+class NodeStub(Node):
+    """ Node that records the packets it receives """
+
+    def __init__(self, address):
+        super(NodeStub, self).__init__(address)
+        self.received = []
+
+    def processEvent(self, event):
+        self.received.append((event.timestamp, event.packet.index))
+        return []
+
+
+class RouterTest(unittest.TestCase):
+
+    def testCutThrough(self):
+        """ Tests that Links skip cut-through Routers for data packets. """
+        a, c = NodeStub('A'), NodeStub('C')
+        r = Router('R', cutThrough=True)
+        l1 = Link(a, r, 10, 10, 64, 'L1', analytic=True)
+        l2 = Link(r, c, 10, 10, 64, 'L2', analytic=True)
+        r.addLink(l1)
+        r.addLink(l2)
+        r.routing_table['C'] = (l2, 10)
+
+        data, routing = DataPacket('A', 'C', 0, 'F1'), RoutingPacket('A', 'R')
+        e1, e2 = l1._processPacketEvent(PacketEvent(0, a, l1, data)) + \
+            l1._processPacketEvent(PacketEvent(0, a, l1, routing))
+        self.assertEqual((l2, r, data), (e1.eventObject, e1.sender, e1.packet))
+        self.assertEqual((r, l1, routing),
+                         (e2.eventObject, e2.sender, e2.packet))
+
+        # Without a route, the Router gets the packet and drops it
+        lost = DataPacket('A', 'D', 1, 'F1')
+        e3, = l1._processPacketEvent(PacketEvent(1, a, l1, lost))
+        self.assertEqual(r, e3.eventObject)
+
+    def testIncrementalRoutes(self):
+        """ Tests that routes match recomputing every destination. """
+        logger.disable()
+        network = Network()
+        network.load(os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'testcases', 'tc1Reno.json'))
+        handler = EventHandler(network)
+        updates = 0
+        for _ in xrange(100000):
+            event = handler.step()
+            r = event.eventObject
+            if not isinstance(r, Router) or \
+                    not isinstance(getattr(event, 'packet', None),
+                                   RoutingPacket):
+                continue
+            updates += 1
+            for dest, route in r.routing_table.iteritems():
+                best = (None, UNREACHABLE)
+                for link in r.link_table:
+                    if r.link_table[link].get(dest, UNREACHABLE) < best[1]:
+                        best = (link, r.link_table[link][dest])
+                self.assertEqual(best, route)
+        self.assertGreater(updates, 50)
+
+    def testAdaptiveInterval(self):
+        """ Tests the backoff and speedup of adaptive routing updates. """
+        r = Router('R', adaptive=True)
+        r.maxUpdateInterval = 20000
+
+        def update(timestamp):
+            events = r.processEvent(UpdateRoutingTableEvent(timestamp, r))
+            return [e.timestamp for e in events
+                    if isinstance(e, UpdateRoutingTableEvent)]
+
+        # Doubles while nothing changes, up to maxUpdateInterval
+        self.assertEqual([5000], update(0))
+        self.assertEqual([15000], update(5000))
+        self.assertEqual([35000], update(15000))
+        self.assertEqual([55000], update(35000))
+
+        # A new route brings the next update forward
+        a = NodeStub('A')
+        l = Link(a, r, 10, 10, 64, 'L1')
+        r.addLink(l)
+        routing = RoutingPacket('A', 'R', routingTable={'A': ['A', 0]})
+        e, = r.processEvent(PacketEvent(36000, l, r, routing))
+        self.assertEqual(41000, e.timestamp)
+        self.assertEqual((l, l.cost()), r.routing_table['A'])
+
+        # The update it replaced does nothing
+        self.assertEqual([], r.processEvent(UpdateRoutingTableEvent(55000, r)))
+        self.assertEqual([46000], update(41000))
+
+        # Small changes in distance do not count
+        routing.routingTable['A'][1] = .1
+        self.assertEqual([], r.processEvent(PacketEvent(42000, l, r, routing)))
+        self.assertEqual([56000], update(46000))
+
+    def testCongestionBetweenUpdates(self):
+        """ Tests that a backed off Router sees its Links congest when a
+        neighbor polls it, before its own next update. """
+        r = Router('R', adaptive=True)
+        a = NodeStub('A')
+        l = Link(a, r, 10, 10, 64, 'L1')
+        r.addLink(l)
+
+        def updates(events):
+            return [e.timestamp for e in events
+                    if isinstance(e, UpdateRoutingTableEvent)]
+
+        r.processEvent(UpdateRoutingTableEvent(0, r))
+        routing = RoutingPacket('A', 'R', routingTable={'A': ['A', 0]})
+        r.processEvent(PacketEvent(100, l, r, routing))
+        for t in (5000, 10000, 20000):
+            r.processEvent(UpdateRoutingTableEvent(t, r))
+        self.assertEqual(40000, r._nextUpdate)
+
+        # Polled while the Link is uncongested: nothing changes
+        request = RoutingRequestPacket('A')
+        self.assertEqual([], updates(
+            r.processEvent(PacketEvent(21000, l, r, request))))
+
+        # The Link congests halfway through the interval
+        l.totalbuffersize = 64 * 1024
+        cost = l.cost()
+        self.assertEqual([27000], updates(
+            r.processEvent(PacketEvent(22000, l, r, request))))
+        self.assertEqual((l, cost), r.routing_table['A'])
+        self.assertEqual([], r.processEvent(UpdateRoutingTableEvent(40000, r)))
+        self.assertEqual([32000], updates(
+            r.processEvent(UpdateRoutingTableEvent(27000, r))))
+
+    def testFixedInterval(self):
+        """ Tests that Routers update every updateInterval by default. """
+        r = Router('R')
+        for t in (0, 5000, 10000):
+            e, = r.processEvent(UpdateRoutingTableEvent(t, r))
+            self.assertEqual(t + 5000, e.timestamp)
+
 
 class HostTest(unittest.TestCase):
 
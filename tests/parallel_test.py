@@ -0,0 +1,106 @@
+""" Unittests for parallel.py """
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+from icfire.packet import RoutingPacket
+from icfire.parallel import ParallelEventHandler, partition, cutLinks, \
+    _encode, _decode
+from icfire.event import PacketEvent
+
+
+def buildNetwork(delay=10):
+    """ Two Routers with two Hosts each, and a flow in each direction """
+    network = Network()
+    for h in ('S1', 'S2', 'T1', 'T2'):
+        network.addHost(h)
+    network.addRouter('R1', -3000, False)
+    network.addRouter('R2', -2900, False)
+    network.addLink('S1', 'R1', 10, 5, 64, 'LS1')
+    network.addLink('S2', 'R1', 10, 5, 64, 'LS2')
+    network.addLink('T1', 'R2', 10, 5, 64, 'LT1')
+    network.addLink('T2', 'R2', 10, 5, 64, 'LT2')
+    network.addLink('R1', 'R2', 10, delay, 64, 'L1')
+    network.addFlow('S1', 'T1', 1000000, 0, 'FastTCPFlow', 'F1')
+    network.addFlow('T2', 'S2', 500000, 100, 'FastTCPFlow', 'F2')
+    return network
+
+
+class ParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+
+    def testPartition(self):
+        """ Tests that Hosts are placed with their Routers. """
+        network = buildNetwork()
+        owner = partition(network, 2)
+        self.assertEqual({'R1': 0, 'S1': 0, 'S2': 0,
+                          'R2': 1, 'T1': 1, 'T2': 1}, owner)
+        self.assertEqual(['L1'], [l.id for l in cutLinks(network, owner)])
+
+    def testZeroLookahead(self):
+        """ Tests that cut Links without delay are rejected. """
+        with self.assertRaises(ValueError):
+            ParallelEventHandler(buildNetwork(delay=0), 2)
+
+    def testEncodeRoutingPacket(self):
+        """ Tests that routing tables are sent with Link ids. """
+        network = buildNetwork()
+        r1, l1 = network.nodes['R1'], network.links['L1']
+        table = {'S1': (network.links['LS1'], 5.), 'T1': ('T1', 0)}
+        message = _encode(PacketEvent(7, r1, l1,
+                                      RoutingPacket('R1', None, table)))
+        e = _decode(network, message)
+        self.assertEqual((7, r1, l1), (e.timestamp, e.sender, e.eventObject))
+        self.assertEqual({'S1': (network.links['LS1'], 5.), 'T1': ('T1', 0)},
+                         e.packet.routingTable)
+
+    def testLogNotDuplicated(self):
+        """ Tests that workers do not write lines the parent buffered. """
+        directory = tempfile.mkdtemp()
+        filename = os.path.join(directory, 'log.txt')
+        try:
+            logger.configure(filename, buffersize=30)
+            logger.log('a line longer than the buffer is written at once')
+            logger.log('second line')
+            ParallelEventHandler(buildNetwork(), 2).run(steps=200)
+            logger.close()
+            with open(filename) as f:
+                self.assertEqual(1, f.read().count('second line'))
+        finally:
+            logger.disable()
+            shutil.rmtree(directory)
+
+    def testMatchesSequential(self):
+        """ Tests that a partitioned run completes every flow close to the
+        time a sequential run does, and merges stats back.
+        """
+        sequential = buildNetwork()
+        EventHandler(sequential).run()
+
+        network = buildNetwork()
+        handler = ParallelEventHandler(network, 2)
+        handler.run()
+        self.assertTrue(handler.completed())
+        for flowId, f in network.flows.iteritems():
+            expected = sequential.flows[flowId]
+            self.assertTrue(f.done)
+            self.assertAlmostEqual(expected.completedAt, f.completedAt,
+                                   delta=.01 * expected.completedAt)
+            self.assertEqual(expected.stats.bytesreceived.values.sum(),
+                             f.stats.bytesreceived.values.sum())
+            self.assertTrue(f.stats.windowsize)
+        self.assertTrue(network.links['L1'].stats.bytesflowed)
+        self.assertTrue(network.nodes['T1'].stats.bytessent)
+
+
+if __name__ == '__main__':
+    unittest.main()
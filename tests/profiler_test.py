@@ -0,0 +1,66 @@
+""" Unittests for profiler.py """
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+from icfire.profiler import EventProfiler
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc2Fast.json')
+
+
+class EventProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        network = Network()
+        network.load(TESTCASE)
+        self.profiler = EventProfiler()
+        self.handler = EventHandler(network, profiler=self.profiler)
+        for _ in xrange(5000):
+            self.handler.step()
+
+    def testCounts(self):
+        """ Tests that every Event is counted once per table. """
+        p = self.profiler
+        self.assertEqual(5000, p.events)
+        self.assertEqual(5000, sum(c for c, _ in p.byClass.itervalues()))
+        self.assertEqual(5000, sum(c for c, _ in p.byObject.itervalues()))
+        self.assertAlmostEqual(p.seconds,
+                               sum(s for _, s in p.byClass.itervalues()))
+        self.assertGreater(p.peakQueue, 0)
+
+    def testReport(self):
+        """ Tests the table and json reports. """
+        report = self.profiler.report(top=100)
+        self.assertIn('LinkTickEvent', report)
+        self.assertIn('Link L1', report)
+        self.assertEqual(len(report.splitlines()) - len(self.profiler.byObject)
+                         + 3, len(self.profiler.report(top=3).splitlines()))
+
+        tmp = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp, 'profile.json')
+            self.profiler.save(filename)
+            with open(filename) as f:
+                profile = json.load(f)
+        finally:
+            shutil.rmtree(tmp)
+        self.assertEqual(5000, profile['events'])
+        names = [name for name, _, _ in profile['objects']]
+        self.assertIn('Router R1', names)
+        self.assertIn('FastTCPFlow F1', names)
+        seconds = [s for _, _, s in profile['classes']]
+        self.assertEqual(sorted(seconds, reverse=True), seconds)
+
+
+if __name__ == '__main__':
+    unittest.main()
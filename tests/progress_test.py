@@ -0,0 +1,69 @@
+""" Unittests for EventHandler.run() limits and progress.py """
+import sys
+import os
+import unittest
+from StringIO import StringIO
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+from icfire.progress import ProgressReporter
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc2Fast.json')
+
+
+class RunTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        network = Network()
+        network.load(TESTCASE)
+        self.handler = EventHandler(network)
+
+    def testSteps(self):
+        """ Tests that run() stops after the given number of steps. """
+        self.assertEqual(3000, self.handler.run(3000))
+
+    def testUntil(self):
+        """ Tests that run() stops before the first Event at the horizon. """
+        steps = self.handler.run(until=1000)
+        self.assertGreater(steps, 0)
+        self.assertLess(self.handler.time, 1000)
+        self.assertGreaterEqual(self.handler._queue.peek().timestamp, 1000)
+
+        # Continuing to a later horizon takes more steps
+        self.assertGreater(self.handler.run(until=2000), 0)
+        self.assertLess(self.handler.time, 2000)
+        self.assertEqual(0, self.handler.run(until=2000))
+
+    def testWallSeconds(self):
+        """ Tests that run() stops after the wall time limit. """
+        steps = self.handler.run(max_wall_seconds=0)
+        self.assertEqual(1000, steps)
+        self.assertFalse(self.handler.completed())
+
+    def testProgress(self):
+        """ Tests that the reporter prints every N events and at the end. """
+        stream = StringIO()
+        self.handler.run(2500, progress=ProgressReporter(events=1000,
+                                                         stream=stream))
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(['1000', '2000', '2500'],
+                         [l.split()[0] for l in lines])
+        self.assertIn('events/s', lines[0])
+        self.assertIn('sim ms/s', lines[0])
+
+    def testProgressSeconds(self):
+        """ Tests that a reporter by wall time prints at least at the end. """
+        stream = StringIO()
+        self.handler.run(2500, progress=ProgressReporter(seconds=1e6,
+                                                         stream=stream))
+        self.assertEqual(['2500'],
+                         [l.split()[0] for l in stream.getvalue().splitlines()])
+
+
+if __name__ == '__main__':
+    unittest.main()
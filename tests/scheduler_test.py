@@ -0,0 +1,139 @@
+""" Unittests for scheduler.py """
+import sys
+import os
+import json
+import random
+import unittest
+from Queue import Empty
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.event import Event
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+from icfire.scheduler import HeapScheduler, CalendarScheduler, create
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc0Reno.json')
+
+
+class HeapSchedulerTest(unittest.TestCase):
+
+    def testOrder(self):
+        """ Tests that Events come out in timestamp order. """
+        e1 = Event(5, 'obj', 'message')
+        e2 = Event(0, 'obj', 'message')
+        e3 = Event(7, 'obj', 'message')
+        e4 = Event(1, 'obj', 'message')
+        s = HeapScheduler([e1, e2, e3, e4])
+
+        self.assertEqual(4, s.qsize())
+        self.assertEqual(e2, s.get())
+        self.assertEqual(e4, s.get())
+        self.assertEqual(e1, s.get())
+        self.assertEqual(e3, s.get())
+        self.assertTrue(s.empty())
+        with self.assertRaises(Empty):
+            s.get()
+        with self.assertRaises(Empty):
+            s.peek()
+
+    def testTies(self):
+        """ Tests that ties are broken by Event creation order. """
+        events = [Event(random.randint(0, 20), 'obj', 'message')
+                  for _ in xrange(500)]
+        shuffled = list(events)
+        random.shuffle(shuffled)
+        s = HeapScheduler(shuffled)
+
+        expected = sorted(events, key=lambda e: (e.timestamp, e._internalid))
+        self.assertEqual(expected, [s.get() for _ in xrange(len(events))])
+
+
+class CalendarSchedulerTest(unittest.TestCase):
+
+    def testMatchesHeap(self):
+        """ Tests that the calendar queue dequeues in the same order as the
+        heap while Events are interleaved and the calendar resizes.
+        """
+        heap = HeapScheduler()
+        calendar = CalendarScheduler(width=.5, nbuckets=4)
+        now = -100
+        for _ in xrange(20000):
+            if heap.qsize() and random.random() < .5:
+                self.assertIs(heap.peek(), calendar.peek())
+                e = heap.get()
+                self.assertIs(e, calendar.get())
+                now = e.timestamp
+            else:
+                e = Event(now + random.choice([0, random.expovariate(1),
+                                               random.uniform(0, 1000)]),
+                          'obj', 'message')
+                heap.put(e)
+                calendar.put(e)
+
+        while not heap.empty():
+            self.assertIs(heap.get(), calendar.get())
+        self.assertTrue(calendar.empty())
+        with self.assertRaises(Empty):
+            calendar.get()
+
+    def testPeek(self):
+        """ Tests that peek leaves the calendar queue unchanged, including
+        when the scan jumps ahead over a sparse queue.
+        """
+        calendar = CalendarScheduler(width=1, nbuckets=4, resize=False)
+        with self.assertRaises(Empty):
+            calendar.peek()
+        late = Event(1000, 'obj', 'message')
+        calendar.put(late)
+        self.assertIs(late, calendar.peek())
+        self.assertIs(late, calendar.peek())
+        self.assertEqual(1, calendar.qsize())
+
+        # An earlier Event put after a peek still comes first
+        early = Event(2, 'obj', 'message')
+        calendar.put(early)
+        self.assertIs(early, calendar.peek())
+        self.assertIs(early, calendar.get())
+        self.assertIs(late, calendar.get())
+        self.assertTrue(calendar.empty())
+
+
+class CreateTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        with open(TESTCASE, 'r') as f:
+            self.data = json.load(f)
+
+    def testCreate(self):
+        """ Tests that schedulers are created by name. """
+        network = Network()
+        network.loadDict(self.data)
+        self.assertIsInstance(create('heap', network), HeapScheduler)
+        self.assertIsInstance(create('calendar', network), CalendarScheduler)
+        with self.assertRaises(ValueError):
+            create('wheel', network)
+
+    def testNetworkScheduler(self):
+        """ Tests that EventHandlers use the scheduler of the json file. """
+        times = []
+        for name in ('heap', 'calendar'):
+            network = Network()
+            network.loadDict(dict(self.data, scheduler=name))
+            handler = EventHandler(network)
+            self.assertIsInstance(handler._queue,
+                                  {'heap': HeapScheduler,
+                                   'calendar': CalendarScheduler}[name])
+            handler.run(5000)
+            times.append(handler.time)
+        self.assertEqual(times[0], times[1])
+
+        handler = EventHandler(network, scheduler='heap')
+        self.assertIsInstance(handler._queue, HeapScheduler)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+""" Unittests for the helper functions of stats.py """
+import sys
+import os
+import json
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger, stats
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+from icfire.timeseries import BinnedSeries, TimeSeries
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc2Fast.json')
+
+# Data points before 0, in the second and fourth interval, and one at the
+# end that starts an unfinished interval
+DATA = {-5: 4, 1: 10, 3: 20, 9.5: 1, 11: 6, 12: 5}
+
+
+class StatsHelperTest(unittest.TestCase):
+
+    def testRate(self):
+        """ Tests averaging per interval, including empty intervals. """
+        times, rates = stats.calcRate(DATA, 4)
+        self.assertEqual([0, 4, 8, 12], list(times))
+        self.assertEqual([1., 7.5, 0., 1.75], list(rates))
+
+    def testIntervalsum(self):
+        """ Tests summing per interval, keeping integers. """
+        times, sums = stats.calcIntervalsum(DATA, 4)
+        self.assertEqual([0, 4, 8, 12], list(times))
+        self.assertEqual([4, 30, 0, 7], list(sums))
+        self.assertEqual('i', sums.dtype.kind)
+
+    def testSmooth(self):
+        """ Tests averaging over the data points, skipping empty
+        intervals.
+        """
+        times, means = stats.calcSmooth(DATA, 4)
+        self.assertEqual([0, 4, 12], list(times))
+        self.assertEqual([4, 15, 3], list(means))
+
+        times, means = stats.calcSmooth({1: 1., 2: 2., 7: 0.}, 4)
+        self.assertEqual([4], list(times))
+        self.assertEqual([1.5], list(means))
+
+    def testMax(self):
+        """ Tests maximum per interval, with 0 for empty intervals. """
+        times, maxes = stats.calcMax({1: 3., 2: 5., 3: -1., 5: -2., 9: 7.,
+                                      13: 1.}, 4)
+        self.assertEqual([0, 4, 8, 12], list(times))
+        self.assertEqual([0., 5., 0., 7.], list(maxes))
+
+    def testTimeSeries(self):
+        """ Tests that a TimeSeries gives the same results as a dict. """
+        series = TimeSeries(int)
+        for t in sorted(DATA):
+            series.add(t, DATA[t])
+        for calc in (stats.calcRate, stats.calcSmooth,
+                     stats.calcIntervalsum, stats.calcMax):
+            for expected, result in zip(calc(DATA, 4), calc(series, 4)):
+                self.assertEqual(list(expected), list(result))
+        self.assertEqual(list(stats.calcCumsum(DATA)[1]),
+                         list(stats.calcCumsum(series)[1]))
+
+    def testEmpty(self):
+        """ Tests series without a complete interval. """
+        for calc in (stats.calcRate, stats.calcSmooth,
+                     stats.calcIntervalsum, stats.calcMax):
+            self.assertEqual(0, len(calc({}, 10)[0]))
+            self.assertEqual(0, len(calc(TimeSeries(), 10)[0]))
+            self.assertEqual(0, len(calc({-3: 1.}, 10)[0]))
+
+    def testFloatResolution(self):
+        """ Tests that interval ends are the running sum of the
+        resolution.
+        """
+        data = dict((i * .1, 1.) for i in xrange(100))
+        times, sums = stats.calcIntervalsum(data, .1)
+        expected = [0]
+        for _ in xrange(len(times) - 1):
+            expected.append(expected[-1] + .1)
+        self.assertEqual(expected, list(times))
+        self.assertEqual(len(data), np.sum(sums) + 1)
+
+
+
+class BinnedStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        with open(TESTCASE, 'r') as f:
+            data = json.load(f)
+        self.networks = []
+        for resolution in (None, 20):
+            network = Network()
+            network.loadDict(dict(data, stats_resolution=resolution))
+            EventHandler(network).run(20000)
+            self.networks.append(network)
+
+    def testSameAsRecords(self):
+        """ Tests that plots from bins match plots from every record. """
+        raw, binned = self.networks
+        self.assertIsInstance(binned.flows['F1'].stats.rttdelay,
+                              BinnedSeries)
+        pairs = []
+        for f in raw.flows:
+            for name in ('bytessent', 'bytesreceived', 'rttdelay',
+                         'windowsize'):
+                pairs.append((getattr(raw.flows[f].stats, name),
+                              getattr(binned.flows[f].stats, name)))
+        for l in raw.links:
+            for name in ('bufferoccupancy', 'lostpackets', 'bytesflowed'):
+                pairs.append((getattr(raw.links[l].stats, name),
+                              getattr(binned.links[l].stats, name)))
+
+        for records, bins in pairs:
+            for calc in (stats.calcRate, stats.calcSmooth,
+                         stats.calcIntervalsum, stats.calcMax):
+                for resolution in (20, 100):
+                    expected = calc(records, resolution)
+                    result = calc(bins, resolution)
+                    self.assertEqual(list(expected[0]), list(result[0]))
+                    np.testing.assert_allclose(expected[1], result[1],
+                                               rtol=1e-12)
+
+    def testResolution(self):
+        """ Tests that plots at other resolutions are refused. """
+        with self.assertRaises(ValueError):
+            stats.calcRate(self.networks[1].links['L1'].stats.bytesflowed,
+                           30)
+        with self.assertRaises(AssertionError):
+            self.networks[1].links['L1'].stats.setResolution(40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+""" Unittests for summary.py """
+import sys
+import os
+import csv
+import json
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.eventhandler import EventHandler
+from icfire.network import Network
+from icfire.summary import jainIndex, percentiles
+from icfire.timeseries import BinnedSeries, TimeSeries
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc2Fast.json')
+
+
+def run(steps, resolution=None, bytes=None):
+    with open(TESTCASE) as f:
+        data = json.load(f)
+    if bytes is not None:
+        for flow in data['flows']:
+            flow['bytes'] = bytes
+    network = Network(statsResolution=resolution)
+    network.loadDict(data)
+    handler = EventHandler(network)
+    handler.run(steps)
+    return network, handler
+
+
+class SummaryTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+
+    def testMetrics(self):
+        """ Tests the metrics against the recorded stats. """
+        network, handler = run(100000)
+        summary = network.summary(handler.time)
+        self.assertEqual(handler.time, summary.time)
+
+        f1 = network.flows['F1']
+        m = summary.flows['F1']
+        self.assertEqual(f1.stats.bytesreceived.values.sum(), m['received'])
+        self.assertEqual(f1.stats.bytessent.values.sum(), m['sent'])
+        self.assertLessEqual(m['delivered'], m['received'])
+        self.assertAlmostEqual(m['delivered'] / (handler.time - 500),
+                               m['goodput'])
+        self.assertAlmostEqual(f1.stats.rttdelay.values.mean(), m['rtt'])
+        self.assertAlmostEqual(
+            np.percentile(f1.stats.rttdelay.values, 90), m['rttP90'])
+        self.assertIsNone(m['completionTime'])
+
+        # Flows that have not started yet
+        self.assertIsNone(summary.flows['F3']['goodput'])
+        self.assertIsNone(summary.flows['F3']['rtt'])
+
+        l1 = network.links['L1']
+        m = summary.links['L1']
+        self.assertEqual(l1.stats.bufferoccupancy.values.max(),
+                         m['peakBuffer'])
+        self.assertAlmostEqual(
+            l1.stats.bytesflowed.values.sum() /
+            (l1.rate * 16384 / 125. * handler.time), m['utilization'])
+        self.assertLessEqual(m['utilization'], 1)
+
+        flat = summary.flat()
+        self.assertEqual(summary.flows['F2']['goodput'], flat['F2.goodput'])
+        self.assertEqual(summary.links['L1']['lost'], flat['L1.lost'])
+        self.assertEqual(summary.fairness, flat['fairness'])
+
+    def testCompleted(self):
+        """ Tests completion times of a run to the end. """
+        network, handler = run(0, bytes=500000)
+        summary = network.summary(handler.time)
+        for flowId, m in summary.flows.iteritems():
+            f = network.flows[flowId]
+            self.assertEqual(f.completedAt - m['start'], m['completionTime'])
+            self.assertEqual(f.bytes, m['delivered'])
+
+    def testBinned(self):
+        """ Tests that binned stats give the same totals and peaks. """
+        raw = run(50000)
+        binned = run(50000, 10)
+        a = raw[0].summary(raw[1].time)
+        b = binned[0].summary(binned[1].time)
+        for table in ('flows', 'links'):
+            for key, metrics in getattr(a, table).iteritems():
+                for name, value in metrics.iteritems():
+                    if name.startswith('rttP') or value is None:
+                        continue
+                    self.assertAlmostEqual(
+                        value, getattr(b, table)[key][name], 6,
+                        '%s.%s' % (key, name))
+
+    def testSave(self):
+        """ Tests writing json and csv. """
+        network, handler = run(20000)
+        summary = network.summary(handler.time)
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            summary.save(filename)
+            with open(filename) as f:
+                data = json.load(f)
+            self.assertEqual(summary.flows['F1']['sent'],
+                             data['flows']['F1']['sent'])
+
+            summary.saveCsv(filename)
+            with open(filename) as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(network.flows) + len(network.links),
+                             len(rows))
+            self.assertEqual(('flow', 'F1'), (rows[0]['kind'], rows[0]['id']))
+            self.assertEqual(str(summary.links['L1']['flowed']),
+                             [r for r in rows if r['id'] == 'L1'][0]['flowed'])
+        finally:
+            os.remove(filename)
+
+
+class HelperTest(unittest.TestCase):
+
+    def testJainIndex(self):
+        self.assertEqual(1, jainIndex([3, 3, 3]))
+        self.assertAlmostEqual(.5, jainIndex([1, 0]))
+        self.assertAlmostEqual(.9, jainIndex([1, 2]))
+        self.assertIsNone(jainIndex([]))
+
+    def testPercentiles(self):
+        series = TimeSeries()
+        self.assertEqual([None, None], percentiles(series, (50, 90)))
+        for t, v in enumerate([5., 1., 4., 2., 3.]):
+            series.set(t, v)
+        self.assertEqual([3., 5.], percentiles(series, (50, 100)))
+
+        # Interval means 1 (3 records), 10 (1 record)
+        binned = BinnedSeries(10)
+        for t, v in [(1, 0.), (2, 1.), (3, 2.), (11, 10.)]:
+            binned.set(t, v)
+        self.assertEqual([1., 1., 10.], percentiles(binned, (0, 75, 90)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+""" Unittests for sweep.py """
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.sweep import expandGrid, applyParams, checkParams, sweep
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc2Fast.json')
+
+
+class SweepTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        with open(TESTCASE, 'r') as f:
+            self.data = json.load(f)
+
+    def testExpandGrid(self):
+        """ Tests that every combination of values is a point. """
+        points = expandGrid({'rate': [1, 2], 'flowType': ['a', 'b', 'c']})
+        self.assertEqual(6, len(points))
+        self.assertIn({'rate': 2, 'flowType': 'c'}, points)
+        self.assertEqual([{}], expandGrid({}))
+
+    def testApplyParams(self):
+        """ Tests that parameters are set on the right objects. """
+        data = applyParams(self.data, {'buffsize': 32, 'L1.rate': 20,
+                                       'F2.alpha': 5, 'init_time': -100})
+        links = dict((l['id'], l) for l in data['links'])
+        flows = dict((f['name'], f) for f in data['flows'])
+        self.assertTrue(all(l['buffsize'] == 32 for l in data['links']))
+        self.assertEqual(20, links['L1']['rate'])
+        self.assertEqual(10, links['L2']['rate'])
+        self.assertEqual({'alpha': 5}, flows['F2']['params'])
+        self.assertNotIn('params', flows['F1'])
+        self.assertTrue(all(r['init_time'] == -100 for r in data['routers']))
+        self.assertEqual(128, self.data['links'][0]['buffsize'])  # copied
+
+        # Fast TCP parameters do not apply to Reno flows
+        data = applyParams(self.data, {'flowType': 'TCPRenoFlow',
+                                       'alpha': 5})
+        self.assertFalse(any('params' in f for f in data['flows']))
+
+        with self.assertRaises(ValueError):
+            applyParams(self.data, {'L9.rate': 1})
+
+    def testUnknownFlowParamTarget(self):
+        """ Tests that Flow parameters of unknown flows are rejected. """
+        for key in ('F9.alpha', 'X.gamma'):
+            with self.assertRaises(ValueError):
+                applyParams(self.data, {key: 1})
+
+    def testUnusedFlowParam(self):
+        """ Tests that sweeps reject Flow parameters no flow takes. """
+        reno = applyParams(self.data, {'flowType': 'TCPRenoFlow'})
+        with self.assertRaises(ValueError):
+            checkParams(reno, expandGrid({'F1.alpha': [5, 10]}))
+        with self.assertRaises(ValueError):
+            sweep(reno, expandGrid({'alpha': [5, 10]}), steps=10,
+                  processes=1)
+        # Only the flow type given for F1 counts
+        with self.assertRaises(ValueError):
+            checkParams(self.data, expandGrid({
+                'F1.flowType': ['TCPRenoFlow'], 'F1.alpha': [5, 10]}))
+
+        # Used by some points of a sweep over flow types
+        checkParams(reno, expandGrid({
+            'flowType': ['TCPRenoFlow', 'FastTCPFlow'], 'alpha': [5, 10]}))
+        checkParams(reno, expandGrid({
+            'F2.flowType': ['FastTCPFlow'], 'F2.alpha': [5, 10]}))
+        checkParams(self.data, expandGrid({'F1.alpha': [5, 10]}))
+
+    def testSweep(self):
+        """ Tests that the pool returns the same rows as running in this
+        process, in order.
+        """
+        points = expandGrid({'buffsize': [32, 128]})
+        rows = sweep(self.data, points, steps=3000, processes=1)
+        self.assertEqual(rows, sweep(self.data, points, steps=3000,
+                                     processes=2))
+        self.assertEqual([32, 128], [r['buffsize'] for r in rows])
+        self.assertIn('F1.received', rows[0])
+
+
+    def testLogging(self):
+        """ Tests that workers do not write lines the parent buffered, and
+        that runs in this process leave the logger as it was.
+        """
+        directory = tempfile.mkdtemp()
+        filename = os.path.join(directory, 'log.txt')
+        points = expandGrid({'buffsize': [32, 128]})
+        try:
+            logger.configure(filename, buffersize=30)
+            logger.log('a line longer than the buffer is written at once')
+            logger.log('second line')
+            sweep(self.data, points, steps=100, processes=2)
+            self.assertTrue(logger.enabled)
+
+            sweep(self.data, points, steps=100, processes=1)
+            self.assertTrue(logger.enabled)
+            logger.close()
+            with open(filename) as f:
+                self.assertEqual(1, f.read().count('second line'))
+        finally:
+            logger.disable()
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+""" Unittests for timeseries.py """
+import sys
+import os
+import cPickle as pickle
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire.timeseries import BinnedSeries, TimeSeries
+
+
+class TimeSeriesTest(unittest.TestCase):
+
+    def testAdd(self):
+        """ Tests that records at the same time are added together. """
+        series = TimeSeries(int)
+        series.add(1., 1024)
+        series.add(1., 64)
+        series.add(2.5, 1024)
+        self.assertEqual([1., 2.5], list(series.times))
+        self.assertEqual([1088, 1024], list(series.values))
+        self.assertEqual([(1., 1088), (2.5, 1024)], list(series))
+        self.assertEqual(2, len(series))
+
+    def testSet(self):
+        """ Tests that a record at the same time replaces the last one. """
+        series = TimeSeries()
+        series.set(1., 3.)
+        series.set(1., 4.)
+        series.set(2., 5.)
+        self.assertEqual([(1., 4.), (2., 5.)], list(series))
+
+    def testOrder(self):
+        """ Tests that records must not go back in time. """
+        series = TimeSeries()
+        series.add(2., 1.)
+        with self.assertRaises(ValueError):
+            series.add(1., 1.)
+
+    def testGrowth(self):
+        """ Tests that views stay valid while the series grows. """
+        series = TimeSeries(int, capacity=1)
+        series.add(0., 0)
+        times = series.times
+        for i in xrange(1, 1000):
+            series.add(float(i), i)
+        self.assertEqual([0.], list(times))
+        self.assertEqual(range(1000), list(series.values))
+        with self.assertRaises(ValueError):
+            series.values[0] = 1  # views are read only
+
+    def testMerge(self):
+        """ Tests merging, adding values at the same time. """
+        a, b = TimeSeries(int), TimeSeries(int)
+        for t, value in ((1., 1), (3., 2), (5., 3)):
+            a.add(t, value)
+        for t, value in ((2., 10), (3., 20)):
+            b.add(t, value)
+        a.merge(b)
+        self.assertEqual([(1., 1), (2., 10), (3., 22), (5., 3)], list(a))
+        a.add(6., 1)
+        self.assertEqual(5, len(a))
+
+    def testPickle(self):
+        """ Tests that a pickled series is equal and can continue. """
+        series = TimeSeries(int)
+        for i in xrange(100):
+            series.add(float(i), i)
+        copy = pickle.loads(pickle.dumps(series, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(series, copy)
+        copy.add(100., 1)
+        self.assertNotEqual(series, copy)
+        self.assertEqual(101, len(copy))
+
+
+
+class BinnedSeriesTest(unittest.TestCase):
+
+    def testBins(self):
+        """ Tests sums, counts, maxes and last values per interval. """
+        series = BinnedSeries(10, int)
+        for t, value in ((-5., 7), (1., 3), (1., 4), (9., 2), (35., 1)):
+            series.add(t, value)
+        self.assertEqual([0, 10, 20, 30, 40], list(series.times))
+        self.assertEqual([7, 9, 0, 0, 1], list(series.sums))
+        self.assertEqual([1, 2, 0, 0, 1], list(series.counts))
+        self.assertEqual([7, 7, 0, 0, 1], list(series.maxes))
+        self.assertEqual([7, 2, 2, 2, 1], list(series.lasts))
+        self.assertEqual(17, series.total())
+
+    def testReplace(self):
+        """ Tests that a replaced value is left out of sums and maxes. """
+        series = BinnedSeries(10)
+        series.set(1., 2.)
+        series.set(2., 8.)
+        series.set(2., 3.)
+        self.assertEqual([5.], list(series.sums[1:]))
+        self.assertEqual([3.], list(series.maxes[1:]))
+        self.assertEqual([3.], list(series.lasts[1:]))
+        self.assertEqual(2.5, series.mean())
+
+    def testRebin(self):
+        """ Tests grouping intervals into a coarser resolution. """
+        series = BinnedSeries(10, int)
+        for t in xrange(-5, 95, 5):
+            series.add(float(t), t)
+        times, sums, counts, maxes, lasts = series.rebin(40)
+        self.assertEqual([0, 40, 80, 120], list(times))
+        self.assertEqual([-5, 140, 460, 255], list(sums))
+        self.assertEqual([1, 8, 8, 3], list(counts))
+        self.assertEqual([-5, 35, 75, 90], list(maxes))
+        self.assertEqual([-5, 35, 75, 90], list(lasts))
+        with self.assertRaises(ValueError):
+            series.rebin(25)
+
+    def testMerge(self):
+        """ Tests adding the intervals of another series. """
+        a, b = BinnedSeries(10, int), BinnedSeries(10, int)
+        a.add(5., 1)
+        b.add(5., 2)
+        b.add(25., 4)
+        a.merge(b)
+        self.assertEqual([0, 3, 0, 4], list(a.sums))
+        self.assertEqual([0, 2, 0, 1], list(a.counts))
+        a.add(26., 1)
+        self.assertEqual(5, a.sums[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
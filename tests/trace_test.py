@@ -0,0 +1,60 @@
+""" Unittests for trace.py """
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire.event import PacketEvent, UpdateFlowEvent
+from icfire.packet import DataPacket, RoutingRequestPacket
+from icfire.trace import TraceWriter, TraceReader
+
+
+class TraceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'test.trace')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testRoundTrip(self):
+        """ Tests that records written can be read back. """
+        with TraceWriter(self.filename, chunksize=2) as trace:
+            for i in xrange(5):
+                trace.record(PacketEvent(
+                    i * .5, 'H1', 'L1', DataPacket('H1', 'H2', i, 'F1')))
+            trace.record(PacketEvent(3, 'R1', 'L2', RoutingRequestPacket('R1')))
+            trace.record(UpdateFlowEvent(4, 'H1', 'F2'))
+
+        trace = TraceReader(self.filename)
+        r = trace.records
+        self.assertEqual(7, len(trace))
+        self.assertEqual([0, .5, 1, 1.5, 2, 3, 4], list(r['timestamp']))
+        self.assertEqual(range(5) + [-1, -1], list(r['index']))
+        self.assertEqual([1024] * 5 + [64, 0], list(r['size']))
+
+        self.assertEqual(['L1'] * 5 + ['L2', 'H1'],
+                         [trace.objects[i] for i in r['object']])
+        self.assertEqual(['H1'] * 5 + ['R1'],
+                         [trace.objects[i] for i in r['sender'][:6]])
+        self.assertEqual(-1, r['sender'][6])
+        self.assertEqual(['F1'] * 5, [trace.flows[i] for i in r['flow'][:5]])
+        self.assertEqual(-1, r['flow'][5])
+        self.assertEqual(trace.flowId('F2'), r['flow'][6])
+
+        self.assertEqual(5, (r['packet'] == trace.packetCode('DataPacket')).sum())
+        self.assertEqual(6, (r['type'] == trace.typeCode('PacketEvent')).sum())
+        self.assertEqual(-1, r['packet'][6])
+
+    def testEmpty(self):
+        """ Tests that an empty trace can be read. """
+        TraceWriter(self.filename).close()
+        self.assertEqual(0, len(TraceReader(self.filename)))
+
+
+if __name__ == '__main__':
+    unittest.main()
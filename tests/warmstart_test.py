@@ -0,0 +1,64 @@
+""" Unittests for warmstart.py """
+import sys
+import os
+import json
+import unittest
+
+sys.path.append(os.path.dirname(os.getcwd()))
+
+from icfire import logger
+from icfire.sweep import expandGrid, sweep
+from icfire.warmstart import warmup, forkMap, warmSweep
+
+TESTCASE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'testcases', 'tc2Fast.json')
+
+
+class WarmStartTest(unittest.TestCase):
+
+    def setUp(self):
+        logger.disable()
+        with open(TESTCASE, 'r') as f:
+            self.data = json.load(f)
+
+    def testWarmup(self):
+        """ Tests that the warmup converges routing and stops before the
+        first flow starts.
+        """
+        handler = warmup(self.data)
+        network = handler._network
+        self.assertFalse(network.flows)
+        self.assertLess(handler.time, 500)
+        self.assertGreaterEqual(handler._queue.peek().timestamp, 500)
+        self.assertEqual(network.links['L1'],
+                         network.nodes['R1'].getRoute('T1'))
+
+    def testForkMap(self):
+        """ Tests that children see this process' state and results come
+        back in order.
+        """
+        state = {'offset': 100}
+        self.assertEqual([100, 101, 102, 103],
+                         forkMap(lambda x: x + state['offset'], range(4), 2))
+        with self.assertRaises(RuntimeError):
+            forkMap(lambda x: 1 / x, [1, 0])
+
+    def testMatchesColdSweep(self):
+        """ Tests that warm started runs give the same results as runs
+        started from scratch.
+        """
+        points = expandGrid({'alpha': [10, 30], 'L1.rate': [10, 20],
+                             'bytes': [200000]})
+        warm = warmSweep(self.data, points, processes=2)
+        cold = sweep(self.data, points, processes=1)
+        for w, c in zip(warm, cold):
+            self.assertEqual(w['alpha'], c['alpha'])
+            self.assertEqual(w['L1.rate'], c['L1.rate'])
+            self.assertTrue(w['completed'])
+            for f in ('F1', 'F2', 'F3'):
+                self.assertAlmostEqual(
+                    w[f + '.completedAt'], c[f + '.completedAt'],
+                    delta=.01 * c[f + '.completedAt'])
+
+if __name__ == '__main__':
+    unittest.main()